@@ -0,0 +1,258 @@
+# (C) British Crown Copyright 2017-2025, Met Office.
+# Please see LICENSE.md for license details.
+
+"""
+Synthetic data generators for the benchmarks.
+
+Gridded cubes (NetCDF, Zarr and GRIB) and GSOD-like station CSVs are written block by block, so files of
+tens of GB can be generated with a small, fixed amount of memory. The rates of NaN, fill and outlier values
+are controllable and the output is deterministic for a given seed.
+
+Usage:
+    python -m benchmarks.generate --kind netcdf --scale m --output /tmp/bench/cube_m.nc --nan-rate 0.05
+"""
+
+import os
+import argparse
+
+import numpy as np
+import pandas as pd
+
+MB = 1024 ** 2
+GB = 1024 ** 3
+
+# Approximate on-disk sizes of the generated files
+SCALES = {
+    'xs': 10 * MB,
+    's': 100 * MB,
+    'm': GB,
+    'l': 10 * GB,
+    'xl': 40 * GB,
+}
+
+GRIDDED_KINDS = ['netcdf', 'zarr', 'grib']
+TABULAR_KINDS = ['csv']
+FILE_EXTENSIONS = {'netcdf': '.nc', 'zarr': '.zarr', 'grib': '.grib', 'csv': '.csv'}
+
+FILL_VALUE = -9999.0
+# GSOD marks missing values with runs of 9s
+GSOD_MISSING = 9999.9
+
+# Values per time step of a gridded cube: a 1 degree global grid
+N_LAT, N_LON = 180, 360
+# Time steps written per block
+TIME_BLOCK = 24
+
+# Rough bytes per row of the station CSV, used to size it
+CSV_ROW_BYTES = 150
+CSV_BLOCK_ROWS = 100_000
+
+
+def parse_arguments():
+    """Parse command-line arguments."""
+    parser = argparse.ArgumentParser(description="Generate synthetic gridded or tabular benchmark data.")
+    parser.add_argument('--kind', choices=GRIDDED_KINDS + TABULAR_KINDS, required=True, help="Kind of file to generate")
+    parser.add_argument('--scale', choices=list(SCALES), default='xs', help="Approximate size of the file")
+    parser.add_argument('--output', type=str, required=True, help="Path of the file to write")
+    parser.add_argument('--nan-rate', type=float, default=0.01, help="Fraction of values that are NaN (empty in CSVs)")
+    parser.add_argument('--fill-rate', type=float, default=0.01, help="Fraction of values set to the fill value")
+    parser.add_argument('--outlier-rate', type=float, default=0.001, help="Fraction of values that are extreme outliers")
+    parser.add_argument('--seed', type=int, default=0, help="Random seed")
+    return parser.parse_args()
+
+
+def _apply_rates(rng, values, nan_rate, fill_rate, outlier_rate, fill_value):
+    """Overwrite random positions of values in place with NaNs, fill values and outliers."""
+    draw = rng.random(values.shape)
+    outliers = draw < outlier_rate
+    values[outliers] += rng.choice([-1.0, 1.0], size=int(outliers.sum())) * 50.0
+    values[(draw >= outlier_rate) & (draw < outlier_rate + fill_rate)] = fill_value
+    values[(draw >= outlier_rate + fill_rate) & (draw < outlier_rate + fill_rate + nan_rate)] = np.nan
+    return values
+
+
+def gridded_block(start, n_time, nan_rate=0.01, fill_rate=0.01, outlier_rate=0.001, seed=0):
+    """
+    Return a float32 (n_time, N_LAT, N_LON) block of a temperature-like field starting at time step start.
+    Each block has its own random stream, so blocks can be generated in any order.
+    """
+    rng = np.random.default_rng([seed, start])
+    lat = np.linspace(-89.5, 89.5, N_LAT, dtype=np.float32)
+    climatology = 288.0 - 30.0 * np.sin(np.deg2rad(lat)) ** 2
+    hours = np.arange(start, start + n_time, dtype=np.float32)
+    seasonal = 5.0 * np.sin(2 * np.pi * hours / (24 * 365.25))
+    values = (climatology[None, :, None] + seasonal[:, None, None]
+              + rng.normal(0.0, 2.0, (n_time, N_LAT, N_LON))).astype(np.float32)
+    return _apply_rates(rng, values, nan_rate, fill_rate, outlier_rate, FILL_VALUE)
+
+
+def gridded_time_steps(target_bytes):
+    """Number of hourly time steps for a float32 cube of roughly target_bytes."""
+    return max(2, int(target_bytes // (N_LAT * N_LON * 4)))
+
+
+def _coordinates():
+    return np.linspace(-89.5, 89.5, N_LAT), np.linspace(-179.5, 179.5, N_LON)
+
+
+def generate_netcdf(path, target_bytes, **rates):
+    """Write an uncompressed NetCDF4 cube of roughly target_bytes, one time block at a time."""
+    import netCDF4
+
+    n_time = gridded_time_steps(target_bytes)
+    lat, lon = _coordinates()
+    with netCDF4.Dataset(path, 'w') as nc:
+        nc.title = 'Synthetic benchmark cube'
+        nc.version = '1'
+        nc.createDimension('time', None)
+        nc.createDimension('lat', N_LAT)
+        nc.createDimension('lon', N_LON)
+        time_var = nc.createVariable('time', 'f8', ('time',))
+        time_var.units = 'hours since 2000-01-01 00:00:00'
+        time_var.calendar = 'standard'
+        nc.createVariable('lat', 'f8', ('lat',))[:] = lat
+        nc.createVariable('lon', 'f8', ('lon',))[:] = lon
+        nc['lat'].units = 'degrees_north'
+        nc['lon'].units = 'degrees_east'
+        tas = nc.createVariable('tas', 'f4', ('time', 'lat', 'lon'), fill_value=np.float32(FILL_VALUE),
+                                chunksizes=(1, N_LAT, N_LON))
+        tas.units = 'K'
+        tas.long_name = 'Near-surface air temperature'
+        tas.set_auto_mask(False)
+        for start in range(0, n_time, TIME_BLOCK):
+            stop = min(start + TIME_BLOCK, n_time)
+            time_var[start:stop] = np.arange(start, stop, dtype=np.float64)
+            tas[start:stop] = gridded_block(start, stop - start, **rates)
+
+
+def generate_zarr(path, target_bytes, **rates):
+    """Write a Zarr store of roughly target_bytes with consolidated metadata, appending one time block at a time."""
+    import xarray as xr
+
+    n_time = gridded_time_steps(target_bytes)
+    lat, lon = _coordinates()
+    for start in range(0, n_time, TIME_BLOCK):
+        stop = min(start + TIME_BLOCK, n_time)
+        block = xr.Dataset(
+            {'tas': (('time', 'lat', 'lon'), gridded_block(start, stop - start, **rates), {'units': 'K'})},
+            coords={'time': pd.Timestamp('2000-01-01') + pd.to_timedelta(np.arange(start, stop), unit='h'),
+                    'lat': lat, 'lon': lon},
+            attrs={'title': 'Synthetic benchmark cube', 'version': '1'},
+        )
+        if start == 0:
+            block.to_zarr(path, mode='w', consolidated=True,
+                          encoding={'tas': {'chunks': (TIME_BLOCK, N_LAT, N_LON)}})
+        else:
+            block.to_zarr(path, append_dim='time', consolidated=True)
+
+
+def generate_grib(path, target_bytes, **rates):
+    """Write a GRIB2 file of roughly target_bytes, one message per time step. Requires eccodes."""
+    import eccodes
+
+    n_time = gridded_time_steps(target_bytes)
+    sample = eccodes.codes_grib_new_from_samples('regular_ll_sfc_grib2')
+    keys = {
+        'Ni': N_LON, 'Nj': N_LAT,
+        'latitudeOfFirstGridPointInDegrees': 89.5, 'latitudeOfLastGridPointInDegrees': -89.5,
+        'longitudeOfFirstGridPointInDegrees': 0.5, 'longitudeOfLastGridPointInDegrees': 359.5,
+        'iDirectionIncrementInDegrees': 1.0, 'jDirectionIncrementInDegrees': 1.0,
+        'bitmapPresent': 1, 'missingValue': FILL_VALUE,
+    }
+    with open(path, 'wb') as f:
+        for start in range(0, n_time, TIME_BLOCK):
+            stop = min(start + TIME_BLOCK, n_time)
+            # GRIB stores rows north to south
+            block = gridded_block(start, stop - start, **rates)[:, ::-1, :]
+            for offset, field in enumerate(block):
+                step = start + offset
+                handle = eccodes.codes_clone(sample)
+                for key, value in keys.items():
+                    eccodes.codes_set(handle, key, value)
+                date = pd.Timestamp('2000-01-01') + pd.Timedelta(hours=step)
+                eccodes.codes_set(handle, 'dataDate', int(date.strftime('%Y%m%d')))
+                eccodes.codes_set(handle, 'dataTime', date.hour * 100)
+                eccodes.codes_set_values(handle, np.where(np.isnan(field), FILL_VALUE, field).ravel().astype(np.float64))
+                eccodes.codes_write(handle, f)
+                eccodes.codes_release(handle)
+    eccodes.codes_release(sample)
+
+
+def station_block(start_row, n_rows, n_stations=500, nan_rate=0.01, fill_rate=0.01, outlier_rate=0.001, seed=0):
+    """Return a DataFrame of GSOD-like daily station rows, starting at row start_row of the file."""
+    rng = np.random.default_rng([seed, start_row])
+    rows = np.arange(start_row, start_row + n_rows)
+    station = rows % n_stations
+    day = rows // n_stations
+
+    station_rng = np.random.default_rng([seed, 1])
+    latitudes = station_rng.uniform(-60, 75, n_stations).round(3)
+    longitudes = station_rng.uniform(-180, 180, n_stations).round(3)
+    elevations = station_rng.uniform(0, 2500, n_stations).round(1)
+
+    seasonal = 15.0 * np.sin(2 * np.pi * day / 365.25)
+    temp = 50.0 + seasonal + rng.normal(0, 8, n_rows)
+    frame = pd.DataFrame({
+        'STATION': [f"{99000000000 + s:011d}" for s in station],
+        'DATE': (pd.Timestamp('1979-01-01') + pd.to_timedelta(day, unit='D')).strftime('%Y-%m-%d'),
+        'LATITUDE': latitudes[station],
+        'LONGITUDE': longitudes[station],
+        'ELEVATION': elevations[station],
+        'NAME': [f"STATION {s}" for s in station],
+        'TEMP': temp,
+        'DEWP': temp - np.abs(rng.normal(8, 3, n_rows)),
+        'SLP': rng.normal(1013, 10, n_rows),
+        'STP': rng.normal(990, 15, n_rows),
+        'VISIB': np.abs(rng.normal(10, 3, n_rows)),
+        'WDSP': np.abs(rng.normal(8, 4, n_rows)),
+        'MXSPD': np.abs(rng.normal(15, 5, n_rows)),
+        'MAX': temp + np.abs(rng.normal(8, 2, n_rows)),
+        'MIN': temp - np.abs(rng.normal(8, 2, n_rows)),
+        'PRCP': rng.gamma(0.5, 0.2, n_rows),
+    })
+    for column in ['TEMP', 'DEWP', 'SLP', 'STP', 'VISIB', 'WDSP', 'MXSPD', 'MAX', 'MIN', 'PRCP']:
+        frame[column] = _apply_rates(rng, frame[column].to_numpy(copy=True), nan_rate, fill_rate, outlier_rate,
+                                     GSOD_MISSING).round(2)
+    return frame
+
+
+def generate_csv(path, target_bytes, **rates):
+    """Write a GSOD-like station CSV of roughly target_bytes, one block of rows at a time."""
+    n_rows = max(1, int(target_bytes // CSV_ROW_BYTES))
+    for start in range(0, n_rows, CSV_BLOCK_ROWS):
+        block = station_block(start, min(CSV_BLOCK_ROWS, n_rows - start), **rates)
+        block.to_csv(path, mode='w' if start == 0 else 'a', header=start == 0, index=False)
+
+
+GENERATORS = {
+    'netcdf': generate_netcdf,
+    'zarr': generate_zarr,
+    'grib': generate_grib,
+    'csv': generate_csv,
+}
+
+
+def generate(kind, path, scale='xs', nan_rate=0.01, fill_rate=0.01, outlier_rate=0.001, seed=0):
+    """Generate a synthetic file of the given kind and scale."""
+    GENERATORS[kind](path, SCALES[scale], nan_rate=nan_rate, fill_rate=fill_rate, outlier_rate=outlier_rate,
+                     seed=seed)
+    return path
+
+
+def ensure_generated(kind, data_dir, scale='xs', nan_rate=0.01, fill_rate=0.01, outlier_rate=0.001, seed=0):
+    """Return the path of a generated file in data_dir, generating it if it does not exist yet."""
+    name = f"{kind}_{scale}_n{nan_rate}_f{fill_rate}_o{outlier_rate}_s{seed}{FILE_EXTENSIONS[kind]}"
+    path = os.path.join(data_dir, name)
+    if not os.path.exists(path):
+        os.makedirs(data_dir, exist_ok=True)
+        print(f"Generating {path}")
+        generate(kind, path, scale, nan_rate, fill_rate, outlier_rate, seed)
+    return path
+
+
+def main():
+    args = parse_arguments()
+    generate(args.kind, args.output, args.scale, args.nan_rate, args.fill_rate, args.outlier_rate, args.seed)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+# (C) British Crown Copyright 2017-2025, Met Office.
+# Please see LICENSE.md for license details.
+
+"""
+Benchmark the import time of the package's modules.
+
+Each module is imported in a fresh interpreter, so nothing is already loaded, and timed with
+python -X importtime (the module's cumulative time, excluding interpreter start-up). The fastest of
+--repeat runs is kept. The heavy optional packages each import pulls in are listed, and a module that
+imports one it should not (e.g. matplotlib for the tabular checks, which only need it to plot) fails
+the run, as does an import slower than --max-seconds or, by default, its limit in MAX_IMPORT_SECONDS.
+
+Usage:
+    python -m benchmarks.import_time --repeat 5
+    python -m benchmarks.import_time --compare benchmarks/results/imports-baseline.json
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+
+from benchmarks.run_benchmarks import REGRESSION_THRESHOLD, RESULTS_DIR, git_commit, save_run
+
+MODULES = [
+    'aidatareadiness.checklist_auto.tabular',
+    'aidatareadiness.checklist_auto.gridded',
+    'aidatareadiness.checklist_auto.populate',
+    'aidatareadiness.checklist_auto.collection',
+    'aidatareadiness.checklist_auto.client',
+    'aidatareadiness.utils',
+]
+
+# Packages whose import costs enough to matter at start-up
+HEAVY_PACKAGES = ['matplotlib', 'scipy', 'xarray', 'pandas', 'dask', 'tqdm', 'fsspec', 'zarr', 'cfgrib', 'rasterio',
+                  'h5py', 'netCDF4']
+
+# Packages each module must not import at load time
+FORBIDDEN_IMPORTS = {
+    'aidatareadiness.checklist_auto.tabular': ['matplotlib', 'scipy'],
+    'aidatareadiness.checklist_auto.gridded': HEAVY_PACKAGES,
+    'aidatareadiness.checklist_auto.populate': ['matplotlib', 'scipy'],
+    'aidatareadiness.checklist_auto.client': HEAVY_PACKAGES,
+    'aidatareadiness.utils': HEAVY_PACKAGES,
+}
+
+# Seconds each module may take to import, checked on every run (--max-seconds applies to all modules).
+# gridded.py is what every batch worker imports, and utils.py every notebook.
+MAX_IMPORT_SECONDS = {
+    'aidatareadiness.checklist_auto.gridded': 0.3,
+    'aidatareadiness.utils': 0.3,
+}
+
+
+def parse_arguments():
+    """Parse command-line arguments."""
+    parser = argparse.ArgumentParser(description="Benchmark the import time of the package's modules.")
+    parser.add_argument('--modules', nargs='+', default=MODULES, help="Modules to import")
+    parser.add_argument('--repeat', type=int, default=3, help="Import each module this many times and keep the fastest")
+    parser.add_argument('--max-seconds', type=float, help="Fail if any module takes longer than this to import")
+    parser.add_argument('--label', type=str, help="Label of the results file (default: 'imports', git commit and time)")
+    parser.add_argument('--output-dir', type=str, default=RESULTS_DIR, help="Directory to save results to")
+    parser.add_argument('--compare', type=str, help="Results file to compare against")
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD,
+                        help="Ratio to the baseline above which an import is flagged as a regression")
+    return parser.parse_args()
+
+
+def time_import(module):
+    """
+    Import a module in a fresh interpreter. Returns its cumulative import time in seconds and the heavy
+    packages that were loaded.
+    """
+    code = f"import sys, json, {module}; print(json.dumps(sorted(set(m.split('.')[0] for m in sys.modules))))"
+    # A headless, non-interactive environment, as batch workers have
+    env = {**os.environ, 'AIDR_HEADLESS': '1', 'MPLBACKEND': 'Agg'}
+    completed = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], capture_output=True, text=True,
+                               env=env, check=True)
+    # Lines are "import time: self [us] | cumulative | imported package", the top-level module unindented
+    cumulative = next(int(line.split('|')[1]) for line in completed.stderr.splitlines()
+                      if line.startswith('import time:') and line.split('|')[2].strip() == module)
+    loaded = set(json.loads(completed.stdout.strip().splitlines()[-1]))
+    return cumulative / 1e6, [package for package in HEAVY_PACKAGES if package in loaded]
+
+
+def run_import_benchmarks(modules, repeat=3):
+    """Time the import of each module. Returns a list of records."""
+    records = []
+    for module in modules:
+        try:
+            runs = [time_import(module) for _ in range(repeat)]
+        except subprocess.CalledProcessError as e:
+            record = {'check': 'import', 'module': module, 'error': e.stderr.strip().splitlines()[-1]}
+        else:
+            seconds, loaded = min(runs)
+            forbidden = [package for package in loaded if package in FORBIDDEN_IMPORTS.get(module, [])]
+            record = {'check': 'import', 'module': module, 'import_s': seconds, 'heavy_imports': loaded,
+                      'forbidden_imports': forbidden}
+        records.append(record)
+        print(format_record(record))
+    return records
+
+
+def format_record(record):
+    if record.get('error'):
+        return f"{record['module']:<44} ERROR {record['error']}"
+    line = f"{record['module']:<44} {record['import_s']:6.3f} s  {', '.join(record['heavy_imports']) or '-'}"
+    if record['forbidden_imports']:
+        line += f"  (should not import {', '.join(record['forbidden_imports'])})"
+    return line
+
+
+def compare_runs(records, baseline_path, threshold=REGRESSION_THRESHOLD):
+    """Return (module, ratio) for every module whose import time grew by more than threshold against a saved run."""
+    with open(baseline_path) as f:
+        baseline = {r['module']: r for r in json.load(f)['results'] if 'module' in r}
+
+    regressions = []
+    for record in records:
+        previous = baseline.get(record['module'])
+        if previous is None or record.get('error') or previous.get('error'):
+            continue
+        ratio = record['import_s'] / previous['import_s'] if previous['import_s'] else float('inf')
+        print(f"{record['module']:<44} {previous['import_s']:6.3f} s -> {record['import_s']:6.3f} s ({ratio:.2f}x)")
+        if ratio > threshold:
+            regressions.append((record['module'], ratio))
+    return regressions
+
+
+def main():
+    args = parse_arguments()
+    records = run_import_benchmarks(args.modules, args.repeat)
+    label = args.label or f"imports-{git_commit() or 'unknown'}-{time.strftime('%Y%m%d-%H%M%S')}"
+    print(f"Results saved to {save_run(records, args.output_dir, label)}")
+
+    failures = [f"{r['module']} failed to import: {r['error']}" for r in records if r.get('error')]
+    failures += [f"{r['module']} imports {', '.join(r['forbidden_imports'])}" for r in records if r.get('forbidden_imports')]
+    for record in records:
+        limit = args.max_seconds if args.max_seconds is not None else MAX_IMPORT_SECONDS.get(record['module'])
+        if limit is not None and record.get('import_s', 0) > limit:
+            failures.append(f"{record['module']} takes {record['import_s']:.3f} s to import (limit {limit} s)")
+    if args.compare:
+        failures += [f"REGRESSION: {module} import time is {ratio:.2f}x the baseline"
+                     for module, ratio in compare_runs(records, args.compare, args.threshold)]
+    for failure in failures:
+        print(failure)
+    if failures:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,310 @@
+# (C) British Crown Copyright 2017-2025, Met Office.
+# Please see LICENSE.md for license details.
+
+"""
+Benchmark the gridded and tabular checks on synthetic data.
+
+Each check runs in a fresh process, so its peak memory is measured on its own and nothing is shared
+through caches between checks. Wall time, CPU time, throughput and peak RSS are recorded and saved as JSON
+under benchmarks/results/, labelled with the git commit so runs can be compared across versions.
+
+Usage:
+    python -m benchmarks.run_benchmarks --scales xs s --data-dir /tmp/aidr-bench
+    python -m benchmarks.run_benchmarks --scales xs --compare benchmarks/results/baseline.json
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import contextlib
+import subprocess
+import multiprocessing
+
+import numpy as np
+
+from benchmarks.generate import SCALES, GRIDDED_KINDS, TABULAR_KINDS, ensure_generated
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+GLOBAL_BOUNDS = {'min_lat': -90, 'max_lat': 90, 'min_lon': -180, 'max_lon': 180}
+# A check is reported as a regression when it is this much slower or larger than the baseline
+REGRESSION_THRESHOLD = 1.2
+
+
+def parse_arguments():
+    """Parse command-line arguments."""
+    parser = argparse.ArgumentParser(description="Benchmark the data readiness checks on synthetic data.")
+    parser.add_argument('--scales', nargs='+', choices=list(SCALES), default=['xs'], help="Data sizes to benchmark")
+    parser.add_argument('--formats', nargs='+', choices=GRIDDED_KINDS + TABULAR_KINDS, default=['netcdf', 'zarr', 'csv'],
+                        help="File formats to benchmark")
+    parser.add_argument('--checks', nargs='+', help="Only run these checks (default: all that apply to a format)")
+    parser.add_argument('--data-dir', type=str, default=os.path.join('benchmarks', 'data'),
+                        help="Directory for the generated data, reused between runs")
+    parser.add_argument('--nan-rate', type=float, default=0.01, help="Fraction of values that are NaN")
+    parser.add_argument('--fill-rate', type=float, default=0.01, help="Fraction of values set to the fill value")
+    parser.add_argument('--outlier-rate', type=float, default=0.001, help="Fraction of values that are outliers")
+    parser.add_argument('--repeat', type=int, default=1, help="Run each check this many times and keep the fastest")
+    parser.add_argument('--label', type=str, help="Label of the results file (default: git commit and time)")
+    parser.add_argument('--output-dir', type=str, default=RESULTS_DIR, help="Directory to save results to")
+    parser.add_argument('--compare', type=str, help="Results file to compare against")
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD,
+                        help="Ratio to the baseline above which a check is flagged as a regression")
+    return parser.parse_args()
+
+
+# Checks. Each takes the path of a generated file; the data is read inside the check so reading is timed.
+
+def _open_gridded(path, chunks=None):
+    from aidatareadiness.checklist_auto.gridded import detect_gridded_format_and_open
+    return detect_gridded_format_and_open(path, chunks=chunks)
+
+
+def check_gridded_open(path):
+    _open_gridded(path).close()
+
+
+def check_gridded_metadata_only(path):
+    from aidatareadiness.checklist_auto.gridded import process_file
+    process_file(path, metadata_only=True)
+
+
+def check_gridded_process_file(path):
+    from aidatareadiness.checklist_auto.gridded import process_file
+    process_file(path)
+
+
+def check_missing_values(path):
+    from aidatareadiness.utils import find_missing_values
+    with _open_gridded(path, chunks='auto') as dataset:
+        find_missing_values(dataset)
+
+
+def check_missing_values_eager(path):
+    from aidatareadiness.utils import find_missing_values
+    with _open_gridded(path) as dataset:
+        find_missing_values(dataset.load())
+
+
+def check_z_score_outliers(path):
+    from aidatareadiness.utils import count_z_score_outliers_for_dataset
+    with _open_gridded(path, chunks='auto') as dataset:
+        count_z_score_outliers_for_dataset(dataset)
+
+
+def check_quality_stats(path):
+    from aidatareadiness.utils import find_quality_stats
+    with _open_gridded(path, chunks='auto') as dataset:
+        find_quality_stats(dataset)
+
+
+def _read_table(path):
+    from aidatareadiness.checklist_auto.tabular import read_file
+    return read_file(path)
+
+
+def check_tabular_read(path):
+    _read_table(path)
+
+
+def check_tabular_null_percent(path):
+    from aidatareadiness.checklist_auto.tabular import null_percent
+    null_percent(_read_table(path))
+
+
+def check_tabular_spatial_coverage(path):
+    from aidatareadiness.checklist_auto.tabular import check_spatial_coverage
+    check_spatial_coverage(_read_table(path), 'LATITUDE', 'LONGITUDE', GLOBAL_BOUNDS)
+
+
+def check_tabular_temporal_coverage(path):
+    from aidatareadiness.checklist_auto.tabular import check_temporal_coverage
+    df = _read_table(path)
+    check_temporal_coverage(df, 'DATE', df['DATE'].min(), df['DATE'].max())
+
+
+def check_tabular_size_info(path):
+    from aidatareadiness.checklist_auto.tabular import csv_size_file_info
+    csv_size_file_info(_read_table(path), path)
+
+
+def check_tabular_stream_profile(path):
+    from aidatareadiness.checklist_auto.tabular import stream_tabular_profile
+    stream_tabular_profile(path, 'LATITUDE', 'LONGITUDE', GLOBAL_BOUNDS, 'DATE')
+
+
+GRIDDED_CHECKS = {
+    'open': check_gridded_open,
+    'metadata_only': check_gridded_metadata_only,
+    'process_file': check_gridded_process_file,
+    'missing_values': check_missing_values,
+    'missing_values_eager': check_missing_values_eager,
+    'z_score_outliers': check_z_score_outliers,
+    'quality_stats': check_quality_stats,
+}
+
+TABULAR_CHECKS = {
+    'read': check_tabular_read,
+    'null_percent': check_tabular_null_percent,
+    'spatial_coverage': check_tabular_spatial_coverage,
+    'temporal_coverage': check_tabular_temporal_coverage,
+    'size_info': check_tabular_size_info,
+    'stream_profile': check_tabular_stream_profile,
+}
+
+
+def checks_for(kind):
+    return GRIDDED_CHECKS if kind in GRIDDED_KINDS else TABULAR_CHECKS
+
+
+def peak_rss_bytes():
+    """Peak resident set size of this process in bytes."""
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def data_size(path):
+    """Size of a file, or of all files under a directory (e.g. a Zarr store), in bytes."""
+    if not os.path.isdir(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+
+
+def _run_child(kind, check, path, queue):
+    # Import the package before the baseline is taken, so import cost is not counted against the check
+    import aidatareadiness.utils  # noqa: F401
+    import aidatareadiness.checklist_auto.gridded  # noqa: F401
+    import aidatareadiness.checklist_auto.tabular  # noqa: F401
+
+    baseline = peak_rss_bytes()
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    try:
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            checks_for(kind)[check](path)
+        error = None
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    queue.put({
+        'wall_s': time.perf_counter() - wall_start,
+        'cpu_s': time.process_time() - cpu_start,
+        'baseline_rss_bytes': baseline,
+        'peak_rss_bytes': peak_rss_bytes(),
+        'error': error,
+    })
+
+
+def run_check(kind, check, path):
+    """Run one check on a file in a fresh process and return its measurements."""
+    context = multiprocessing.get_context('spawn')
+    queue = context.Queue()
+    process = context.Process(target=_run_child, args=(kind, check, path, queue))
+    process.start()
+    process.join()
+    if process.exitcode != 0:
+        return {'error': f"Benchmark process exited with code {process.exitcode}"}
+    return queue.get()
+
+
+def run_benchmarks(scales, formats, data_dir, checks=None, repeat=1, **rates):
+    """Run every selected check on generated data of each scale and format. Returns a list of records."""
+    records = []
+    for scale in scales:
+        for kind in formats:
+            try:
+                path = ensure_generated(kind, data_dir, scale, **rates)
+            except ImportError as e:
+                print(f"Skipping {kind}: {e}")
+                continue
+            size = data_size(path)
+            for check in checks_for(kind):
+                if checks and check not in checks:
+                    continue
+                runs = [run_check(kind, check, path) for _ in range(repeat)]
+                best = min(runs, key=lambda run: run.get('wall_s', np.inf))
+                record = {'check': check, 'format': kind, 'scale': scale, 'data_bytes': size, **best}
+                if best.get('wall_s'):
+                    record['throughput_mb_s'] = size / 1024 ** 2 / best['wall_s']
+                    record['peak_rss_mb'] = best['peak_rss_bytes'] / 1024 ** 2
+                    record['check_rss_mb'] = (best['peak_rss_bytes'] - best['baseline_rss_bytes']) / 1024 ** 2
+                records.append(record)
+                print(format_record(record))
+    return records
+
+
+def format_record(record):
+    if record.get('error'):
+        return f"{record['scale']:>3} {record['format']:<7} {record['check']:<22} ERROR {record['error']}"
+    return (f"{record['scale']:>3} {record['format']:<7} {record['check']:<22} {record['wall_s']:8.2f} s "
+            f"{record['throughput_mb_s']:8.1f} MB/s  peak {record['peak_rss_mb']:8.1f} MB "
+            f"(+{record['check_rss_mb']:.1f} MB)")
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def save_run(records, output_dir, label=None):
+    """Save benchmark records with details of the environment. Returns the path written."""
+    commit = git_commit()
+    label = label or f"{commit or 'unknown'}-{time.strftime('%Y%m%d-%H%M%S')}"
+    run = {
+        'label': label,
+        'commit': commit,
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'results': records,
+    }
+    os.makedirs(output_dir, exist_ok=True)
+    path = os.path.join(output_dir, f"{label}.json")
+    with open(path, 'w') as f:
+        json.dump(run, f, indent=4)
+    return path
+
+
+def compare_runs(records, baseline_path, threshold=REGRESSION_THRESHOLD):
+    """
+    Compare records against a saved run. Returns a list of (check, format, scale, metric, ratio) for every
+    check whose wall time or peak memory grew by more than threshold.
+    """
+    with open(baseline_path) as f:
+        baseline = {(r['check'], r['format'], r['scale']): r for r in json.load(f)['results']}
+
+    regressions = []
+    for record in records:
+        key = (record['check'], record['format'], record['scale'])
+        previous = baseline.get(key)
+        if previous is None or record.get('error') or previous.get('error'):
+            continue
+        for metric in ['wall_s', 'peak_rss_mb']:
+            ratio = record[metric] / previous[metric] if previous[metric] else np.inf
+            print(f"{key[2]:>3} {key[1]:<7} {key[0]:<22} {metric:<12} {previous[metric]:10.2f} -> "
+                  f"{record[metric]:10.2f} ({ratio:.2f}x)")
+            if ratio > threshold:
+                regressions.append((*key, metric, ratio))
+    return regressions
+
+
+def main():
+    args = parse_arguments()
+    rates = {'nan_rate': args.nan_rate, 'fill_rate': args.fill_rate, 'outlier_rate': args.outlier_rate}
+    records = run_benchmarks(args.scales, args.formats, args.data_dir, args.checks, args.repeat, **rates)
+    print(f"Results saved to {save_run(records, args.output_dir, args.label)}")
+
+    if args.compare:
+        regressions = compare_runs(records, args.compare, args.threshold)
+        for check, kind, scale, metric, ratio in regressions:
+            print(f"REGRESSION: {check} ({kind}, {scale}) {metric} is {ratio:.2f}x the baseline")
+        if regressions:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+# (C) British Crown Copyright 2017-2025, Met Office.
+# Please see LICENSE.md for license details.
+
+"""
+Persistent cache of gridded check results, stored in SQLite.
+
+Entries are keyed on the file path and the check set (a string naming the version and options of the
+checks that produced the result), and are valid while the file's size and modification time, and
+optionally a hash of its contents, are unchanged.
+
+The cache can be maintained from the command line:
+
+    python -m aidatareadiness.checklist_auto.cache results.sqlite invalidate [PATH ...]
+    python -m aidatareadiness.checklist_auto.cache results.sqlite evict --max-entries 100000 --max-age 30
+    python -m aidatareadiness.checklist_auto.cache results.sqlite stats
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+import argparse
+import sqlite3
+
+from aidatareadiness.checklist_auto.serialise import to_serialisable
+
+logger = logging.getLogger(__name__)
+
+CACHE_SCHEMA_VERSION = 1
+HASH_BLOCK_SIZE = 1024 ** 2
+
+# Metadata files of a Zarr store and its arrays, rewritten whenever arrays are added, resized or their
+# attributes change
+ZARR_METADATA_FILES = {'.zmetadata', '.zgroup', '.zattrs', '.zarray', 'zarr.json'}
+
+
+def file_identity(file_path):
+    """
+    Return the (size, mtime in ns) of a file. For a directory (a Zarr store) the total size and latest mtime
+    of its metadata files and of all its directories are used. Chunks are written to a temporary file and
+    renamed into place, which updates the mtime of the directory holding them, so rewritten chunks (e.g. by
+    to_zarr with region=...) change the identity without a stat call per chunk file; only directories and
+    metadata files are stat'ed.
+    """
+    stat = os.stat(file_path)
+    if not os.path.isdir(file_path):
+        return stat.st_size, stat.st_mtime_ns
+
+    size, mtime_ns = 0, stat.st_mtime_ns
+    directories = [file_path]
+    while directories:
+        with os.scandir(directories.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    mtime_ns = max(mtime_ns, entry.stat(follow_symlinks=False).st_mtime_ns)
+                    directories.append(entry.path)
+                elif entry.name in ZARR_METADATA_FILES:
+                    metadata_stat = entry.stat()
+                    size += metadata_stat.st_size
+                    mtime_ns = max(mtime_ns, metadata_stat.st_mtime_ns)
+    return size, mtime_ns
+
+
+def content_hash(file_path):
+    """
+    Return a BLAKE2 hash of a file's contents. Directories (e.g. Zarr stores) are not hashed: they are
+    compared by file_identity only.
+    """
+    if os.path.isdir(file_path):
+        return None
+    digest = hashlib.blake2b(digest_size=20)
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """
+    SQLite-backed cache of per-file check results.
+
+    Args:
+        path (str): Path of the SQLite database; created if it does not exist.
+        check_set (str): Identifies the checks and options the cached results were produced with.
+            Results stored under a different check set are never returned.
+        use_hash (bool): Also compare a hash of the file contents. A file whose mtime changed but whose
+            size and contents did not is then still a hit; the hash costs a full read of the file.
+    """
+
+    def __init__(self, path, check_set='default', use_hash=False):
+        self.path = path
+        self.check_set = check_set
+        self.use_hash = use_hash
+        self.hits = 0
+        self.misses = 0
+        self._connection = sqlite3.connect(path, timeout=30)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._create_schema()
+
+    def _create_schema(self):
+        with self._connection:
+            self._connection.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+            row = self._connection.execute("SELECT value FROM meta WHERE key = 'schema_version'").fetchone()
+            if row is not None and int(row[0]) != CACHE_SCHEMA_VERSION:
+                logger.warning(f"Result cache {self.path} has schema version {row[0]}; discarding it")
+                self._connection.execute("DROP TABLE IF EXISTS results")
+            self._connection.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('schema_version', ?)", (str(CACHE_SCHEMA_VERSION),)
+            )
+            self._connection.execute(
+                """CREATE TABLE IF NOT EXISTS results (
+                    path TEXT NOT NULL,
+                    check_set TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    mtime_ns INTEGER NOT NULL,
+                    content_hash TEXT,
+                    result TEXT NOT NULL,
+                    created REAL NOT NULL,
+                    last_access REAL NOT NULL,
+                    PRIMARY KEY (path, check_set)
+                )"""
+            )
+            self._connection.execute("CREATE INDEX IF NOT EXISTS results_last_access ON results (last_access)")
+
+    def lookup(self, file_path):
+        """Return the cached result for an unchanged file, or None if there is no valid entry."""
+        key = os.path.abspath(file_path)
+        try:
+            size, mtime_ns = file_identity(file_path)
+        except OSError:
+            self.misses += 1
+            return None
+
+        row = self._connection.execute(
+            "SELECT size, mtime_ns, content_hash, result FROM results WHERE path = ? AND check_set = ?",
+            (key, self.check_set),
+        ).fetchone()
+        if row is None or row[0] != size:
+            self.misses += 1
+            return None
+
+        cached_size, cached_mtime_ns, cached_hash, result = row
+        if cached_mtime_ns != mtime_ns:
+            if not (self.use_hash and cached_hash and cached_hash == content_hash(file_path)):
+                self.misses += 1
+                return None
+
+        with self._connection:
+            self._connection.execute(
+                "UPDATE results SET last_access = ?, mtime_ns = ? WHERE path = ? AND check_set = ?",
+                (time.time(), mtime_ns, key, self.check_set),
+            )
+        self.hits += 1
+        return json.loads(result)
+
+    def store(self, file_path, result):
+        """Store the result for a file under the current check set."""
+        key = os.path.abspath(file_path)
+        try:
+            size, mtime_ns = file_identity(file_path)
+        except OSError as e:
+            logger.warning(f"Not caching result for {file_path}: {e}")
+            return
+        file_hash = content_hash(file_path) if self.use_hash else None
+        now = time.time()
+        with self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, self.check_set, size, mtime_ns, file_hash, json.dumps(to_serialisable(result)), now, now),
+            )
+
+    def invalidate(self, paths=None, check_set=None):
+        """
+        Remove cache entries. With no paths, everything (or everything in check_set) is removed; a
+        directory path removes every entry beneath it. Returns the number of entries removed.
+        """
+        clauses, params = [], []
+        if check_set is not None:
+            clauses.append("check_set = ?")
+            params.append(check_set)
+
+        removed = 0
+        with self._connection:
+            for path_clause, path_params in self._path_clauses(paths):
+                where = " AND ".join(clauses + path_clause) or "1"
+                removed += self._connection.execute(f"DELETE FROM results WHERE {where}", params + path_params).rowcount
+        return removed
+
+    @staticmethod
+    def _path_clauses(paths):
+        if not paths:
+            return [([], [])]
+        clauses = []
+        for path in paths:
+            key = os.path.abspath(path)
+            prefix = key.rstrip(os.sep) + os.sep
+            clauses.append((["(path = ? OR substr(path, 1, ?) = ?)"], [key, len(prefix), prefix]))
+        return clauses
+
+    def evict(self, max_entries=None, max_age_days=None):
+        """
+        Evict entries not used for more than max_age_days, then the least recently used entries beyond
+        max_entries. Returns the number of entries removed.
+        """
+        removed = 0
+        with self._connection:
+            if max_age_days is not None:
+                cutoff = time.time() - max_age_days * 86400
+                removed += self._connection.execute("DELETE FROM results WHERE last_access < ?", (cutoff,)).rowcount
+            if max_entries is not None:
+                removed += self._connection.execute(
+                    "DELETE FROM results WHERE rowid IN "
+                    "(SELECT rowid FROM results ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                    (max_entries,),
+                ).rowcount
+        return removed
+
+    def stats(self):
+        """Return the number of entries per check set and the hit/miss counts of this session."""
+        rows = self._connection.execute("SELECT check_set, COUNT(*) FROM results GROUP BY check_set").fetchall()
+        return {'entries': dict(rows), 'hits': self.hits, 'misses': self.misses}
+
+    def close(self):
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description="Maintain the gridded check result cache.")
+    parser.add_argument('cache', help="Path to the SQLite result cache")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    invalidate = commands.add_parser('invalidate', help="Remove entries for files or directories (all if none given)")
+    invalidate.add_argument('paths', nargs='*', help="Files or directories to invalidate")
+    invalidate.add_argument('--check-set', help="Only invalidate entries of this check set")
+
+    evict = commands.add_parser('evict', help="Evict old or least recently used entries")
+    evict.add_argument('--max-entries', type=int, help="Keep at most this many entries")
+    evict.add_argument('--max-age', type=float, help="Remove entries not used for this many days")
+
+    commands.add_parser('stats', help="Show the number of cached entries")
+
+    args = parser.parse_args()
+
+    with ResultCache(args.cache) as cache:
+        if args.command == 'invalidate':
+            logger.info(f"Invalidated {cache.invalidate(args.paths, args.check_set)} cache entries")
+        elif args.command == 'evict':
+            logger.info(f"Evicted {cache.evict(args.max_entries, args.max_age)} cache entries")
+        else:
+            logger.info(f"Cache entries: {cache.stats()['entries']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+# (C) British Crown Copyright 2017-2025, Met Office.
+# Please see LICENSE.md for license details.
+
+"""
+Thin command-line client of the check server (see server.py), with the options of gridded.py except
+--workers (the server checks files in its own process), the result cache, which is the server's --cache,
+and the manifest and watch options.
+
+Only the standard library is imported, so a check costs one request to an already warm server instead of
+a new Python process importing xarray and opening its files from cold.
+
+By default it connects to the server's per-user Unix socket. Over TCP (--port) it sends the token from the
+AIDR_SERVER_TOKEN environment variable or --token-file.
+
+Usage:
+    python -m aidatareadiness.checklist_auto.client --files data.nc --metadata-only
+    AIDR_SERVER_TOKEN=... python -m aidatareadiness.checklist_auto.client --port 8642 --dirs /data/era5 --output out.csv
+"""
+
+import os
+import re
+import sys
+import json
+import socket
+import logging
+import tempfile
+import argparse
+import http.client
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_TIMEOUT = 3600
+TOKEN_ENV = 'AIDR_SERVER_TOKEN'
+
+
+def default_socket_path():
+    """The server's default Unix socket (as server.default_socket_path, which this module does not import)."""
+    user = os.getuid() if hasattr(os, 'getuid') else os.getlogin()
+    return os.path.join(os.environ.get('XDG_RUNTIME_DIR') or tempfile.gettempdir(), f"aidr-check-{user}.sock")
+
+
+def parse_arguments():
+    """Parse command-line arguments."""
+    parser = argparse.ArgumentParser(description="Run gridded checks on a running check server.")
+    parser.add_argument('--files', nargs='*', help="List of paths or URLs of weather and climate data files")
+    parser.add_argument('--dirs', nargs='*', help="List of directories containing weather and climate data files")
+    parser.add_argument('--output', type=str, help="Path to save the analysis results (.json, .csv, .jsonl or .parquet), written by the server")
+    parser.add_argument('--metadata-only', action='store_true', help="Only read coordinates and header metadata, not the data variables")
+    parser.add_argument('--quality-stats', action='store_true', help="Also count missing, fill and Z-score outlier values of every data variable")
+    parser.add_argument('--robust-stats', action='store_true', help="Also count median/MAD and IQR outliers and build a histogram of every data variable")
+    parser.add_argument('--volume', action='store_true', help="Also report the stored and decoded bytes and compression ratio of each variable")
+    parser.add_argument('--completeness-dir', type=str, help="Write per-time-step and per-cell missing fractions of each file to this directory")
+    parser.add_argument('--sample', type=float, help="With --quality-stats, estimate the statistics from this fraction of the data")
+    parser.add_argument('--sample-strategy', choices=['stratified', 'random'], default='stratified', help="How hyperslabs are sampled")
+    parser.add_argument('--sample-tiles', action='store_true', help="Sample 128x128 latitude/longitude tiles of each field rather than whole fields")
+    parser.add_argument('--grib-index-dir', type=str, help="Directory for cached GRIB message indexes")
+    parser.add_argument('--profile', action='store_true', help="Record the time, CPU, bytes read, chunks and peak memory of each processing stage")
+    parser.add_argument('--max-memory', type=parse_memory_size, help="Memory budget of the check, e.g. 8GB; sets the block and dask chunk sizes to fit")
+    parser.add_argument('--cache-hash', action='store_true', help="Also compare file content hashes in the server's result cache")
+    parser.add_argument('--remote-cache-dir', type=str, help="Directory caching blocks of remote files between runs")
+    parser.add_argument('--remote-block-size', type=parse_memory_size, help="Size of the blocks remote files are read in, e.g. 4MB")
+    parser.add_argument('--storage-options', type=json.loads, help="JSON fsspec storage options for remote files, e.g. '{\"anon\": true}'")
+    parser.add_argument('--chunks', type=parse_chunks, help="Open datasets lazily with dask chunks: 'auto' or e.g. 'time=100,latitude=-1'")
+    parser.add_argument('--socket', type=str, help="Unix socket of the check server (default: the per-user socket)")
+    parser.add_argument('--port', type=int, help="Connect to the check server on this TCP port instead")
+    parser.add_argument('--host', type=str, default=DEFAULT_HOST, help="Address of the check server with --port")
+    parser.add_argument('--token-file', type=str, help=f"File holding the server's token, for TCP (default: {TOKEN_ENV})")
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT, help="Seconds to wait for the server's answer")
+
+    args = parser.parse_args()
+
+    if not args.files and not args.dirs:
+        parser.error("Either --files or --dirs must be specified.")
+    if args.port is not None and args.socket:
+        parser.error("Use either --socket or --port, not both.")
+
+    return args
+
+
+def parse_memory_size(value):
+    """Parse a memory size as gridded.parse_memory_size does (without importing it), e.g. '512MB' or '4GB', into bytes."""
+    match = re.fullmatch(r'\s*([0-9]*\.?[0-9]+)\s*([KMGT]?)B?\s*', str(value).upper())
+    if not match:
+        raise argparse.ArgumentTypeError(f"Invalid memory size: {value}")
+    number, unit = match.groups()
+    return int(float(number) * 1024 ** ' KMGT'.index(unit or ' '))
+
+
+def parse_chunks(value):
+    """Parse a --chunks value as gridded.parse_chunks does (without importing it): 'auto', a size or dim=size pairs."""
+    value = value.strip()
+    try:
+        if value == 'auto' or '=' not in value:
+            return value if value == 'auto' else int(value)
+        return {dim.strip(): (size.strip() if size.strip() == 'auto' else int(size))
+                for dim, _, size in (item.partition('=') for item in value.split(','))}
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid chunk specification: {value}")
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTP connection over a Unix socket."""
+
+    def __init__(self, socket_path, timeout=DEFAULT_TIMEOUT):
+        super().__init__('localhost', timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+def read_token(token_file=None):
+    """The server's token, from token_file if given, else from the AIDR_SERVER_TOKEN environment variable, or None."""
+    if token_file:
+        with open(token_file) as f:
+            return f.read().strip() or None
+    return os.environ.get(TOKEN_ENV) or None
+
+
+def request(method, path, body=None, socket_path=None, host=DEFAULT_HOST, port=None, token=None,
+            timeout=DEFAULT_TIMEOUT):
+    """
+    Send a JSON request to the check server, on its Unix socket (by default the per-user one) or, if port is
+    given, over TCP with the token. Returns the decoded answer, raising RuntimeError on errors.
+    """
+    if port is not None:
+        connection = http.client.HTTPConnection(host, port, timeout=timeout)
+    else:
+        connection = UnixHTTPConnection(socket_path or default_socket_path(), timeout)
+    headers = {'Content-Type': 'application/json'}
+    if token:
+        headers['Authorization'] = f"Bearer {token}"
+    try:
+        payload = json.dumps(body).encode() if body is not None else None
+        connection.request(method, path, body=payload, headers=headers)
+        response = connection.getresponse()
+        answer = json.loads(response.read() or b'{}')
+    finally:
+        connection.close()
+    if response.status != 200:
+        raise RuntimeError(answer.get('error', f"HTTP {response.status}"))
+    return answer
+
+
+def check(files=None, dirs=None, options=None, output=None, max_memory=None, cache_hash=False, **connection):
+    """
+    Ask the server to check files and directories; relative paths are resolved here, not in the server.
+    max_memory (bytes) and cache_hash are as gridded.py's --max-memory and --cache-hash.
+    """
+    resolve = lambda path: path if '://' in path else os.path.abspath(path)
+    body = {'files': [resolve(path) for path in files or []], 'dirs': [resolve(path) for path in dirs or []],
+            'options': options or {}, 'output': resolve(output) if output else None,
+            'max_memory': max_memory, 'cache_hash': cache_hash}
+    return request('POST', '/check', body, **connection)['results']
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    args = parse_arguments()
+
+    options = {'metadata_only': args.metadata_only, 'quality_stats': args.quality_stats,
+               'robust_stats': args.robust_stats, 'volume': args.volume, 'sample': args.sample,
+               'sample_strategy': args.sample_strategy, 'sample_tiles': args.sample_tiles,
+               'grib_index_dir': args.grib_index_dir, 'profile': args.profile, 'chunks': args.chunks,
+               'completeness_dir': os.path.abspath(args.completeness_dir) if args.completeness_dir else None}
+    remote_options = {'cache_dir': os.path.abspath(args.remote_cache_dir) if args.remote_cache_dir else None,
+                      'block_size': args.remote_block_size, 'storage_options': args.storage_options}
+    # Only what was given, so the server's defaults apply to the rest
+    remote_options = {name: value for name, value in remote_options.items() if value is not None}
+    if remote_options:
+        options['remote_options'] = remote_options
+
+    try:
+        token = read_token(args.token_file) if args.port is not None else None
+        results = check(args.files, args.dirs, options, args.output, max_memory=args.max_memory,
+                        cache_hash=args.cache_hash, socket_path=args.socket, host=args.host, port=args.port,
+                        token=token, timeout=args.timeout)
+    except (OSError, RuntimeError) as e:
+        logger.error(f"Check server request failed: {e}")
+        sys.exit(1)
+
+    failed = [result for result in results if 'error' in result]
+    for result in failed:
+        logger.error(f"Failed to process {result['file']}: {result['error']}")
+    if args.output:
+        logger.info(f"Checked {len(results)} files ({len(failed)} failed); results saved to {args.output}")
+    else:
+        print(json.dumps(results, indent=4))
+
+
+if __name__ == "__main__":
+    main()
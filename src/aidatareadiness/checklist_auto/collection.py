@@ -0,0 +1,172 @@
+# (C) British Crown Copyright 2017-2025, Met Office.
+# Please see LICENSE.md for license details.
+
+"""
+Temporal continuity checks across a collection of files, e.g. monthly HadUK-Grid or daily HUMID files.
+
+Only the time coordinate of each file is read (in parallel), never the data. The timestamps are merged
+into one sorted int64 (nanosecond) index in the files' calendar, and gaps, duplicate timestamps, irregular
+steps and overlapping files are reported as compact ranges for the whole collection (see timeaxis).
+
+Usage:
+    python -m aidatareadiness.checklist_auto.collection --dirs /data/haduk-grid/monthly --workers 8
+"""
+
+import json
+import logging
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from aidatareadiness.checklist_auto.gridded import TIME_KEYS, find_supported_files, open_coordinates
+from aidatareadiness.checklist_auto.planner import plan_workers
+from aidatareadiness.checklist_auto.serialise import to_serialisable
+from aidatareadiness.timeaxis import (
+    STANDARD_CALENDARS, analyse_time_axis, raw_times_to_int64, time_formatter, times_to_int64,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def parse_arguments():
+    """Parse command-line arguments."""
+    parser = argparse.ArgumentParser(description="Check temporal continuity across a collection of gridded files.")
+    parser.add_argument('--files', nargs='*', help="List of paths to weather and climate data files")
+    parser.add_argument('--dirs', nargs='*', help="List of directories containing weather and climate data files")
+    parser.add_argument('--workers', type=int, default=1, help="Number of worker processes used to read time coordinates")
+    parser.add_argument('--output', type=str, help="Path to save the report as JSON")
+
+    args = parser.parse_args()
+
+    if not args.files and not args.dirs:
+        parser.error("Either --files or --dirs must be specified.")
+
+    return args
+
+
+def read_file_times(file_path):
+    """
+    Read only the time coordinate of a file. The raw stored values are converted to int64 nanoseconds
+    in the file's calendar without decoding them to datetime objects, unless their units cannot be
+    converted that way (e.g. 'months since'), in which case the decoded coordinate is used.
+
+    Returns:
+    - tuple: (file_path, int64 ns array or None, calendar or None, error or None)
+    """
+    try:
+        coords, _ = open_coordinates(file_path, coord_keys=TIME_KEYS, decode_times=False)
+        if coords is None:
+            return file_path, None, None, "File could not be opened"
+        if 'time' not in coords.coords:
+            return file_path, None, None, "Time coordinate not found"
+        time = coords['time']
+        calendar = str(time.attrs.get('calendar', 'standard')).lower()
+        calendar = 'standard' if calendar in STANDARD_CALENDARS else calendar
+        try:
+            times = raw_times_to_int64(time.values, time.attrs.get('units'), calendar)
+        except ValueError:
+            coords, _ = open_coordinates(file_path, coord_keys=TIME_KEYS)
+            times = times_to_int64(coords['time'])
+        return file_path, times.ravel(), calendar, None
+    except Exception as e:
+        return file_path, None, None, f"{type(e).__name__}: {e}"
+
+
+def read_collection_times(file_paths, workers=1):
+    """Read the time coordinates of all files, in parallel if workers > 1, preserving the input order."""
+    workers = plan_workers(len(file_paths), workers)
+    if workers == 1:
+        return [read_file_times(file_path) for file_path in file_paths]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(read_file_times, file_paths, chunksize=max(1, len(file_paths) // (workers * 4))))
+
+
+def analyse_collection_times(file_times, calendar=None):
+    """
+    Merge per-file int64 timestamps into one sorted index and report continuity across the collection.
+
+    Parameters:
+    - file_times (list): (file_path, int64 ns array) pairs.
+    - calendar (str): The CF calendar the timestamps are counted in, used to format dates.
+
+    Returns:
+    - dict: The overall span, dominant step, and lists of gap, duplicate, irregular step and file overlap ranges
+      (see timeaxis.analyse_time_axis; monthly axes are stepped in calendar months).
+    """
+    file_times = [(path, times) for path, times in file_times if times is not None and times.size]
+    if not file_times:
+        return {'files': 0, 'time_steps': 0}
+
+    _format_time = time_formatter(calendar)
+    times = np.sort(np.concatenate([times for _, times in file_times]), kind='stable')
+    axis = analyse_time_axis(times, calendar)
+
+    # Overlaps: files whose time span starts before the end of an earlier-starting file
+    spans = sorted((int(t.min()), int(t.max()), path) for path, t in file_times)
+    overlaps = []
+    latest_end, latest_path = spans[0][1], spans[0][2]
+    for start, end, path in spans[1:]:
+        if start <= latest_end:
+            overlaps.append({'file': path, 'overlaps': latest_path,
+                             'start': _format_time(start), 'end': _format_time(min(end, latest_end))})
+        if end > latest_end:
+            latest_end, latest_path = end, path
+
+    return {
+        'files': len(file_times),
+        'calendar': calendar,
+        'time_steps': axis['time_steps'],
+        'start': axis['start'],
+        'end': axis['end'],
+        'dominant_step': axis['dominant_step'],
+        'dominant_step_unit': axis['dominant_step_unit'],
+        'continuous': axis['regular'] and not overlaps,
+        'num_gaps': axis['num_gaps'],
+        'missing_steps': axis['missing_steps'],
+        'gaps': axis['gaps'],
+        'duplicates': axis['duplicates'],
+        'irregular_steps': axis['irregular_steps'],
+        'overlaps': overlaps,
+    }
+
+
+def check_collection_temporal_continuity(file_paths, workers=1):
+    """Read the time coordinates of a collection of files and report its temporal continuity."""
+    file_times = []
+    errors = []
+    calendars = set()
+    for file_path, times, calendar, error in read_collection_times(file_paths, workers):
+        if error is not None:
+            logger.warning(f"Skipping {file_path}: {error}")
+            errors.append({'file': file_path, 'error': error})
+        else:
+            file_times.append((file_path, times))
+            calendars.add(calendar)
+
+    if len(calendars) > 1:
+        logger.warning(f"Files use different calendars: {sorted(calendars)}")
+    report = analyse_collection_times(file_times, calendar=min(calendars) if calendars else None)
+    report['errors'] = errors
+    return report
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    args = parse_arguments()
+
+    file_paths = list(args.files or [])
+    for directory in args.dirs or []:
+        file_paths.extend(find_supported_files(directory))
+
+    report = check_collection_temporal_continuity(file_paths, workers=args.workers)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(to_serialisable(report), f, indent=4)
+    else:
+        logger.info(f"Collection temporal continuity: {json.dumps(to_serialisable(report), indent=4)}")
+
+if __name__ == "__main__":
+    main()
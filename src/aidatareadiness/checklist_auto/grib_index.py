@@ -0,0 +1,86 @@
+# (C) British Crown Copyright 2017-2025, Met Office.
+# Please see LICENSE.md for license details.
+
+"""
+Managed cache directory for cfgrib's GRIB message indexes.
+
+By default cfgrib scans every message of a GRIB file and writes a ``.idx`` file next to it, which is slow
+to repeat and fails on read-only archive mounts. Here the index files live in one configurable directory
+(``--grib-index-dir`` or the AIDR_GRIB_INDEX_DIR environment variable), named after the identity of the
+GRIB file (path, size and mtime), so they are reused across runs and worker processes and a changed file
+never picks up a stale index. cfgrib creates index files exclusively, so concurrent workers are safe.
+"""
+
+import os
+import glob
+import time
+import hashlib
+import logging
+
+logger = logging.getLogger(__name__)
+
+GRIB_INDEX_DIR_ENV = 'AIDR_GRIB_INDEX_DIR'
+
+
+def default_grib_index_dir():
+    """Return the GRIB index directory from the environment, or None to let cfgrib use its default."""
+    return os.environ.get(GRIB_INDEX_DIR_ENV) or None
+
+
+def _identity_key(file_path):
+    stat = os.stat(file_path)
+    identity = f"{os.path.abspath(file_path)}\0{stat.st_size}\0{stat.st_mtime_ns}"
+    return hashlib.blake2b(identity.encode(), digest_size=16).hexdigest()
+
+
+def grib_index_path(file_path, index_dir):
+    """
+    Return the cfgrib indexpath template for a GRIB file in the index directory. cfgrib fills in
+    {short_hash}, a hash of the index keys, so different index key sets do not collide.
+    """
+    os.makedirs(index_dir, exist_ok=True)
+    return os.path.join(index_dir, f"{_identity_key(file_path)}.{{short_hash}}.idx")
+
+
+def touch_grib_index(file_path, index_dir):
+    """Mark the index files of a GRIB file as recently used, for least recently used eviction."""
+    now = time.time()
+    for index_file in glob.glob(os.path.join(index_dir, f"{_identity_key(file_path)}.*.idx")):
+        try:
+            os.utime(index_file, (now, now))
+        except OSError:
+            pass
+
+
+def evict_grib_indexes(index_dir, max_bytes=None, max_age_days=None):
+    """
+    Remove index files not used for more than max_age_days, then the least recently used ones until the
+    directory holds at most max_bytes. Returns the number of files removed.
+    """
+    entries = []
+    for index_file in glob.glob(os.path.join(index_dir, '*.idx')):
+        try:
+            stat = os.stat(index_file)
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, index_file))
+    entries.sort()
+
+    removed = 0
+    total = sum(size for _, size, _ in entries)
+    cutoff = time.time() - max_age_days * 86400 if max_age_days is not None else None
+    for mtime, size, index_file in entries:
+        too_old = cutoff is not None and mtime < cutoff
+        too_big = max_bytes is not None and total > max_bytes
+        if not (too_old or too_big):
+            continue
+        try:
+            os.remove(index_file)
+        except FileNotFoundError:
+            pass
+        total -= size
+        removed += 1
+
+    if removed:
+        logger.info(f"Evicted {removed} GRIB index files from {index_dir}")
+    return removed
@@ -4,32 +4,127 @@
 import os
 import logging
 import argparse
-import xarray as xr
+import re
+import time
+import hashlib
+import functools
+import contextlib
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
 import numpy as np
 import json
-import pandas as pd
-from tqdm import tqdm
+
+# Only modules needing nothing heavier than numpy are imported here, so workers and the CLI start fast;
+# xarray and the optional parts (cache, sinks, watch, remote reading, ...) are imported where they are used.
+from aidatareadiness.checklist_auto.remote import DEFAULT_BLOCK_SIZE, is_remote, remote_path
+from aidatareadiness.checklist_auto.serialise import to_serialisable
+from aidatareadiness.metadata import dataset_profile, shared_profile
+from aidatareadiness.profiling import merge_stages, profiling, stage
+from aidatareadiness.stats import DEFAULT_BLOCK_ELEMENTS
+from aidatareadiness.timeaxis import NS_PER_HOUR, analyse_time_axis, analyse_time_coordinate, raw_times_to_int64
+from aidatareadiness.sampling import SAMPLE_STRATEGIES
 
 logger = logging.getLogger(__name__)
 
 SUPPORTED_FORMATS = ['.nc', '.grib', '.h5', '.hdf5', '.tif', '.tiff', '.zarr']
 
+FORMAT_ENGINE_MAP = {
+    '.nc4': 'netcdf4',  # NetCDF
+    '.nc': 'netcdf4',  # NetCDF
+    '.grib': 'cfgrib',  # GRIB
+    '.h5': 'h5netcdf',  # HDF5
+    '.hdf5': 'h5netcdf',
+    '.tif': 'rasterio',  # GeoTIFF
+    '.tiff': 'rasterio',
+    '.zarr': 'zarr',  # Zarr
+}
+
+# Bump when the checks change, so results cached by older versions are not reused.
+CHECKS_VERSION = 2
+
+LAT_KEYS = ['latitude', 'lat']
+LON_KEYS = ['longitude', 'lon']
+TIME_KEYS = ['time']
+
+MEMORY_UNITS = {'': 1, 'B': 1, 'KB': 1024, 'MB': 1024 ** 2, 'GB': 1024 ** 3, 'TB': 1024 ** 4}
+
 def parse_arguments():
     """Parse command-line arguments."""
     parser = argparse.ArgumentParser(description="Process and analyze gridded climate data.")
     
-    parser.add_argument('--files', nargs='*', help="List of paths to weather and climate data files")
+    parser.add_argument('--files', nargs='*', help="List of paths or URLs (e.g. https://..., s3://...) of weather and climate data files")
     parser.add_argument('--dirs', nargs='*', help="List of directories containing weather and climate data files")
-    parser.add_argument('--output', type=str, help="Path to save the analysis results in CSV or JSON format")
+    parser.add_argument('--output', type=str, help="Path to save the analysis results: .json or .csv, or streamed as each file is done to .jsonl or .parquet")
+    parser.add_argument('--workers', type=int, default=1, help="Number of worker processes used to check files in parallel")
+    parser.add_argument('--max-memory', type=parse_memory_size, help="Total memory budget for the run, e.g. 8GB; sets the number of workers, block and dask chunk sizes to fit")
+    parser.add_argument('--quality-stats', action='store_true', help="Also count missing, fill and Z-score outlier values of every data variable")
+    parser.add_argument('--robust-stats', action='store_true', help="Also count median/MAD and IQR outliers and build a histogram of every data variable")
+    parser.add_argument('--completeness-dir', type=str, help="Write per-time-step and per-cell missing fractions of each file to this directory as small NetCDF summaries")
+    parser.add_argument('--sample', type=float, help="With --quality-stats, estimate the statistics from this fraction of the data (e.g. 0.01), with confidence intervals")
+    parser.add_argument('--sample-strategy', choices=SAMPLE_STRATEGIES, default='stratified', help="How hyperslabs are sampled: spread evenly along time (stratified) or at random")
+    parser.add_argument('--sample-tiles', action='store_true', help="Sample 128x128 latitude/longitude tiles of each field rather than whole fields")
+    parser.add_argument('--volume', action='store_true', help="Also report the stored and decoded bytes and compression ratio of each variable and of the collection, from file metadata only")
+    parser.add_argument('--metadata-only', action='store_true', help="Only read coordinates and header metadata, not the data variables")
+    parser.add_argument('--cache', type=str, help="Path to a SQLite result cache; unchanged files reuse their cached results")
+    parser.add_argument('--cache-hash', action='store_true', help="Also compare file content hashes when checking the cache (not for Zarr stores, which are compared by the mtimes of their directories and metadata)")
+    parser.add_argument('--cache-max-entries', type=int, help="Evict least recently used cache entries beyond this number")
+    parser.add_argument('--cache-max-age', type=float, help="Evict cache entries not used for this many days")
+    parser.add_argument('--append', action='store_true', help="Add to an existing .jsonl or .parquet output instead of replacing it (implied by --manifest)")
+    parser.add_argument('--manifest', type=str, help="Path to a manifest of checked files; only new or changed files in --dirs are processed")
+    parser.add_argument('--watch', action='store_true', help="Keep polling --dirs for new files (requires --manifest)")
+    parser.add_argument('--poll-interval', type=float, default=5.0, help="Seconds between polls in --watch mode")
+    parser.add_argument('--grib-index-dir', type=str, help="Directory for cached GRIB message indexes (default: $AIDR_GRIB_INDEX_DIR)")
+    parser.add_argument('--grib-index-max-size', type=parse_memory_size, help="Evict least recently used GRIB indexes beyond this total size, e.g. 2GB")
+    parser.add_argument('--profile', action='store_true', help="Record the time, CPU, bytes read, chunks and peak memory of each processing stage")
+    parser.add_argument('--remote-cache-dir', type=str, help="Directory caching blocks of remote files between runs (default: $AIDR_REMOTE_CACHE_DIR, or memory only)")
+    parser.add_argument('--remote-block-size', type=parse_memory_size, default=DEFAULT_BLOCK_SIZE, help="Size of the blocks remote files are read in, e.g. 4MB")
+    parser.add_argument('--storage-options', type=json.loads, help="JSON fsspec storage options for remote files, e.g. '{\"anon\": true}'")
+    parser.add_argument('--chunks', type=parse_chunks, help="Open datasets lazily with dask chunks: 'auto' or e.g. 'time=100,latitude=-1'")
     
     args = parser.parse_args()
     
     if not args.files and not args.dirs:
         parser.error("Either --files or --dirs must be specified.")
+    if args.workers < 1:
+        parser.error("--workers must be at least 1.")
+    if args.watch and not (args.manifest and args.dirs):
+        parser.error("--watch requires --manifest and --dirs.")
     
     return args
 
 
+def parse_memory_size(value):
+    """Parse a memory size such as '512MB', '4GB' or a plain number of bytes into bytes."""
+    match = re.fullmatch(r'\s*([0-9]*\.?[0-9]+)\s*([KMGT]?B?)\s*', str(value).upper())
+    if not match:
+        raise argparse.ArgumentTypeError(f"Invalid memory size: {value}")
+    number, unit = match.groups()
+    if unit and not unit.endswith('B'):
+        unit += 'B'
+    return int(float(number) * MEMORY_UNITS[unit])
+
+
+def parse_chunks(value):
+    """Parse a --chunks value: 'auto', a single size for every dimension, or comma separated dim=size pairs."""
+    value = value.strip()
+    if value == 'auto':
+        return 'auto'
+    if '=' not in value:
+        try:
+            return int(value)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"Invalid chunk specification: {value}")
+    chunks = {}
+    for item in value.split(','):
+        dim, _, size = item.partition('=')
+        size = size.strip()
+        try:
+            chunks[dim.strip()] = size if size == 'auto' else int(size)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"Invalid chunk size for {dim}: {size}")
+    return chunks
+
+
 def temporal_check(dataset, temporal_coord_name):
     """Converts the temporal coord name to time to work with temporal functions, if it is not already time."""
     if 'time' not in dataset.coords:
@@ -44,28 +139,105 @@ def temporal_check(dataset, temporal_coord_name):
         print(dataset.dims)
         
 
-def detect_gridded_format_and_open(file_path):
-    """Detect the file format based on the file extension and open it with xarray."""
-    _, file_extension = os.path.splitext(file_path)
-    
-    format_engine_map = {
-        '.nc4': 'netcdf4',  # NetCDF
-        '.nc': 'netcdf4',  # NetCDF
-        '.grib': 'cfgrib',  # GRIB
-        '.h5': 'h5netcdf',  # HDF5
-        '.hdf5': 'h5netcdf',
-        '.tif': 'rasterio',  # GeoTIFF
-        '.tiff': 'rasterio',
-        '.zarr': 'zarr',  # Zarr
-    }
-    
-    if file_extension not in format_engine_map:
+def _dask_available():
+    try:
+        import dask  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+def _engine_for(file_path):
+    """Return the xarray engine for a file based on its extension, or None (logging an error) if unsupported."""
+    path = remote_path(file_path) if is_remote(file_path) else file_path
+    _, file_extension = os.path.splitext(path.rstrip('/' + os.sep))
+    if file_extension not in FORMAT_ENGINE_MAP:
         logger.error(f"Unsupported file format: {file_extension} for {file_path}")
         return None
-    
-    engine = format_engine_map[file_extension]
+    return FORMAT_ENGINE_MAP[file_extension]
+
+def is_zarr_store(path):
+    """Return True if the path is a Zarr store directory."""
+    return os.path.splitext(path.rstrip(os.sep))[1] == '.zarr' and os.path.isdir(path)
+
+def has_consolidated_metadata(store_path):
+    """Return True if a Zarr store has consolidated metadata (.zmetadata for Zarr v2, or in zarr.json for v3)."""
+    if os.path.exists(os.path.join(store_path, '.zmetadata')):
+        return True
+    zarr_json = os.path.join(store_path, 'zarr.json')
+    if os.path.exists(zarr_json):
+        with open(zarr_json, 'r') as f:
+            return json.load(f).get('consolidated_metadata') is not None
+    return False
+
+def _backend_kwargs(engine, file_path, grib_index_dir=None):
+    """
+    Extra backend arguments for an engine: cfgrib keeps its message index in the managed index directory,
+    and Zarr stores are opened from their consolidated metadata (one read) when they have it, instead of
+    probing for it and then listing every array.
+    """
+    if engine == 'cfgrib':
+        from aidatareadiness.checklist_auto.grib_index import default_grib_index_dir, grib_index_path
+        grib_index_dir = grib_index_dir or default_grib_index_dir()
+        if grib_index_dir:
+            return {'indexpath': grib_index_path(file_path, grib_index_dir)}
+    elif engine == 'zarr' and os.path.isdir(file_path):
+        return {'consolidated': has_consolidated_metadata(file_path)}
+    return None
+
+def _mark_grib_index_used(engine, file_path, grib_index_dir=None):
+    if engine != 'cfgrib':
+        return
+    from aidatareadiness.checklist_auto.grib_index import default_grib_index_dir, touch_grib_index
+    grib_index_dir = grib_index_dir or default_grib_index_dir()
+    if grib_index_dir:
+        touch_grib_index(file_path, grib_index_dir)
+
+def _dask_chunk_size(chunk_bytes):
+    """Context in which dask's chunks='auto' aims for chunks of chunk_bytes (a no-op for None)."""
+    if chunk_bytes is None or not _dask_available():
+        return contextlib.nullcontext()
+    import dask
+    return dask.config.set({'array.chunk-size': f"{int(chunk_bytes)}B"})
+
+def _open_with_engine(file_path, engine, grib_index_dir=None, remote_options=None, **open_kwargs):
+    """
+    Open a local file or a URL with xarray. Remote files are read through fsspec (see remote.py), except
+    GRIB files, which are copied to the remote cache and then indexed like local files.
+    """
+    import xarray as xr
+
+    if is_remote(file_path):
+        from aidatareadiness.checklist_auto.remote import default_remote_cache_dir, local_copy, open_remote_dataset
+        remote_options = remote_options or {}
+        if engine != 'cfgrib':
+            return open_remote_dataset(file_path, engine, **remote_options, **open_kwargs)
+        file_path = local_copy(file_path, remote_options.get('cache_dir') or default_remote_cache_dir(),
+                               remote_options.get('storage_options'))
+    ds = xr.open_dataset(file_path, engine=engine, backend_kwargs=_backend_kwargs(engine, file_path, grib_index_dir),
+                         **open_kwargs)
+    _mark_grib_index_used(engine, file_path, grib_index_dir)
+    return ds
+
+def detect_gridded_format_and_open(file_path, chunks=None, grib_index_dir=None, chunk_bytes=None, remote_options=None):
+    """
+    Detect the file format based on the file extension and open it with xarray.
+
+    Passing chunks ('auto', an int, or a dict of dimension sizes; {} uses the file's own chunking) opens the
+    dataset lazily with dask, so later checks read it chunk by chunk instead of loading whole variables.
+    chunk_bytes sets the target size of chunks='auto' (e.g. from a memory plan, see planner.plan_run).
+    GRIB message indexes are kept in grib_index_dir (default: $AIDR_GRIB_INDEX_DIR) rather than next to the file.
+    file_path may be a URL; remote_options (cache_dir, block_size, storage_options) set how it is read.
+    """
+    engine = _engine_for(file_path)
+    if engine is None:
+        return None
+
+    if chunks is not None and not _dask_available():
+        logger.warning("dask is not installed; opening without chunks")
+        chunks = None
     try:
-        ds = xr.open_dataset(file_path, engine=engine)
+        with _dask_chunk_size(chunk_bytes):
+            ds = _open_with_engine(file_path, engine, grib_index_dir, remote_options, chunks=chunks)
         logger.info(f"Successfully opened {file_path} with engine {engine}")
         return ds
     except ValueError as e:
@@ -77,13 +249,63 @@ def detect_gridded_format_and_open(file_path):
     
     return None
 
+def read_header_metadata(dataset):
+    """Collect the dimensions, global attributes and per-variable dims, dtype and units of an opened dataset."""
+    profile = dataset_profile(dataset)
+    return {
+        'dims': dict(profile.sizes),
+        'attrs': dict(profile.attrs),
+        'variables': {
+            record.name: {
+                'dims': list(record.dims),
+                'dtype': str(record.dtype),
+                'units': record.units,
+            }
+            for record in profile.variables.values()
+        },
+    }
+
+def open_coordinates(file_path, coord_keys=None, grib_index_dir=None, remote_options=None, decode_times=True):
+    """
+    Open just the latitude, longitude and time coordinates of a file (or only those named in coord_keys),
+    plus its header metadata.
+
+    The file is opened without CF decoding, which for every engine only parses the header, and then
+    only the coordinate variables are decoded and read. Data variables are never touched. The header's
+    dtypes are therefore the stored (possibly packed) ones. For a URL only the header and coordinate bytes
+    are fetched (except for GRIB, which is copied whole). With decode_times=False the time coordinate keeps
+    its stored values, units and calendar (see timeaxis.raw_times_to_int64).
+
+    Returns:
+    - (xarray.Dataset, dict): The decoded coordinates and the header metadata, or (None, None) on failure.
+    """
+    engine = _engine_for(file_path)
+    if engine is None:
+        return None, None
+
+    try:
+        with _open_with_engine(file_path, engine, grib_index_dir, remote_options, decode_cf=False) as raw:
+            header = read_header_metadata(raw)
+            coord_keys = coord_keys if coord_keys is not None else LAT_KEYS + LON_KEYS + TIME_KEYS
+            names = [name for name in coord_keys if name in raw.variables]
+            with stage('decode_coordinates'):
+                import xarray as xr
+                coords = xr.decode_cf(raw[names], decode_times=decode_times).set_coords(names).load()
+        logger.info(f"Read coordinates of {file_path} with engine {engine}")
+        return coords, header
+    except ValueError as e:
+        logger.error(f"Value error when reading coordinates of {file_path} with engine {engine}: {e}")
+    except IOError as e:
+        logger.error(f"IO error when reading coordinates of {file_path}: {e}")
+    except Exception as e:
+        logger.error(f"Unexpected error when reading coordinates of {file_path}: {e}")
+
+    return None, None
+
 def get_spatial_resolution_and_coverage(dataset):
     """Calculate the spatial resolution and coverage of the dataset."""
-    lat_keys = ['latitude', 'lat']
-    lon_keys = ['longitude', 'lon']
-    
-    lat = next((dataset.coords[k] for k in lat_keys if k in dataset.coords), None)
-    lon = next((dataset.coords[k] for k in lon_keys if k in dataset.coords), None)
+    lat = next((dataset.coords[k] for k in LAT_KEYS if k in dataset.coords), None)
+    lon = next((dataset.coords[k] for k in LON_KEYS if k in dataset.coords), None)
     
     if lat is None or lon is None:
         logger.warning("Latitude and/or Longitude coordinates not found in the dataset.")
@@ -106,22 +328,64 @@ def get_spatial_resolution_and_coverage(dataset):
     
     return resolution, coverage
 
-def get_temporal_resolution_and_coverage(dataset):
-    """Calculate the temporal resolution and coverage of the dataset."""
+def analyse_dataset_time(dataset, file_path=None, grib_index_dir=None, remote_options=None):
+    """
+    Analyse the time axis of a dataset (see timeaxis.analyse_time_axis), or return None without a time
+    coordinate.
+
+    Standard calendars decode to datetime64, which is viewed as int64 directly. Non-standard calendars
+    (360_day, noleap, ...) decode to one cftime object per step, so for those the stored values of the time
+    coordinate are read again from file_path (by default the dataset's source) without decoding and
+    converted with timeaxis.raw_times_to_int64. A time coordinate left as numbers without CF units cannot be
+    analysed; its report then holds only the number of steps and the error.
+    """
+    if 'time' not in dataset.coords:
+        return None
+    time = dataset['time']
+    if time.dtype.kind in 'iuf':
+        try:
+            return analyse_time_coordinate(time)
+        except ValueError as e:
+            logger.warning(f"Time coordinate could not be analysed: {e}")
+            return {'time_steps': int(time.size), 'calendar': None, 'error': str(e)}
+    file_path = file_path or dataset.encoding.get('source')
+    if np.issubdtype(time.dtype, np.datetime64) or file_path is None:
+        return analyse_time_coordinate(time)
+
+    calendar = time.encoding.get('calendar') or time.dt.calendar
+    try:
+        raw, _ = open_coordinates(file_path, coord_keys=TIME_KEYS, grib_index_dir=grib_index_dir,
+                                  remote_options=remote_options, decode_times=False)
+        raw_time = raw['time']
+        times = raw_times_to_int64(raw_time.values, raw_time.attrs.get('units'), calendar)
+    except (TypeError, KeyError, ValueError) as e:
+        # e.g. 'months since' units, which have no fixed length, or a file that could not be read again
+        logger.warning(f"Could not read the stored time values of {file_path} ({e}); converting the decoded ones")
+        return analyse_time_coordinate(time)
+    return analyse_time_axis(times, calendar)
+
+def get_temporal_resolution_and_coverage(dataset, axis=None):
+    """
+    Calculate the temporal resolution (the dominant step, in hours) and coverage of the dataset.
+    Sub-hourly steps are kept as fractions of an hour; monthly steps give the mean month length.
+    The time axis analysis is made unless it is passed as axis (see analyse_dataset_time).
+    """
     if 'time' in dataset.coords:
         time = dataset['time']
     else:
         logger.warning("Time coordinate not found in the dataset.")
         return None, None
     
-    if time.size > 1:
-        time_res = np.diff(time.values).astype('timedelta64[h]').mean().astype(int)
-    else:
-        time_res = None
+    axis = axis if axis is not None else analyse_dataset_time(dataset)
+    time_res = axis['dominant_step_ns'] / NS_PER_HOUR if axis.get('dominant_step_ns') else None
     
-    time_min, time_max = time.min().values, time.max().values
+    if time.ndim == 1 and time.size and axis.get('num_reversals') == 0:
+        # A non-decreasing axis starts and ends at its extremes; min() would compare every cftime object
+        time_min, time_max = time.values[0], time.values[-1]
+    else:
+        time_min, time_max = time.min().values, time.max().values
     
-    logger.info(f"Temporal Resolution: {time_res} hours")
+    logger.info(f"Temporal Resolution: {time_res} hours ({axis.get('dominant_step')})")
     logger.info(f"Temporal Coverage: From {time_min} to {time_max}")
     
     return time_res, {
@@ -130,11 +394,8 @@ def get_temporal_resolution_and_coverage(dataset):
 
 def check_spatial_consistency(dataset):
     """Check if the spatial resolution is consistent across the dataset."""
-    lat_keys = ['latitude', 'lat']
-    lon_keys = ['longitude', 'lon']
-    
-    lat = next((dataset.coords[k] for k in lat_keys if k in dataset.coords), None)
-    lon = next((dataset.coords[k] for k in lon_keys if k in dataset.coords), None)
+    lat = next((dataset.coords[k] for k in LAT_KEYS if k in dataset.coords), None)
+    lon = next((dataset.coords[k] for k in LON_KEYS if k in dataset.coords), None)
     
     if lat is None or lon is None:
         logger.warning("Latitude and/or Longitude coordinates not found in the dataset.")
@@ -150,79 +411,391 @@ def check_spatial_consistency(dataset):
     logger.info("Spatial resolution is consistent.")
     return True
 
-def check_temporal_consistency(dataset):
-    """Check if the temporal resolution is consistent across the dataset."""
-    if 'time' in dataset.coords:
-        time = dataset['time']
-    else:
+def check_temporal_consistency(dataset, axis=None):
+    """
+    Check if the temporal resolution is consistent across the dataset: no gaps, duplicates, reversals or
+    irregular steps (see timeaxis.analyse_time_axis). The analysis is made unless it is passed as axis.
+    """
+    if 'time' not in dataset.coords:
         logger.warning("Time coordinate not found in the dataset.")
         return None
     
-    time_diff = np.diff(time.values).astype('timedelta64[h]').astype(int)
+    axis = axis if axis is not None else analyse_dataset_time(dataset)
+    if 'error' in axis:
+        return None
     
-    if not np.allclose(time_diff, time_diff[0]):
-        logger.warning("Temporal resolution is not consistent.")
+    if not axis.get('regular', True):
+        logger.warning(f"Temporal resolution is not consistent: {axis['num_gaps']} gaps, {axis['num_duplicates']} "
+                       f"duplicates, {axis['num_reversals']} reversals, {axis['num_irregular_steps']} irregular steps.")
         return False
 
     logger.info("Temporal resolution is consistent.")
     return True
 
+def temporal_axis_report(dataset):
+    """The full time axis analysis of the dataset (see analyse_dataset_time), or None without a time coordinate."""
+    return analyse_dataset_time(dataset)
+
+def read_storage_volume(file_path, grib_index_dir=None, remote_options=None):
+    """
+    Report the stored and decoded volume of a file (see volume.dataset_volume). The file is opened without
+    CF decoding, so only its header, encodings and (for HDF5 and Zarr) chunk indexes are read.
+    """
+    engine = _engine_for(file_path)
+    if engine is None:
+        return None
+    from aidatareadiness.volume import dataset_volume
+
+    file_bytes = None
+    if is_remote(file_path):
+        from aidatareadiness.checklist_auto.remote import remote_size
+        file_bytes = remote_size(file_path, (remote_options or {}).get('storage_options'))
+    with _open_with_engine(file_path, engine, grib_index_dir, remote_options, decode_cf=False) as raw:
+        return dataset_volume(raw, None if is_remote(file_path) else file_path, file_bytes)
+
 def save_results(results, output_path):
-    """Save the results in the specified format (JSON or CSV)."""
+    """
+    Save a result or a list of results in the specified format (JSON, CSV, JSON Lines or Parquet).
+    For large runs prefer streaming the results to a sink as they are produced (see sinks.open_sink).
+    """
+    from aidatareadiness.checklist_auto.sinks import flatten_result, is_streaming_output, open_sink
+
+    if isinstance(results, dict):
+        results = [results]
     if output_path.endswith(".json"):
         with open(output_path, "w") as f:
-            json.dump(results, f)
+            json.dump(to_serialisable(results), f)
     elif output_path.endswith(".csv"):
-        df = pd.DataFrame([results])
+        import pandas as pd
+        df = pd.DataFrame([flatten_result(result) for result in results])
         df.to_csv(output_path, index=False)
+    elif is_streaming_output(output_path):
+        sink = open_sink(output_path)
+        for result in results:
+            sink.write(result)
+        sink.close()
     else:
         logger.error(f"Unsupported output format for {output_path}")
 
-def process_file(file_path, output_path=None):
-    """Process a single file."""
-    dataset = detect_gridded_format_and_open(file_path)
+def process_file(file_path, output_path=None, chunks=None, metadata_only=False, grib_index_dir=None, profile=False,
+                 quality_stats=False, block_elements=DEFAULT_BLOCK_ELEMENTS, chunk_bytes=None, sample=None,
+                 sample_strategy='stratified', sample_tiles=False, robust_stats=False, completeness_dir=None,
+                 remote_options=None, volume=False, opened=None):
+    """
+    Process a single file. With metadata_only, only the coordinates and header are read (see open_coordinates)
+    and the header metadata is added to the result. With quality_stats, missing, fill and outlier statistics
+    of each data variable are added under 'variables', reading at most block_elements values at once.
+    With a sample fraction they are estimated from that fraction of the fields (or spatial tiles, with
+    sample_tiles) instead, with confidence intervals; the sample is the same on every run. With robust_stats,
+    median/MAD and IQR outlier counts, a histogram and a mergeable quantile sketch of each variable are added
+    under 'robust_variables'. With completeness_dir, the missing fractions of each variable per time step and
+    per grid cell are written there (computed in the statistics pass if there is one) and the path is
+    added under 'completeness_file'. With volume, the stored and decoded bytes of each variable are added
+    under 'volume', from the file's metadata only (see read_storage_volume). file_path may be a URL, read as
+    set by remote_options (see detect_gridded_format_and_open).
+    A (dataset, header) pair already opened for these options (as open_coordinates returns, with header None
+    for a full open) can be passed as opened, e.g. from the check server's handle cache; it is not closed.
+    With profile, the wall and CPU time, bytes read, chunks read and peak memory of each stage are added
+    to the result under 'profile'.
+    """
+    from aidatareadiness.completeness import (
+        accumulators_for, completeness_summary, compute_dataset_completeness, save_completeness,
+    )
+    from aidatareadiness.utils import estimate_quality_stats, find_quality_stats, find_robust_outliers
 
-    if dataset is not None:
-        resolution, coverage = get_spatial_resolution_and_coverage(dataset)
-        temporal_resolution, temporal_coverage = get_temporal_resolution_and_coverage(dataset)
-        
-        spatial_consistency = check_spatial_consistency(dataset)
-        temporal_consistency = check_temporal_consistency(dataset)
-        
-        result = {
-            'file': file_path,
-            'spatial_resolution': resolution,
-            'spatial_coverage': coverage,
-            'temporal_resolution': temporal_resolution,
-            'temporal_coverage': temporal_coverage,
-            'spatial_consistency': spatial_consistency,
-            'temporal_consistency': temporal_consistency
-        }
-        
-        if output_path:
-            save_results(result, output_path)
-        
-        # Close the dataset to free resources
-        dataset.close()
-        
-        return result
+    with profiling() if profile else contextlib.nullcontext() as profiler:
+        header = None
+        with stage('open'):
+            if opened is not None:
+                dataset, header = opened
+            elif metadata_only:
+                dataset, header = open_coordinates(file_path, grib_index_dir=grib_index_dir,
+                                                   remote_options=remote_options)
+            else:
+                dataset = detect_gridded_format_and_open(file_path, chunks=chunks, grib_index_dir=grib_index_dir,
+                                                         chunk_bytes=chunk_bytes, remote_options=remote_options)
+
+        if dataset is None:
+            return None
+
+        # The dataset is not edited by the checks, so they can share one metadata profile
+        with shared_profile(dataset):
+            with stage('spatial'):
+                resolution, coverage = get_spatial_resolution_and_coverage(dataset)
+            with stage('temporal'):
+                # Analysed once and shared by the temporal checks
+                temporal_axis = analyse_dataset_time(dataset, file_path, grib_index_dir, remote_options)
+                temporal_resolution, temporal_coverage = get_temporal_resolution_and_coverage(dataset, temporal_axis)
+
+            with stage('consistency'):
+                spatial_consistency = check_spatial_consistency(dataset)
+                temporal_consistency = check_temporal_consistency(dataset, temporal_axis)
+
+            # The exact statistics read every value, so the completeness counts are taken in the same pass
+            exact_stats = quality_stats and not metadata_only and not sample
+            completeness = accumulators_for(dataset) if completeness_dir and exact_stats else None
+
+            variable_stats = None
+            if quality_stats and not metadata_only and sample:
+                variable_stats = estimate_quality_stats(dataset, fraction=sample, strategy=sample_strategy, seed=0,
+                                                        tiles=sample_tiles, block_elements=block_elements)
+            elif exact_stats:
+                variable_stats = find_quality_stats(dataset, block_elements=block_elements, completeness=completeness)
+
+            completeness_file = None
+            if completeness_dir and not metadata_only:
+                with stage('completeness'):
+                    # Not find_completeness, which records its own 'completeness' stage
+                    if completeness is None:
+                        completeness = compute_dataset_completeness(dataset, block_elements)
+                    summary = completeness_summary(dataset, completeness)
+                    summary.attrs['source_file'] = file_path
+                    completeness_file = save_completeness(summary, completeness_path(file_path, completeness_dir))
+
+            robust_variable_stats = None
+            if robust_stats and not metadata_only:
+                robust_variable_stats = find_robust_outliers(dataset, block_elements=block_elements)
+
+        # Close the dataset to free resources, unless it belongs to the caller
+        if opened is None:
+            dataset.close()
+
+        volume_report = None
+        if volume:
+            with stage('volume'):
+                volume_report = read_storage_volume(file_path, grib_index_dir, remote_options)
+
+    result = {
+        'file': file_path,
+        'spatial_resolution': resolution,
+        'spatial_coverage': coverage,
+        'temporal_resolution': temporal_resolution,
+        'temporal_coverage': temporal_coverage,
+        'spatial_consistency': spatial_consistency,
+        'temporal_consistency': temporal_consistency,
+        'temporal_axis': temporal_axis,
+    }
+    if header is not None:
+        result['header'] = header
+    if variable_stats is not None:
+        result['variables'] = variable_stats
+    if robust_variable_stats is not None:
+        result['robust_variables'] = robust_variable_stats
+    if completeness_file is not None:
+        result['completeness_file'] = completeness_file
+    if volume_report is not None:
+        result['volume'] = volume_report
+    if profiler is not None:
+        result['profile'] = profiler.to_dict()
+
+    if output_path:
+        save_results(result, output_path)
+
+    return result
+
+def completeness_path(file_path, completeness_dir):
+    """
+    Path of the completeness summary of a file in completeness_dir: named after the file, with a hash of
+    its full path so files of the same name in different directories do not collide.
+    """
+    os.makedirs(completeness_dir, exist_ok=True)
+    file_path = os.path.abspath(file_path.rstrip(os.sep))
+    stem = os.path.splitext(os.path.basename(file_path))[0]
+    digest = hashlib.blake2b(file_path.encode(), digest_size=4).hexdigest()
+    return os.path.join(completeness_dir, f"{stem}.{digest}.completeness.nc")
+
+def input_size(path):
+    """
+    Size of a regular file in bytes, from one stat. Directory datasets (e.g. Zarr stores), URLs and missing
+    files count as 0, so the MB/s of a run covers regular files only and no store is walked for it.
+    """
+    try:
+        return os.path.getsize(path) if os.path.isfile(path) else 0
+    except OSError:
+        return 0
+
+def format_run_summary(files, num_bytes, elapsed, stages=None):
+    """Format the throughput of a run and, if profiled, the totals of each stage as log lines."""
+    elapsed = max(elapsed, 1e-9)
+    lines = [f"Run summary: {files} files, {num_bytes / 1024 ** 2:.1f} MB in {elapsed:.1f} s "
+             f"({files / elapsed:.2f} files/s, {num_bytes / 1024 ** 2 / elapsed:.1f} MB/s)"]
+    for name, totals in (stages or {}).items():
+        bytes_read = f"{totals['bytes_read'] / 1024 ** 2:.1f} MB" if totals['bytes_read'] is not None else "n/a"
+        peak = f"{totals['peak_rss_bytes'] / 1024 ** 2:.0f} MB" if totals['peak_rss_bytes'] is not None else "n/a"
+        lines.append(f"  {name:<20} calls {totals['calls']:>6}  wall {totals['wall_s']:9.2f} s  cpu {totals['cpu_s']:9.2f} s  "
+                     f"read {bytes_read:>12}  chunks {totals['chunks']:>8}  peak RSS {peak:>9}")
+    return "\n".join(lines)
+
+def is_supported_path(path):
+    """Return True if the path has one of the supported gridded file extensions."""
+    return os.path.splitext(path)[1] in SUPPORTED_FORMATS
+
+def find_supported_files(directory):
+    """
+    Walk a directory and return the supported files it contains, in a stable order.
+
+    Zarr stores (*.zarr directories) are returned as single datasets and never descended into, so their
+    chunk files are not listed.
+    """
+    if is_zarr_store(directory):
+        return [directory.rstrip(os.sep)]
 
-def process_directory(directory, output_path=None):
-    """Process all supported files in a directory sequentially."""
     all_files = []
-    for root, _, files in os.walk(directory):
-        all_files.extend([os.path.join(root, f) for f in files if os.path.splitext(f)[1] in SUPPORTED_FORMATS])
-    
-    results = []
-    with tqdm(total=len(all_files), desc="Processing files") as pbar:
-        for file_path in all_files:
-            result = process_file(file_path, output_path)
-            if result:
-                results.append(result)
+    for root, dirs, files in os.walk(directory):
+        stores = [d for d in dirs if is_supported_path(d)]
+        dirs[:] = sorted(d for d in dirs if not is_supported_path(d))
+        names = [f for f in files if is_supported_path(f)] + stores
+        all_files.extend([os.path.join(root, name) for name in sorted(names)])
+    return all_files
+
+def _process_file_isolated(file_path, **kwargs):
+    """Process a single file, turning any exception into an error record so one bad file cannot stop a run."""
+    try:
+        return process_file(file_path, **kwargs)
+    except Exception as e:
+        logger.error(f"Failed to process {file_path}: {e}")
+        return {'file': file_path, 'error': f"{type(e).__name__}: {e}"}
+
+def _process_files_parallel(file_paths, workers, on_result, **options):
+    """
+    Process files in a process pool, keeping a bounded number of tasks in flight. on_result(index, result)
+    is called in the parent process as each file completes.
+    """
+    pending = list(enumerate(file_paths))[::-1]
+    # Limit the queued work so results and task arguments do not pile up in the parent process.
+    max_in_flight = workers * 2
+
+    while pending:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            in_flight = {}
+            try:
+                while pending or in_flight:
+                    while pending and len(in_flight) < max_in_flight:
+                        index, file_path = pending.pop()
+                        in_flight[executor.submit(_process_file_isolated, file_path, **options)] = index
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        index = in_flight.pop(future)
+                        on_result(index, future.result())
+            except BrokenProcessPool as e:
+                # A worker died (e.g. a crash inside a native I/O library). Record the files it may have been
+                # handling and carry on with a fresh pool for the rest.
+                for index in in_flight.values():
+                    logger.error(f"Worker process died while processing {file_paths[index]}")
+                    on_result(index, {'file': file_paths[index], 'error': f"BrokenProcessPool: {e}"})
+
+def process_files(file_paths, output_path=None, workers=1, max_memory=None, cache=None, sink=None,
+                  keep_results=True, **options):
+    """
+    Process a list of files, optionally in parallel. Results are returned in the same order as the input.
+    Extra keyword options (e.g. chunks) are passed on to process_file. With max_memory (bytes), the number
+    of workers and the block and dask chunk sizes of each are planned to fit in it (see planner.plan_run).
+
+    If a ResultCache is given, unchanged files are answered from it and new results are stored in it.
+    If a sink is given (see sinks.open_sink), each result is written to it as soon as it is available;
+    with keep_results=False the results are then not also collected in memory and an empty list is returned.
+    If output_path is given, the collected results are saved to it once all files are done.
+    The progress bar shows files/s and MB/s (of regular files, not directory stores); with the profile option a summary of each stage is logged at the end,
+    and with the volume option the stored and decoded volume of the whole collection.
+    """
+    from aidatareadiness.checklist_auto.planner import plan_run
+
+    indexed = {}
+    stage_totals = {}
+    volume_totals = {}
+    progress = {'files': 0, 'bytes': 0, 'start': time.perf_counter()}
+
+    def handle(index, result, cached=False):
+        if not result:
+            return
+        if result.get('volume'):
+            from aidatareadiness.volume import merge_volume
+            merge_volume(volume_totals, result['volume'])
+        if not cached:
+            if 'profile' in result:
+                merge_stages(stage_totals, result['profile'])
+            if cache is not None and 'error' not in result:
+                # Timings belong to this run only, so they are not cached
+                cache.store(file_paths[index], {key: value for key, value in result.items() if key != 'profile'})
+        if sink is not None:
+            sink.write(result)
+        if keep_results:
+            indexed[index] = result
+
+    todo = []
+    for index, file_path in enumerate(file_paths):
+        cached = cache.lookup(file_path) if cache is not None else None
+        if cached is not None and cached.get('completeness_file') and not os.path.exists(cached['completeness_file']):
+            # The summary the cached result points to has been removed, so the file is checked again
+            cached = None
+        if cached is not None:
+            handle(index, cached, cached=True)
+        else:
+            todo.append(index)
+    if cache is not None:
+        logger.info(f"{len(file_paths) - len(todo)} of {len(file_paths)} files unchanged since they were cached")
+
+    todo_paths = [file_paths[index] for index in todo]
+    plan = plan_run(len(todo_paths), workers, max_memory)
+    workers = plan['workers']
+    if max_memory is not None:
+        options = {'block_elements': plan['block_elements'], 'chunk_bytes': plan['chunk_bytes'], **options}
+
+    from tqdm import tqdm
+
+    with tqdm(total=len(file_paths), initial=len(file_paths) - len(todo), desc="Processing files") as pbar:
+        def on_result(position, result):
+            handle(todo[position], result)
+            progress['files'] += 1
+            progress['bytes'] += input_size(todo_paths[position])
+            elapsed = max(time.perf_counter() - progress['start'], 1e-9)
+            pbar.set_postfix_str(f"{progress['files'] / elapsed:.2f} files/s, {progress['bytes'] / 1024 ** 2 / elapsed:.1f} MB/s")
             pbar.update(1)
 
+        if workers == 1:
+            for position, file_path in enumerate(todo_paths):
+                on_result(position, _process_file_isolated(file_path, **options))
+        else:
+            _process_files_parallel(todo_paths, workers, on_result, **options)
+
+    if todo_paths:
+        logger.info(format_run_summary(progress['files'], progress['bytes'], time.perf_counter() - progress['start'],
+                                       stage_totals if options.get('profile') else None))
+    if options.get('volume'):
+        from aidatareadiness.volume import format_volume_summary
+        logger.info(format_volume_summary(volume_totals))
+
+    results = [indexed[index] for index in sorted(indexed)]
+    if output_path:
+        save_results(results, output_path)
     return results
 
+def process_directory(directory, output_path=None, workers=1, max_memory=None, cache=None, sink=None,
+                      keep_results=True, **options):
+    """Process all supported files in a directory, sequentially or with a pool of worker processes."""
+    all_files = find_supported_files(directory)
+    return process_files(all_files, output_path, workers=workers, max_memory=max_memory, cache=cache, sink=sink,
+                         keep_results=keep_results, **options)
+
+def check_set_key(metadata_only=False, quality_stats=False, sample=None, sample_strategy='stratified',
+                  sample_tiles=False, robust_stats=False, volume=False, completeness_dir=None, **options):
+    """
+    Name the set of checks a run performs, so cached results from different check sets are kept apart.
+    The completeness directory is part of the name, as the cached results point to the summaries written there.
+    """
+    key = f"v{CHECKS_VERSION}:{'metadata' if metadata_only else 'full'}"
+    if quality_stats and not metadata_only:
+        key += '+stats'
+        if sample:
+            key += f":sample={sample},{sample_strategy}{',tiles=128x128' if sample_tiles else ''}"
+    if robust_stats and not metadata_only:
+        key += '+robust'
+    if volume:
+        key += '+volume'
+    if completeness_dir and not metadata_only:
+        key += f"+completeness={os.path.abspath(completeness_dir)}"
+    return key
+
 def main():
     # Set up logging configuration
     logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -230,26 +803,78 @@ def main():
     # Parse the command-line arguments
     args = parse_arguments()
 
-    # Process files
-    results = []
-    if args.files:
-        for file_path in args.files:
-            logger.info(f"Processing file: {file_path}")
-            result = process_file(file_path, args.output)
-            if result:
-                results.append(result)
-    
-    # Process directories
-    if args.dirs:
-        for directory in args.dirs:
-            logger.info(f"Processing directory: {directory}")
-            dir_results = process_directory(directory, args.output)
-            results.extend(dir_results)
+    options = {'chunks': args.chunks, 'metadata_only': args.metadata_only, 'grib_index_dir': args.grib_index_dir,
+               'profile': args.profile, 'quality_stats': args.quality_stats, 'sample': args.sample,
+               'sample_strategy': args.sample_strategy, 'sample_tiles': args.sample_tiles,
+               'robust_stats': args.robust_stats, 'completeness_dir': args.completeness_dir, 'volume': args.volume,
+               'remote_options': {'cache_dir': args.remote_cache_dir, 'block_size': args.remote_block_size,
+                                  'storage_options': args.storage_options}}
+
+    cache = None
+    if args.cache:
+        from aidatareadiness.checklist_auto.cache import ResultCache
+        cache = ResultCache(args.cache, check_set=check_set_key(**options), use_hash=args.cache_hash)
+        options['cache'] = cache
 
+    # Stream results to JSON Lines / Parquet as they are produced instead of collecting them
+    sink = None
     if args.output:
+        from aidatareadiness.checklist_auto.sinks import is_streaming_output, open_sink
+        if is_streaming_output(args.output):
+            # An incremental run only checks new files, so it adds to the results of the previous runs
+            sink = open_sink(args.output, append=args.append or bool(args.manifest))
+            options.update(sink=sink, keep_results=False)
+
+    try:
+        # Process files
+        results = []
+        if args.files:
+            logger.info(f"Processing files: {args.files}")
+            results.extend(process_files(args.files, workers=args.workers, max_memory=args.max_memory, **options))
+        
+        # Process directories
+        if args.manifest:
+            from aidatareadiness.checklist_auto.watch import Manifest, run_incremental, watch
+            manifest = Manifest(args.manifest)
+            # The incremental runner needs each batch's results to update the manifest
+            process = functools.partial(process_files, workers=args.workers, max_memory=args.max_memory,
+                                        **dict(options, keep_results=True))
+            if args.watch:
+                logger.info(f"Watching directories: {args.dirs}")
+                watch(args.dirs, manifest, process, is_supported_path, poll_interval=args.poll_interval,
+                      on_results=lambda batch, aggregate: logger.info(f"Processed {len(batch)} new files. Aggregate: {aggregate}"))
+            else:
+                logger.info(f"Incrementally processing directories: {args.dirs}")
+                new_results = run_incremental(args.dirs, manifest, process, is_supported_path)
+                if sink is None:
+                    results.extend(new_results)
+            logger.info(f"Aggregate over all checked files: {manifest.aggregate}")
+        elif args.dirs:
+            for directory in args.dirs:
+                logger.info(f"Processing directory: {directory}")
+                dir_results = process_directory(directory, workers=args.workers, max_memory=args.max_memory, **options)
+                results.extend(dir_results)
+    finally:
+        if sink is not None:
+            sink.close()
+
+    if sink is not None:
+        logger.info(f"Processing completed. {sink.count} results written to {args.output}")
+    elif args.output:
         save_results(results, args.output)
     else:
         logger.info(f"Processing completed. Results: {results}")
 
+    if args.grib_index_max_size is not None:
+        from aidatareadiness.checklist_auto.grib_index import default_grib_index_dir, evict_grib_indexes
+        grib_index_dir = args.grib_index_dir or default_grib_index_dir()
+        if grib_index_dir:
+            evict_grib_indexes(grib_index_dir, max_bytes=args.grib_index_max_size)
+
+    if cache is not None:
+        evicted = cache.evict(args.cache_max_entries, args.cache_max_age)
+        logger.info(f"Result cache: {cache.hits} hits, {cache.misses} misses, {evicted} entries evicted")
+        cache.close()
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,67 @@
+# (C) British Crown Copyright 2017-2025, Met Office.
+# Please see LICENSE.md for license details.
+
+"""
+Memory-budgeted planning of gridded check runs.
+
+Given a total memory budget (--max-memory), the planner chooses the number of worker processes, the number
+of values each worker reads and processes at once, and the largest dask chunk it may open, so that the run
+stays within the budget. Variables are processed one at a time, so the budget applies to one variable per
+worker. A tight budget gives fewer workers and smaller blocks: the run is slower but is not killed.
+"""
+
+import os
+import logging
+
+from aidatareadiness.stats import (
+    BLOCK_BYTES_PER_ELEMENT, DEFAULT_BLOCK_ELEMENTS, MIN_BLOCK_ELEMENTS, block_elements_for_memory,
+)
+
+logger = logging.getLogger(__name__)
+
+# Rough resident memory of one worker process with xarray and the I/O backends imported.
+WORKER_MEMORY_ESTIMATE = 256 * 1024 ** 2
+
+# Smallest dask chunk worth planning for; smaller chunks cost more in scheduling than they save.
+MIN_CHUNK_BYTES = 1024 ** 2
+
+
+def plan_run(num_files, workers=1, max_memory=None):
+    """
+    Plan a run over num_files files with at most the requested number of workers.
+
+    Returns:
+    - dict: 'workers', 'block_elements' (values per block for the streaming statistics), 'chunk_bytes'
+      (the dask chunk size for chunks='auto', or None to keep dask's default) and 'worker_memory'
+      (the budget of each worker in bytes, or None without a budget).
+    """
+    workers = max(1, min(workers, os.cpu_count() or 1, num_files or 1))
+    plan = {'workers': workers, 'block_elements': DEFAULT_BLOCK_ELEMENTS, 'chunk_bytes': None, 'worker_memory': None}
+    if max_memory is None:
+        return plan
+
+    # Each worker needs its own footprint plus room for a chunk and the smallest block
+    minimum = WORKER_MEMORY_ESTIMATE + MIN_CHUNK_BYTES + MIN_BLOCK_ELEMENTS * BLOCK_BYTES_PER_ELEMENT
+    affordable = max(1, int(max_memory // minimum))
+    if affordable < workers:
+        logger.warning(f"Memory budget of {max_memory / 1024 ** 2:.0f} MB allows {affordable} worker(s), not {workers}")
+        workers = affordable
+    if max_memory < minimum:
+        logger.warning(f"Memory budget of {max_memory / 1024 ** 2:.0f} MB is below the estimated minimum of "
+                       f"{minimum / 1024 ** 2:.0f} MB for one worker; reading in the smallest blocks")
+
+    worker_memory = max_memory // workers
+    data_memory = max(0, worker_memory - WORKER_MEMORY_ESTIMATE)
+    # A dask chunk is read whole before a block is cut out of it, so both must fit at once
+    chunk_bytes = max(MIN_CHUNK_BYTES, data_memory // 4)
+    block_elements = block_elements_for_memory(data_memory - chunk_bytes)
+
+    plan.update(workers=workers, block_elements=block_elements, chunk_bytes=chunk_bytes, worker_memory=worker_memory)
+    logger.info(f"Planned {workers} worker(s) with {worker_memory / 1024 ** 2:.0f} MB each: blocks of "
+                f"{block_elements} values and dask chunks of up to {chunk_bytes / 1024 ** 2:.0f} MB")
+    return plan
+
+
+def plan_workers(num_files, workers=1, max_memory=None):
+    """Cap the requested number of workers by the CPU count, the number of files and the memory budget."""
+    return plan_run(num_files, workers, max_memory)['workers']
@@ -0,0 +1,211 @@
+# (C) British Crown Copyright 2017-2025, Met Office.
+# Please see LICENSE.md for license details.
+
+"""
+Headless population of checklists for many datasets at once.
+
+Each dataset root (a directory, a single file or a Zarr store) is scanned for gridded and tabular files.
+The general information, volume, dimensions, number of files and number of rows are found with the same
+helpers the notebooks use and written into a copy of the blank checklist, with the gridded and tabular
+check results saved alongside it. Datasets are processed in parallel, one per worker.
+
+Usage:
+    python -m aidatareadiness.checklist_auto.populate --datasets /data/era5 /data/gsod --output-dir checklists --workers 8
+"""
+
+import io
+import os
+import copy
+import json
+import logging
+import argparse
+import contextlib
+from concurrent.futures import ProcessPoolExecutor
+
+from aidatareadiness.checklist_auto.gridded import (
+    detect_gridded_format_and_open, find_supported_files, is_supported_path, is_zarr_store, process_file, save_results,
+)
+from aidatareadiness.checklist_auto.planner import plan_workers
+from aidatareadiness.checklist_auto.serialise import to_serialisable
+from aidatareadiness.checklist_auto.tabular import TABULAR_CHUNK_ROWS, stream_tabular_profile
+from aidatareadiness.utils import (
+    CHECKLIST_FILENAME, ChecklistStore, find_dimensions, find_general_info, find_total_data_volume, update_values,
+)
+
+logger = logging.getLogger(__name__)
+
+BLANK_CHECKLIST_FILENAME = "Data_Readiness_Checklist_blank.json"
+
+# Extensions read by tabular.read_file, apart from .json, which would also match the checklists themselves
+TABULAR_FORMATS = ['.csv', '.tsv', '.txt', '.xls', '.xlsx', '.parquet']
+
+
+def parse_arguments():
+    """Parse command-line arguments."""
+    parser = argparse.ArgumentParser(description="Pre-fill data readiness checklists for many datasets.")
+    parser.add_argument('--datasets', nargs='+', required=True,
+                        help="Dataset roots: directories, single files or Zarr stores, one checklist each")
+    parser.add_argument('--output-dir', type=str, required=True,
+                        help="Directory to write one sub-directory per dataset into")
+    parser.add_argument('--template', type=str, default=BLANK_CHECKLIST_FILENAME,
+                        help="Blank checklist to start each checklist from")
+    parser.add_argument('--workers', type=int, default=1, help="Number of datasets to process in parallel")
+    parser.add_argument('--grib-index-dir', type=str, default=None,
+                        help="Directory for cfgrib index files (see the gridded checks)")
+    return parser.parse_args()
+
+
+def format_volume(num_bytes):
+    """Format a number of bytes for the DatasetVolume field, e.g. '350.00 MB'."""
+    for unit in ['B', 'KB', 'MB', 'GB']:
+        if num_bytes < 1024:
+            return f"{num_bytes:.2f} {unit}" if unit != 'B' else f"{int(num_bytes)} B"
+        num_bytes /= 1024
+    return f"{num_bytes:.2f} TB"
+
+
+def find_tabular_files(root):
+    """Return the tabular files under a dataset root, in a stable order."""
+    if os.path.isfile(root):
+        return [root] if os.path.splitext(root)[1].lower() in TABULAR_FORMATS else []
+    found = []
+    for directory, dirs, files in os.walk(root):
+        dirs[:] = sorted(d for d in dirs if not is_supported_path(d))
+        found.extend(os.path.join(directory, name) for name in sorted(files)
+                     if os.path.splitext(name)[1].lower() in TABULAR_FORMATS)
+    return found
+
+
+def find_dataset_files(root):
+    """Return the (gridded, tabular) files of a dataset root."""
+    if is_zarr_store(root) or (os.path.isfile(root) and is_supported_path(root)):
+        return [root.rstrip(os.sep)], []
+    if os.path.isfile(root):
+        return [], find_tabular_files(root)
+    return find_supported_files(root), find_tabular_files(root)
+
+
+def tabular_file_summary(file_path):
+    """
+    Count the rows and the null values per column of a tabular file, in one pass over chunks of
+    TABULAR_CHUNK_ROWS rows (see tabular.stream_tabular_profile), so files larger than memory can be counted.
+
+    Returns:
+    - dict: The file, its number of rows and columns, and the percentage of null values in each column.
+    """
+    profile = stream_tabular_profile(file_path, chunk_rows=TABULAR_CHUNK_ROWS)
+    return {key: profile[key] for key in ('file', 'rows', 'columns', 'null_percent')}
+
+
+def gridded_dataset_updates(file_paths, grib_index_dir=None):
+    """
+    Run the checklist helpers over the gridded files of a dataset. The general information and dimensions
+    are those of the first file; the volume is the decoded size of all files (see find_total_data_volume).
+    Only headers and coordinates are read.
+    """
+    general, num_dimensions, volume_mb = {}, 0, 0.0
+    for file_path in file_paths:
+        dataset = detect_gridded_format_and_open(file_path, chunks={}, grib_index_dir=grib_index_dir)
+        if dataset is None:
+            continue
+        # The helpers print their findings for the notebooks; in a batch that is only noise
+        with contextlib.redirect_stdout(io.StringIO()):
+            if not general:
+                general = find_general_info(dataset)
+                num_dimensions = find_dimensions(dataset)["num_dimensions"]
+            volume_mb += find_total_data_volume(dataset)
+        dataset.close()
+
+    general = {key: value for key, value in general.items() if value not in ('NO TITLE', 'NO VERSION')}
+    return general, num_dimensions, volume_mb * 1024 ** 2
+
+
+def populate_dataset(root, template, output_dir, grib_index_dir=None):
+    """
+    Fill a copy of the template checklist for one dataset root and write it to output_dir with the check
+    results: gridded_checks.json (coverage and consistency of each gridded file, from the headers) and
+    tabular_checks.json (rows and null percentages of each tabular file).
+
+    Returns:
+    - dict: The dataset root, the checklist path and the fields filled in, or an 'error'.
+    """
+    try:
+        if not os.path.exists(root):
+            return {'dataset': root, 'error': "Dataset root does not exist"}
+        gridded_files, tabular_files = find_dataset_files(root)
+        if not gridded_files and not tabular_files:
+            return {'dataset': root, 'error': "No supported gridded or tabular files found"}
+        os.makedirs(output_dir, exist_ok=True)
+
+        general, num_dimensions, volume = {}, 0, 0
+        if gridded_files:
+            general, num_dimensions, volume = gridded_dataset_updates(gridded_files, grib_index_dir)
+            checks = [process_file(file_path, metadata_only=True, grib_index_dir=grib_index_dir)
+                      for file_path in gridded_files]
+            save_results([result for result in checks if result], os.path.join(output_dir, 'gridded_checks.json'))
+
+        num_rows = 0
+        if tabular_files:
+            summaries = [tabular_file_summary(file_path) for file_path in tabular_files]
+            num_rows = sum(summary['rows'] for summary in summaries)
+            # Rows and columns of a table, as csv_size_file_info reports them
+            num_dimensions = num_dimensions or 2
+            volume += sum(os.path.getsize(file_path) for file_path in tabular_files)
+            with open(os.path.join(output_dir, 'tabular_checks.json'), 'w') as f:
+                json.dump(to_serialisable(summaries), f, indent=4)
+
+        general.setdefault('DatasetName', os.path.basename(root.rstrip(os.sep)))
+        updates = {
+            'GeneralInformation': general,
+            'DataQuality': {
+                'DatasetVolume': format_volume(volume),
+                'DatasetDimensions': int(num_dimensions),
+                'DatasetNumFiles': len(gridded_files) + len(tabular_files),
+                'DatasetNumRows': int(num_rows),
+            },
+        }
+        checklist_path = os.path.join(output_dir, CHECKLIST_FILENAME)
+        ChecklistStore(checklist_path).save(update_values(copy.deepcopy(template), updates))
+        return {'dataset': root, 'checklist': checklist_path, **updates}
+    except Exception as e:
+        logger.error(f"Failed to populate a checklist for {root}: {e}")
+        return {'dataset': root, 'error': f"{type(e).__name__}: {e}"}
+
+
+def output_dirs_for(roots, output_dir):
+    """One output directory per dataset root, named after it; repeated names are numbered."""
+    seen, dirs = {}, []
+    for root in roots:
+        name = os.path.basename(root.rstrip(os.sep)) or 'dataset'
+        seen[name] = seen.get(name, 0) + 1
+        dirs.append(os.path.join(output_dir, name if seen[name] == 1 else f"{name}_{seen[name]}"))
+    return dirs
+
+
+def populate_datasets(roots, template_path, output_dir, workers=1, grib_index_dir=None):
+    """Populate a checklist for each dataset root, in parallel if workers > 1, preserving the input order."""
+    with open(template_path, 'r') as f:
+        template = json.load(f)
+
+    dirs = output_dirs_for(roots, output_dir)
+    workers = plan_workers(len(roots), workers)
+    if workers == 1:
+        return [populate_dataset(root, template, out, grib_index_dir) for root, out in zip(roots, dirs)]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(populate_dataset, roots, [template] * len(roots), dirs,
+                                 [grib_index_dir] * len(roots)))
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    args = parse_arguments()
+
+    results = populate_datasets(args.datasets, args.template, args.output_dir, args.workers, args.grib_index_dir)
+    failed = [result for result in results if 'error' in result]
+    for result in failed:
+        logger.error(f"{result['dataset']}: {result['error']}")
+    logger.info(f"Populated {len(results) - len(failed)} of {len(results)} checklists in {args.output_dir}")
+
+
+if __name__ == "__main__":
+    main()
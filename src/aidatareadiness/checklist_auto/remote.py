@@ -0,0 +1,128 @@
+# (C) British Crown Copyright 2017-2025, Met Office.
+# Please see LICENSE.md for license details.
+
+"""
+Reading gridded files from URLs and object stores (HTTP(S), S3-compatible and anything else fsspec
+supports) without downloading them first.
+
+- NetCDF4/HDF5 files are read through an fsspec file object with h5netcdf (scipy for NetCDF3), so only
+  the byte ranges a check touches are fetched. Reads are made in blocks of block_size bytes, which act as
+  read-ahead; with a cache directory the blocks are also kept on local disk (fsspec's blockcache) and
+  reused by later runs.
+- Zarr stores are read by zarr through fsspec, fetching only the metadata and chunks needed.
+- GRIB files are copied once into the cache directory (fsspec's simplecache), since cfgrib needs a
+  local file to index.
+- GeoTIFFs are passed to rasterio, which reads URLs with GDAL's own range requests.
+
+Credentials and endpoints (e.g. {"anon": true} or {"client_kwargs": {"endpoint_url": ...}} for S3) are
+passed as fsspec storage options.
+"""
+
+import os
+import logging
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+REMOTE_CACHE_DIR_ENV = 'AIDR_REMOTE_CACHE_DIR'
+DEFAULT_BLOCK_SIZE = 8 * 1024 ** 2
+
+
+def is_remote(path):
+    """Return True if the path is a URL other than file://."""
+    scheme = urlsplit(str(path)).scheme
+    return '://' in str(path) and scheme not in ('', 'file')
+
+
+def remote_path(url):
+    """The path part of a URL, without query string or fragment, e.g. to find its file extension."""
+    return urlsplit(url).path
+
+
+def default_remote_cache_dir():
+    """Return the remote block cache directory from the environment, or None to cache in memory only."""
+    return os.environ.get(REMOTE_CACHE_DIR_ENV) or None
+
+
+def _filesystem(url, storage_options=None):
+    try:
+        import fsspec
+    except ImportError:
+        raise ImportError("Reading remote files requires fsspec to be installed")
+    return fsspec.core.url_to_fs(url, **(storage_options or {}))
+
+
+def open_remote_file(url, cache_dir=None, block_size=DEFAULT_BLOCK_SIZE, storage_options=None):
+    """
+    Open a remote file for random access reads in blocks of block_size bytes. With a cache_dir the blocks
+    read are stored there and shared between runs and worker processes.
+    """
+    fs, path = _filesystem(url, storage_options)
+    if cache_dir:
+        import fsspec
+        fs = fsspec.filesystem('blockcache', fs=fs, cache_storage=cache_dir)
+        return fs.open(path, 'rb', block_size=block_size)
+    return fs.open(path, 'rb', block_size=block_size, cache_type='readahead')
+
+
+def remote_size(url, storage_options=None):
+    """Size in bytes of a remote file, or the total of a remote Zarr store; None if it cannot be listed."""
+    fs, path = _filesystem(url, storage_options)
+    try:
+        return int(fs.du(path) if path.rstrip('/').endswith('.zarr') else fs.size(path))
+    except (OSError, NotImplementedError, TypeError):
+        return None
+
+
+def local_copy(url, cache_dir=None, storage_options=None):
+    """Return a local path holding a copy of a remote file, downloading it into cache_dir only if needed."""
+    import fsspec
+    protocol = urlsplit(url).scheme
+    simplecache = {'cache_storage': cache_dir} if cache_dir else {}
+    return fsspec.open_local(f"simplecache::{url}", simplecache=simplecache, **{protocol: storage_options or {}})
+
+
+def open_remote_dataset(url, engine, cache_dir=None, block_size=DEFAULT_BLOCK_SIZE, storage_options=None,
+                        **open_kwargs):
+    """
+    Open a remote gridded file with xarray, reading as little of it as the engine allows. Extra keyword
+    arguments (chunks, decode_cf, ...) are passed to xarray.open_dataset. A file object opened here is
+    closed with the dataset, or straight away if the dataset cannot be opened.
+    """
+    import xarray as xr
+
+    cache_dir = cache_dir or default_remote_cache_dir()
+    if engine == 'zarr':
+        return xr.open_dataset(url, engine='zarr', storage_options=storage_options or {}, **open_kwargs)
+    if engine == 'cfgrib':
+        return xr.open_dataset(local_copy(url, cache_dir, storage_options), engine='cfgrib', **open_kwargs)
+    if engine == 'rasterio':
+        return xr.open_dataset(url, engine='rasterio', **open_kwargs)
+
+    remote_file = open_remote_file(url, cache_dir, block_size, storage_options)
+    store = None
+    try:
+        # The backend stores are opened here rather than by xarray.open_dataset, so the dataset can be
+        # made to close both the store and the file object through the public set_close
+        try:
+            store = xr.backends.H5NetCDFStore.open(remote_file)
+        except (OSError, ValueError, ImportError) as e:
+            # Not HDF5-based (or h5netcdf is not installed): a NetCDF3 file, which scipy can read from a file object
+            logger.info(f"Reading {url} as NetCDF3 ({e})")
+            remote_file.seek(0)
+            store = xr.backends.ScipyDataStore(remote_file)
+        dataset = xr.open_dataset(store, **open_kwargs)
+    except BaseException:
+        if store is not None:
+            store.close()
+        remote_file.close()
+        raise
+
+    def close():
+        try:
+            store.close()
+        finally:
+            remote_file.close()
+
+    dataset.set_close(close)
+    return dataset
@@ -0,0 +1,44 @@
+# (C) British Crown Copyright 2017-2025, Met Office.
+# Please see LICENSE.md for license details.
+
+import datetime
+import math
+
+import numpy as np
+
+
+def to_serialisable(value):
+    """
+    Convert a check result into plain JSON types.
+
+    numpy scalars and arrays become Python numbers and lists, datetime64/datetime/cftime values become
+    ISO 8601 strings, timedelta64 values become strings such as "86400000000000 nanoseconds", tuples
+    become lists and NaN and infinities become None, since JSON has no such values.
+    """
+    if isinstance(value, dict):
+        return {str(key): to_serialisable(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple, set)):
+        return [to_serialisable(item) for item in value]
+    if isinstance(value, np.ndarray):
+        if value.ndim == 0:
+            return to_serialisable(value[()])
+        return [to_serialisable(item) for item in value]
+    if isinstance(value, np.datetime64):
+        return None if np.isnat(value) else str(np.datetime_as_string(value))
+    if isinstance(value, np.timedelta64):
+        return None if np.isnat(value) else str(value)
+    if isinstance(value, np.bool_):
+        return bool(value)
+    if isinstance(value, np.integer):
+        return int(value)
+    if isinstance(value, (float, np.floating)):
+        value = float(value)
+        return value if math.isfinite(value) else None
+    if isinstance(value, bytes):
+        return value.decode('utf-8', errors='replace')
+    if value is None or isinstance(value, (str, int, bool)):
+        return value
+    if isinstance(value, (datetime.date, datetime.time)) or hasattr(value, 'isoformat'):
+        # Also covers cftime datetimes from non-standard calendars
+        return value.isoformat()
+    return str(value)
@@ -0,0 +1,372 @@
+# (C) British Crown Copyright 2017-2025, Met Office.
+# Please see LICENSE.md for license details.
+
+"""
+A long-running local service answering gridded check requests.
+
+Each gridded.py invocation pays for importing xarray, pandas and the I/O backends and for opening its
+files from cold. The server pays for that once: it keeps the imports warm and holds a least recently used
+cache of open dataset handles (and, for metadata-only checks, of the decoded coordinates and header), so
+repeated checks of the same files skip opening them. Handles are keyed on the file's size and mtime, so a
+changed file is reopened.
+
+By default it listens on a Unix socket that only its owner can connect to. It can listen on localhost
+TCP instead (--port), but only with a shared token, read from the AIDR_SERVER_TOKEN environment variable
+or --token-file and sent by clients as "Authorization: Bearer <token>", since any local user can connect to
+a TCP port. Either way it speaks JSON:
+
+    POST /check     {"files": [...], "dirs": [...], "options": {...}, "output": "/abs/path.json",
+                     "max_memory": bytes, "cache_hash": false}
+                    -> {"results": [...]}
+    GET  /health    -> {"status": "ok", "uptime_s": ..., "checks": ..., "handles": ...}
+    POST /shutdown
+
+The options are those of gridded.process_file. With max_memory the block and dask chunk sizes are planned
+to fit in that many bytes, as gridded.py --max-memory does for one worker, and cache_hash also compares
+content hashes in the server's result cache (--cache), as gridded.py --cache-hash does. The output path and
+completeness_dir must be absolute and writable. Requests are checked one at a time in the server process;
+for large batches run gridded.py with --workers instead. Use client.py to send requests from the
+command line.
+
+Usage:
+    python -m aidatareadiness.checklist_auto.server --max-handles 256
+    AIDR_SERVER_TOKEN=... python -m aidatareadiness.checklist_auto.server --port 8642
+"""
+
+import os
+import hmac
+import json
+import time
+import socket
+import struct
+import tempfile
+import inspect
+import logging
+import argparse
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from socketserver import ThreadingMixIn, UnixStreamServer
+
+from aidatareadiness.checklist_auto.cache import ResultCache, file_identity
+from aidatareadiness.checklist_auto.gridded import (
+    check_set_key, detect_gridded_format_and_open, find_supported_files, open_coordinates, process_file, save_results,
+)
+from aidatareadiness.checklist_auto.planner import plan_run
+from aidatareadiness.checklist_auto.remote import is_remote
+from aidatareadiness.checklist_auto.serialise import to_serialisable
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_MAX_HANDLES = 128
+TOKEN_ENV = 'AIDR_SERVER_TOKEN'
+
+
+def default_socket_path():
+    """The default Unix socket of the server: per user, in XDG_RUNTIME_DIR if set, otherwise the temp directory."""
+    user = os.getuid() if hasattr(os, 'getuid') else os.getlogin()
+    return os.path.join(os.environ.get('XDG_RUNTIME_DIR') or tempfile.gettempdir(), f"aidr-check-{user}.sock")
+
+# Options a request may set: the keyword arguments of process_file, less those the server manages
+REQUEST_OPTIONS = set(inspect.signature(process_file).parameters) - {'file_path', 'output_path', 'opened'}
+# Options that change how a file is opened, and so are part of a handle's key
+OPEN_OPTIONS = ('metadata_only', 'chunks', 'grib_index_dir', 'chunk_bytes', 'remote_options')
+
+
+def parse_arguments():
+    """Parse command-line arguments."""
+    parser = argparse.ArgumentParser(description="Serve gridded checks from a warm, long-running process.")
+    parser.add_argument('--socket', type=str, help="Unix socket to listen on (default: a per-user socket, see default_socket_path)")
+    parser.add_argument('--port', type=int, help=f"Listen on this localhost TCP port instead; requires a token in {TOKEN_ENV} or --token-file")
+    parser.add_argument('--host', type=str, default=DEFAULT_HOST, help="Address to listen on with --port (localhost by default)")
+    parser.add_argument('--token-file', type=str, help="File holding the token clients must send over TCP")
+    parser.add_argument('--max-handles', type=int, default=DEFAULT_MAX_HANDLES,
+                        help="Most open datasets kept in the least recently used handle cache")
+    parser.add_argument('--cache', type=str, help="Path to a SQLite result cache shared with gridded.py")
+    args = parser.parse_args()
+
+    if args.port is not None and args.socket:
+        parser.error("Use either --socket or --port, not both.")
+    args.token = read_token(args.token_file)
+    if args.port is not None and not args.token:
+        parser.error(f"Listening on TCP requires a token: set {TOKEN_ENV} or pass --token-file.")
+    return args
+
+
+def read_token(token_file=None):
+    """The shared token, from token_file if given, else from the AIDR_SERVER_TOKEN environment variable, or None."""
+    if token_file:
+        with open(token_file) as f:
+            return f.read().strip() or None
+    return os.environ.get(TOKEN_ENV) or None
+
+
+def check_writable_path(path, name, directory=False):
+    """
+    Raise ValueError unless path is absolute and can be written: an existing writable directory (if
+    directory), or a file whose directory exists and is writable.
+    """
+    if not isinstance(path, str) or not os.path.isabs(path):
+        raise ValueError(f"{name} must be an absolute path")
+    target = path if directory and os.path.isdir(path) else os.path.dirname(path)
+    if not os.path.isdir(target) or not os.access(target, os.W_OK):
+        raise ValueError(f"{name} is not writable: {path}")
+    if not directory and os.path.exists(path) and not os.access(path, os.W_OK):
+        raise ValueError(f"{name} is not writable: {path}")
+
+
+class DatasetHandleCache:
+    """
+    Least recently used cache of opened datasets, keyed on the path, the file's size and mtime and the open
+    options. Evicted and stale handles are closed.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_HANDLES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self.hits = self.misses = 0
+
+    def _key(self, file_path, options):
+        path, identity = (file_path, None) if is_remote(file_path) else (os.path.abspath(file_path),
+                                                                        file_identity(file_path))
+        opening = json.dumps({name: options.get(name) for name in OPEN_OPTIONS}, sort_keys=True, default=str)
+        return path, identity, opening
+
+    @staticmethod
+    def _open(file_path, options):
+        if options.get('metadata_only'):
+            return open_coordinates(file_path, grib_index_dir=options.get('grib_index_dir'),
+                                    remote_options=options.get('remote_options'))
+        dataset = detect_gridded_format_and_open(file_path, chunks=options.get('chunks'),
+                                                 grib_index_dir=options.get('grib_index_dir'),
+                                                 chunk_bytes=options.get('chunk_bytes'),
+                                                 remote_options=options.get('remote_options'))
+        return dataset, None
+
+    def get(self, file_path, options):
+        """Return the (dataset, header) of a file for these options, opening it if it is not cached."""
+        key = self._key(file_path, options)
+        if key in self._entries:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+        self.misses += 1
+        # Drop handles of older versions of the same file
+        for stale in [other for other in self._entries if other[0] == key[0] and other[1] != key[1]]:
+            self._close(self._entries.pop(stale))
+        opened = self._open(file_path, options)
+        if opened[0] is not None:
+            self._entries[key] = opened
+            while len(self._entries) > self.max_entries:
+                self._close(self._entries.popitem(last=False)[1])
+        return opened
+
+    @staticmethod
+    def _close(opened):
+        try:
+            opened[0].close()
+        except Exception as e:
+            logger.warning(f"Failed to close a cached dataset: {e}")
+
+    def clear(self):
+        while self._entries:
+            self._close(self._entries.popitem()[1])
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class CheckService:
+    """Runs check requests against the handle cache (and optional result cache), one request at a time."""
+
+    def __init__(self, max_handles=DEFAULT_MAX_HANDLES, cache_path=None):
+        self.handles = DatasetHandleCache(max_handles)
+        self.cache_path = cache_path
+        self.started = time.time()
+        self.checks = 0
+        self._lock = threading.Lock()
+
+    def check(self, request):
+        """Check the files and directories of a request and return the list of results."""
+        options = request.get('options') or {}
+        unknown = set(options) - REQUEST_OPTIONS
+        if unknown:
+            raise ValueError(f"Unknown options: {sorted(unknown)}")
+        if request.get('output'):
+            check_writable_path(request['output'], 'output')
+        if options.get('completeness_dir'):
+            check_writable_path(options['completeness_dir'], 'completeness_dir', directory=True)
+        if (options.get('remote_options') or {}).get('cache_dir'):
+            check_writable_path(options['remote_options']['cache_dir'], 'remote cache_dir', directory=True)
+        file_paths = list(request.get('files') or [])
+        for directory in request.get('dirs') or []:
+            file_paths.extend(find_supported_files(directory))
+
+        if request.get('max_memory') is not None:
+            plan = plan_run(len(file_paths), 1, int(request['max_memory']))
+            options = {'block_elements': plan['block_elements'], 'chunk_bytes': plan['chunk_bytes'], **options}
+
+        with self._lock:
+            cache = None
+            if self.cache_path:
+                cache = ResultCache(self.cache_path, check_set=check_set_key(**options),
+                                    use_hash=bool(request.get('cache_hash')))
+            try:
+                results = [self._check_file(file_path, options, cache) for file_path in file_paths]
+            finally:
+                if cache is not None:
+                    cache.close()
+            self.checks += len(file_paths)
+
+        results = [result for result in results if result]
+        if request.get('output'):
+            save_results(results, request['output'])
+        return results
+
+    def _check_file(self, file_path, options, cache):
+        cached = cache.lookup(file_path) if cache is not None else None
+        if cached is not None:
+            return cached
+        try:
+            opened = self.handles.get(file_path, options)
+            if opened[0] is None:
+                return {'file': file_path, 'error': "File could not be opened"}
+            result = process_file(file_path, opened=opened, **options)
+        except Exception as e:
+            logger.error(f"Failed to process {file_path}: {e}")
+            return {'file': file_path, 'error': f"{type(e).__name__}: {e}"}
+        if cache is not None and result and 'error' not in result:
+            cache.store(file_path, {key: value for key, value in result.items() if key != 'profile'})
+        return result
+
+    def health(self):
+        return {'status': 'ok', 'pid': os.getpid(), 'uptime_s': time.time() - self.started, 'checks': self.checks,
+                'handles': len(self.handles), 'handle_hits': self.handles.hits, 'handle_misses': self.handles.misses}
+
+
+class CheckRequestHandler(BaseHTTPRequestHandler):
+    """
+    JSON over HTTP front end of a CheckService (set as the server's service attribute). Requests must carry
+    the server's token, if it has one, and on a Unix socket must come from the server's own user.
+    """
+
+    def _authorised(self):
+        if isinstance(self.server, UnixHTTPServer) and not self.server.peer_is_owner(self.connection):
+            return False
+        token = self.server.token
+        if token is None:
+            return True
+        sent = self.headers.get('Authorization', '')
+        return sent.startswith('Bearer ') and hmac.compare_digest(sent[len('Bearer '):].encode(), token.encode())
+
+    def parse_request(self):
+        # Reject unauthorised requests before any handler runs
+        if not super().parse_request():
+            return False
+        if not self._authorised():
+            self._reply(403, {'error': "Not authorised"})
+            return False
+        return True
+
+    def _reply(self, status, body):
+        payload = json.dumps(to_serialisable(body)).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        if self.path == '/health':
+            self._reply(200, self.server.service.health())
+        else:
+            self._reply(404, {'error': f"Unknown path {self.path}"})
+
+    def do_POST(self):
+        if self.path == '/shutdown':
+            self._reply(200, {'status': 'shutting down'})
+            threading.Thread(target=self.server.shutdown, daemon=True).start()
+            return
+        if self.path != '/check':
+            self._reply(404, {'error': f"Unknown path {self.path}"})
+            return
+        try:
+            request = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+            self._reply(200, {'results': self.server.service.check(request)})
+        except (ValueError, TypeError) as e:
+            self._reply(400, {'error': f"{type(e).__name__}: {e}"})
+        except Exception as e:
+            logger.exception("Check request failed")
+            self._reply(500, {'error': f"{type(e).__name__}: {e}"})
+
+    def address_string(self):
+        # Unix socket peers have no address
+        return self.client_address[0] if self.client_address else 'unix'
+
+    def log_message(self, format, *args):
+        logger.info(f"{self.address_string()} {format % args}")
+
+
+class UnixHTTPServer(ThreadingMixIn, UnixStreamServer):
+    """HTTP over a Unix socket, readable and writable by the owner only."""
+
+    daemon_threads = True
+
+    @staticmethod
+    def peer_is_owner(connection):
+        """True if the peer of a connection runs as this process's user (where SO_PEERCRED is available)."""
+        if not hasattr(socket, 'SO_PEERCRED'):
+            return True
+        credentials = connection.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize('3i'))
+        _, uid, _ = struct.unpack('3i', credentials)
+        return uid == os.getuid()
+
+    def server_bind(self):
+        if os.path.exists(self.server_address):
+            os.unlink(self.server_address)
+        previous = os.umask(0o177)
+        try:
+            super().server_bind()
+        finally:
+            os.umask(previous)
+
+
+def make_server(service, socket_path=None, host=DEFAULT_HOST, port=None, token=None):
+    """
+    Create the HTTP server for a CheckService: on a Unix socket (by default the per-user one), or on a TCP
+    port, which requires a token.
+    """
+    if port is not None:
+        if not token:
+            raise ValueError("A token is required to listen on TCP")
+        server = ThreadingHTTPServer((host, port), CheckRequestHandler)
+    else:
+        server = UnixHTTPServer(socket_path or default_socket_path(), CheckRequestHandler)
+    server.service = service
+    server.token = token
+    return server
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    args = parse_arguments()
+
+    service = CheckService(args.max_handles, args.cache)
+    server = make_server(service, args.socket, args.host, args.port, args.token)
+    socket_path = server.server_address if isinstance(server, UnixHTTPServer) else None
+    logger.info(f"Serving gridded checks on {socket_path or f'http://{args.host}:{args.port}'}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.handles.clear()
+        if socket_path and os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+# (C) British Crown Copyright 2017-2025, Met Office.
+# Please see LICENSE.md for license details.
+
+"""
+Streaming writers for gridded check results.
+
+Each result is written as soon as its file has been checked, so memory use does not grow with the
+number of files and a run that stops partway through keeps everything written so far. An output left
+by an earlier run is replaced, unless the sink is opened with append=True (e.g. to add the results of
+an incremental run to those of the previous ones).
+
+- JSON Lines (.jsonl/.ndjson): one JSON object per line, flushed after every record.
+- Parquet (.parquet): a directory of part files with a fixed, typed schema, written every
+  row_group_size records. It can be read back with pandas.read_parquet(path) or pyarrow.dataset.
+"""
+
+import os
+import re
+import json
+import glob
+
+from aidatareadiness.checklist_auto.serialise import to_serialisable
+
+JSON_LINES_EXTENSIONS = ('.jsonl', '.ndjson')
+PARQUET_EXTENSIONS = ('.parquet',)
+PART_PATTERN = re.compile(r'part-(\d+)\.parquet')
+
+# Fields of a result that have their own Parquet column; everything else goes into "details" as JSON.
+FLAT_FIELDS = [
+    ('file', 'string'),
+    ('error', 'string'),
+    ('lat_resolution', 'float64'),
+    ('lon_resolution', 'float64'),
+    ('lat_min', 'float64'),
+    ('lat_max', 'float64'),
+    ('lon_min', 'float64'),
+    ('lon_max', 'float64'),
+    ('temporal_resolution', 'float64'),
+    ('time_min', 'string'),
+    ('time_max', 'string'),
+    ('spatial_consistency', 'bool'),
+    ('temporal_consistency', 'bool'),
+    ('details', 'string'),
+]
+
+_FLATTENED_KEYS = {'file', 'error', 'spatial_resolution', 'spatial_coverage', 'temporal_resolution',
+                   'temporal_coverage', 'spatial_consistency', 'temporal_consistency'}
+
+
+def _pair(value):
+    return value if isinstance(value, list) and len(value) == 2 else [None, None]
+
+
+def flatten_result(result):
+    """
+    Flatten a check result into one record with the FLAT_FIELDS columns. Times are ISO 8601 strings, so
+    non-standard calendars are kept as they are. Fields without a column are kept as JSON in "details".
+    """
+    result = to_serialisable(result)
+    lat_resolution, lon_resolution = _pair(result.get('spatial_resolution'))
+    spatial_coverage = result.get('spatial_coverage') or {}
+    lat_min, lat_max = _pair(spatial_coverage.get('latitude'))
+    lon_min, lon_max = _pair(spatial_coverage.get('longitude'))
+    time_min, time_max = _pair((result.get('temporal_coverage') or {}).get('time'))
+    details = {key: value for key, value in result.items() if key not in _FLATTENED_KEYS}
+    return {
+        'file': result.get('file'),
+        'error': result.get('error'),
+        'lat_resolution': lat_resolution,
+        'lon_resolution': lon_resolution,
+        'lat_min': lat_min,
+        'lat_max': lat_max,
+        'lon_min': lon_min,
+        'lon_max': lon_max,
+        'temporal_resolution': result.get('temporal_resolution'),
+        'time_min': time_min,
+        'time_max': time_max,
+        'spatial_consistency': result.get('spatial_consistency'),
+        'temporal_consistency': result.get('temporal_consistency'),
+        'details': json.dumps(details) if details else None,
+    }
+
+
+class JsonLinesSink:
+    """
+    Write results to a JSON Lines file, one line per result, flushed as it is written. An existing file is
+    truncated, or with append added to.
+    """
+
+    def __init__(self, path, append=False):
+        self.path = path
+        self.count = 0
+        self._file = open(path, 'a' if append else 'w')
+
+    def write(self, result):
+        self._file.write(json.dumps(to_serialisable(result)) + '\n')
+        self._file.flush()
+        self.count += 1
+
+    def close(self):
+        self._file.close()
+
+
+def next_part_number(path):
+    """One more than the highest number of the part-NNNNN.parquet files in a directory, or 0 if it has none."""
+    numbers = [int(match.group(1)) for match in
+               (PART_PATTERN.fullmatch(os.path.basename(part)) for part in glob.glob(os.path.join(path, 'part-*.parquet')))
+               if match]
+    return max(numbers) + 1 if numbers else 0
+
+
+class ParquetSink:
+    """
+    Write results to a directory of Parquet part files with a typed schema. A new part file is written
+    every row_group_size results and on close. Part files left in the directory by earlier runs are removed,
+    or with append kept and numbered after.
+    """
+
+    def __init__(self, path, row_group_size=1000, append=False):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Writing Parquet output requires pyarrow to be installed")
+        self._pa, self._pq = pa, pq
+        self.schema = pa.schema([(name, pa.type_for_alias(type_name)) for name, type_name in FLAT_FIELDS])
+        self.path = path
+        self.row_group_size = row_group_size
+        self.count = 0
+        self._buffer = []
+        os.makedirs(path, exist_ok=True)
+        if not append:
+            for part in glob.glob(os.path.join(path, 'part-*.parquet')):
+                if PART_PATTERN.fullmatch(os.path.basename(part)):
+                    os.remove(part)
+        self._part = next_part_number(path)
+
+    def write(self, result):
+        self._buffer.append(flatten_result(result))
+        self.count += 1
+        if len(self._buffer) >= self.row_group_size:
+            self.flush()
+
+    def flush(self):
+        if not self._buffer:
+            return
+        table = self._pa.Table.from_pylist(self._buffer, schema=self.schema)
+        part_path = os.path.join(self.path, f'part-{self._part:05d}.parquet')
+        # Write to a temporary name first so readers never see a half-written part
+        self._pq.write_table(table, part_path + '.tmp')
+        os.replace(part_path + '.tmp', part_path)
+        self._part += 1
+        self._buffer = []
+
+    def close(self):
+        self.flush()
+
+
+def is_streaming_output(path):
+    """Return True if the output path has a streaming (JSON Lines or Parquet) extension."""
+    return path.lower().endswith(JSON_LINES_EXTENSIONS + PARQUET_EXTENSIONS)
+
+
+def open_sink(path, append=False):
+    """Open the streaming sink for an output path based on its extension, replacing or appending to it."""
+    if path.lower().endswith(JSON_LINES_EXTENSIONS):
+        return JsonLinesSink(path, append=append)
+    if path.lower().endswith(PARQUET_EXTENSIONS):
+        return ParquetSink(path, append=append)
+    raise ValueError(f"Unsupported streaming output format for {path}")
@@ -1,10 +1,62 @@
 # (C) British Crown Copyright 2017-2025, Met Office.
 # Please see LICENSE.md for license details.
 
+"""
+Checks of tabular data.
+
+matplotlib and scipy are imported when a plotting or z-score function is first called, not with the
+module, so batch jobs and worker processes that only read and check tables do not pay for them.
+Without a display, plots use the non-interactive Agg backend (set MPLBACKEND to choose another).
+
+stream_tabular_profile runs the null, spatial, temporal and size checks in one pass over a file read in
+chunks, so archives larger than memory can be checked.
+"""
+
 import os
+import sys
+import numpy as np
 import pandas as pd
-from scipy.stats import zscore
-import matplotlib.pyplot as plt
+
+# Set to force the non-interactive plotting backend, e.g. in batch jobs run where a display is available
+HEADLESS_ENV = 'AIDR_HEADLESS'
+
+# Delimiters of the delimited formats, as read_file reads them
+DELIMITED_FORMATS = {'.csv': ',', '.tsv': '\t', '.txt': '\t'}
+
+# Rows read at once when streaming a file
+TABULAR_CHUNK_ROWS = 100_000
+
+# Out-of-bounds rows kept as examples when streaming; all of them are counted
+MAX_OUT_OF_BOUNDS_EXAMPLES = 100
+
+# Pandas period aliases of the frequencies of the streamed temporal check ('H' is 'h' in newer pandas)
+PERIOD_FREQUENCIES = {"H": "h", "D": "D", "W": "W", "M": "M", "Y": "Y"}
+
+
+def is_headless():
+    """True if plots cannot be shown: AIDR_HEADLESS is set, or on Linux there is no X or Wayland display."""
+    if os.environ.get(HEADLESS_ENV):
+        return True
+    return sys.platform.startswith('linux') and not (os.environ.get('DISPLAY') or os.environ.get('WAYLAND_DISPLAY'))
+
+
+def get_pyplot():
+    """
+    Import matplotlib.pyplot on first use, selecting the Agg backend when headless unless a backend was
+    chosen with MPLBACKEND (as Jupyter does) or pyplot is already in use.
+    """
+    import matplotlib
+    if is_headless() and 'MPLBACKEND' not in os.environ and 'matplotlib.pyplot' not in sys.modules:
+        matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    return plt
+
+
+def show_figures(plt):
+    """Show the current figures, except on the non-interactive Agg backend where there is nothing to show them on."""
+    if plt.get_backend().lower() != 'agg':
+        plt.show()
+
 
 def read_file(file_path, **kwargs):
     """
@@ -272,6 +324,170 @@ def null_percent(df):
 
 
 
+def read_chunks(file_path, chunk_rows=TABULAR_CHUNK_ROWS, columns=None, **kwargs):
+    """
+    Read a tabular file as an iterator of DataFrames of at most chunk_rows rows, so that only one chunk is in
+    memory at a time.
+
+    Delimited files (.csv, .tsv, .txt) are read with pandas' chunksize, Parquet files batch by batch within
+    each row group and JSON Lines files (.jsonl, or .json with lines=True) with chunksize. Other formats
+    (Excel, plain JSON) cannot be read in parts and are returned whole, as one chunk.
+
+    Parameters:
+        file_path (str): The path to the file.
+        chunk_rows (int): The most rows per chunk.
+        columns (list): Only read these columns, if given.
+        **kwargs: Additional keyword arguments to pass to the pandas reading function.
+
+    Returns:
+        iterator of pd.DataFrame: The chunks of the file, in order.
+    """
+    if not os.path.exists(file_path):
+        raise FileNotFoundError(f"The file {file_path} does not exist.")
+    extension = os.path.splitext(file_path)[1].lower()
+
+    if extension in DELIMITED_FORMATS:
+        kwargs.setdefault("delimiter", DELIMITED_FORMATS[extension])
+        with pd.read_csv(file_path, chunksize=chunk_rows, usecols=columns, **kwargs) as reader:
+            yield from reader
+    elif extension == ".parquet":
+        import pyarrow.parquet as pq
+        parquet_file = pq.ParquetFile(file_path)
+        for batch in parquet_file.iter_batches(batch_size=chunk_rows, columns=columns):
+            yield batch.to_pandas()
+    elif extension == ".jsonl" or (extension == ".json" and kwargs.get("lines")):
+        kwargs["lines"] = True
+        with pd.read_json(file_path, chunksize=chunk_rows, **kwargs) as reader:
+            for chunk in reader:
+                yield chunk[columns] if columns is not None else chunk
+    else:
+        df = read_file(file_path, **kwargs)
+        yield df[columns] if columns is not None else df
+
+
+def _numeric_column(chunk, column):
+    if not pd.api.types.is_numeric_dtype(chunk[column]):
+        # A chunk with no values in the column is read as object or float dtype
+        if chunk[column].notna().any():
+            raise ValueError(f"The column {column} must contain numeric values.")
+        return chunk[column].astype("float64")
+    return chunk[column]
+
+
+def stream_tabular_profile(file_path, lat_column=None, lon_column=None, expected_bounds=None, date_column=None,
+                           expected_start=None, expected_end=None, frequency="D", chunk_rows=TABULAR_CHUNK_ROWS,
+                           **kwargs):
+    """
+    Profile a tabular file in one pass over its chunks (see read_chunks), with memory bounded by the chunk
+    size rather than the file size. The results match those of null_percent, check_spatial_coverage,
+    check_temporal_coverage and csv_size_file_info on the whole file, except that only the first
+    MAX_OUT_OF_BOUNDS_EXAMPLES out-of-bounds points are kept (all are counted) and dates that cannot be
+    parsed are counted rather than raising an error.
+
+    Parameters:
+        file_path (str): The path to the file.
+        lat_column (str): Name of the column containing latitude values; with lon_column, enables the spatial check.
+        lon_column (str): Name of the column containing longitude values.
+        expected_bounds (dict): Expected bounds, with keys "min_lat", "max_lat", "min_lon" and "max_lon".
+        date_column (str): Name of the column containing the dates; enables the temporal check.
+        expected_start (str): Expected start date (e.g., "2020-01-01"), to find missing dates.
+        expected_end (str): Expected end date (e.g., "2023-12-31").
+        frequency (str): The frequency of the observed periods. Options: 'H', 'D', 'W', 'M', 'Y'.
+        chunk_rows (int): The most rows read at once.
+        **kwargs: Additional keyword arguments to pass to the pandas reading function.
+
+    Returns:
+        dict: The number of rows and columns, the file size and the memory the whole DataFrame would use (in
+        bytes), the null count and percentage of each column, and the "spatial_coverage" and "temporal_coverage" results if requested.
+    """
+    if frequency not in PERIOD_FREQUENCIES:
+        raise ValueError(f"Invalid frequency {frequency}. Supported frequencies: {list(PERIOD_FREQUENCIES)}.")
+    period_frequency = PERIOD_FREQUENCIES[frequency]
+    spatial = lat_column is not None and lon_column is not None
+
+    rows, memory_used, columns = 0, 0, None
+    null_counts = pd.Series(dtype="int64")
+    lat_min = lon_min = np.inf
+    lat_max = lon_max = -np.inf
+    num_out_of_bounds, out_of_bounds_examples = 0, []
+    periods, invalid_dates = set(), 0
+
+    for chunk in read_chunks(file_path, chunk_rows, **kwargs):
+        if columns is None:
+            columns = list(chunk.columns)
+        rows += len(chunk)
+        memory_used += int(chunk.memory_usage(deep=True).sum())
+        null_counts = null_counts.add(chunk.isna().sum(), fill_value=0)
+
+        if spatial:
+            lat, lon = _numeric_column(chunk, lat_column), _numeric_column(chunk, lon_column)
+            lat_min, lat_max = min(lat_min, lat.min()), max(lat_max, lat.max())
+            lon_min, lon_max = min(lon_min, lon.min()), max(lon_max, lon.max())
+            if expected_bounds is not None:
+                within_bounds = (
+                    (lat >= expected_bounds["min_lat"]) & (lat <= expected_bounds["max_lat"]) &
+                    (lon >= expected_bounds["min_lon"]) & (lon <= expected_bounds["max_lon"])
+                )
+                out_of_bounds = chunk[~within_bounds]
+                num_out_of_bounds += len(out_of_bounds)
+                kept = sum(len(example) for example in out_of_bounds_examples)
+                if kept < MAX_OUT_OF_BOUNDS_EXAMPLES and len(out_of_bounds):
+                    out_of_bounds_examples.append(out_of_bounds.head(MAX_OUT_OF_BOUNDS_EXAMPLES - kept))
+
+        if date_column is not None:
+            dates = pd.to_datetime(chunk[date_column], errors="coerce")
+            invalid_dates += int((dates.isna() & chunk[date_column].notna()).sum())
+            periods.update(dates.dropna().dt.to_period(period_frequency).dt.start_time.unique())
+
+    # Series.add sorts the columns; report them in the file's order
+    null_counts = null_counts.reindex(columns or [], fill_value=0)
+    profile = {
+        "file": file_path,
+        "rows": rows,
+        "columns": len(columns or []),
+        "memory_bytes": memory_used,
+        "file_bytes": os.path.getsize(file_path),
+        "null_counts": {column: int(count) for column, count in null_counts.items()},
+        "null_percent": {column: float(count) / rows * 100 if rows else 0.0 for column, count in null_counts.items()},
+    }
+
+    if spatial:
+        bounds = {"min_lat": lat_min, "max_lat": lat_max, "min_lon": lon_min, "max_lon": lon_max}
+        coverage = {"actual_bounds": {key: float(value) if np.isfinite(value) else None for key, value in bounds.items()}}
+        if expected_bounds is not None:
+            coverage.update({
+                "expected_bounds": expected_bounds,
+                "all_within_bounds": num_out_of_bounds == 0,
+                "num_out_of_bounds": num_out_of_bounds,
+                "out_of_bounds_points": pd.concat(out_of_bounds_examples) if out_of_bounds_examples
+                else pd.DataFrame(columns=columns),
+            })
+        profile["spatial_coverage"] = coverage
+
+    if date_column is not None:
+        time_format = "%Y-%m-%d %H:%M:%S" if frequency == "H" else "%Y-%m-%d"
+        actual_dates = pd.DatetimeIndex(sorted(periods))
+        coverage = {
+            "actual_start": actual_dates.min().strftime(time_format) if len(actual_dates) else None,
+            "actual_end": actual_dates.max().strftime(time_format) if len(actual_dates) else None,
+            "num_periods": len(actual_dates),
+            "num_invalid_dates": invalid_dates,
+        }
+        if expected_start is not None and expected_end is not None:
+            # Compared period by period, by their start times as the observed periods are
+            expected_dates = pd.period_range(start=expected_start, end=expected_end, freq=period_frequency).start_time
+            missing_dates = expected_dates.difference(actual_dates)
+            coverage.update({
+                "expected_start": expected_start,
+                "expected_end": expected_end,
+                "missing_dates": missing_dates.tolist(),
+                "num_missing_dates": len(missing_dates),
+            })
+        profile["temporal_coverage"] = coverage
+
+    return profile
+
+
 def mask_values(df, values_to_mask, new_value):
     """
     Masks specified values in a DataFrame and replaces them with a specified value.
@@ -295,6 +511,7 @@ def plot_violin_graphs(dataframe, column_feature_names):
     Arguments - a Pandas DataFrame and a list of DataFrame column names.
     """
     
+    plt = get_pyplot()
     fig, axes = plt.subplots(nrows=1, ncols=len(column_feature_names), figsize=(18, 5))
 
     for i, column in enumerate(column_feature_names):
@@ -312,7 +529,7 @@ def plot_violin_graphs(dataframe, column_feature_names):
 
 
     plt.tight_layout()    
-    plt.show()
+    show_figures(plt)
 
 
 def print_z_scores(df):
@@ -332,6 +549,8 @@ def print_z_scores(df):
     Z-Scores > 2
     Z-Scores > 3
     """
+    from scipy.stats import zscore
+
     z_scores = df.apply(zscore)
     abs_z_scores = abs(z_scores)
     num_z_scores = len(z_scores)
@@ -347,13 +566,64 @@ def print_z_scores(df):
     sizes = [num_z_scores, high_z_scores_2, high_z_scores_3]
     
     # Plot the pie chart
+    plt = get_pyplot()
     plt.figure(figsize=(6, 6))
     plt.pie(sizes, labels=labels, autopct='%1.1f%%', startangle=0)
     plt.title('Pie Chart of Z-Scores and High Z-Scores')
     plt.axis('equal')  # Equal aspect ratio ensures that pie is drawn as a circle.
     
     # Show the pie chart
-    plt.show()
+    show_figures(plt)
 
     # Return the counts
     return num_z_scores, high_z_scores_2, high_z_scores_3
+
+
+def robust_outliers(df, mad_threshold=3.5, iqr_factor=1.5, bins=20):
+    """
+    Count outliers in each numeric column by the median/MAD and IQR rules, which unlike Z-scores are
+    not skewed by heavy-tailed columns such as precipitation.
+
+    A value is a MAD outlier if its modified Z-score, 0.6745 * |x - median| / MAD, is above mad_threshold,
+    and an IQR outlier if it is below Q1 - iqr_factor * IQR or above Q3 + iqr_factor * IQR.
+    Missing values are ignored.
+
+    Parameters:
+    df (pd.DataFrame): The DataFrame to check.
+    mad_threshold (float): Modified Z-score above which a value is an outlier.
+    iqr_factor (float): Multiple of the IQR beyond the quartiles at which a value is an outlier.
+    bins (int): Number of histogram bins over the range of each column.
+
+    Returns:
+    pd.DataFrame: One row per numeric column with the median, MAD, quartiles, outlier counts and
+    percentages, and the histogram counts and bin edges.
+    """
+    rows = {}
+    for column in df.select_dtypes(include="number").columns:
+        values = df[column].dropna().to_numpy(dtype=np.float64)
+        if not values.size:
+            continue
+        median = np.median(values)
+        mad = np.median(np.abs(values - median))
+        q1, q3 = np.quantile(values, [0.25, 0.75])
+        iqr = q3 - q1
+
+        # A MAD of zero (e.g. a mostly constant column) would make every other value an outlier
+        mad_outliers = int(np.count_nonzero(0.6745 * np.abs(values - median) > mad_threshold * mad)) if mad > 0 else 0
+        iqr_outliers = int(np.count_nonzero((values < q1 - iqr_factor * iqr) | (values > q3 + iqr_factor * iqr)))
+        counts, edges = np.histogram(values, bins=bins)
+
+        rows[column] = {
+            'Median': median,
+            'MAD': mad,
+            'Q1': q1,
+            'Q3': q3,
+            'MAD outliers': mad_outliers,
+            'MAD outliers %': mad_outliers / values.size * 100,
+            'IQR outliers': iqr_outliers,
+            'IQR outliers %': iqr_outliers / values.size * 100,
+            'Histogram counts': counts.tolist(),
+            'Histogram edges': edges.tolist(),
+        }
+
+    return pd.DataFrame.from_dict(rows, orient='index')
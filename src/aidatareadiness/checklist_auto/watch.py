@@ -0,0 +1,296 @@
+# (C) British Crown Copyright 2017-2025, Met Office.
+# Please see LICENSE.md for license details.
+
+"""
+Incremental processing of growing data directories.
+
+A JSON manifest records the size and modification time of every file already checked, a compact summary
+of its result, the modification time of every directory, and a running aggregate over all files. Each
+incremental run only processes new or changed files and merges their results into the aggregate.
+
+The watch loop avoids re-walking the whole tree: creating, renaming or deleting a file updates the
+modification time of its parent directory, so each poll only stats the known directories and lists the
+ones that changed. Appending to a file does not change its directory, so the files that changed at the
+previous poll (e.g. still being written) are also stat'ed on every poll, until a poll finds them unchanged.
+Other files rewritten in place are picked up by the periodic full scan.
+"""
+
+import os
+import json
+import time
+import logging
+
+from aidatareadiness.checklist_auto.cache import file_identity
+from aidatareadiness.checklist_auto.serialise import to_serialisable
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_VERSION = 1
+
+
+def new_aggregate():
+    """Return an empty running aggregate."""
+    return {
+        'files': 0,
+        'errors': 0,
+        'spatially_consistent': 0,
+        'temporally_consistent': 0,
+        'latitude': None,
+        'longitude': None,
+        'time': None,
+    }
+
+
+def summarise_result(result):
+    """Reduce a check result to the fields the aggregate is built from."""
+    if not result:
+        return {'error': 'File could not be opened'}
+    if 'error' in result:
+        return {'error': result['error']}
+    result = to_serialisable(result)
+    spatial_coverage = result.get('spatial_coverage') or {}
+    temporal_coverage = result.get('temporal_coverage') or {}
+    return {
+        'latitude': spatial_coverage.get('latitude'),
+        'longitude': spatial_coverage.get('longitude'),
+        'time': temporal_coverage.get('time'),
+        'spatial_consistency': result.get('spatial_consistency'),
+        'temporal_consistency': result.get('temporal_consistency'),
+    }
+
+
+def _widen(bounds, new_bounds):
+    if not new_bounds or None in new_bounds:
+        return bounds
+    if bounds is None:
+        return list(new_bounds)
+    return [min(bounds[0], new_bounds[0]), max(bounds[1], new_bounds[1])]
+
+
+def merge_summary(aggregate, summary):
+    """Merge one file's summary into the running aggregate."""
+    aggregate['files'] += 1
+    if 'error' in summary:
+        aggregate['errors'] += 1
+        return aggregate
+    aggregate['spatially_consistent'] += bool(summary['spatial_consistency'])
+    aggregate['temporally_consistent'] += bool(summary['temporal_consistency'])
+    for key in ('latitude', 'longitude', 'time'):
+        aggregate[key] = _widen(aggregate[key], summary[key])
+    return aggregate
+
+
+class Manifest:
+    """The set of already-checked files and directories, with the running aggregate, stored as JSON."""
+
+    def __init__(self, path):
+        self.path = path
+        self.files = {}
+        self.dirs = {}
+        # Files that changed at the last poll, and may still be being written
+        self.active = set()
+        self.aggregate = new_aggregate()
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                data = json.load(f)
+            if data.get('version') == MANIFEST_VERSION:
+                self.files = data['files']
+                self.dirs = data['dirs']
+                self.aggregate = data['aggregate']
+                self.active = set(data.get('active', []))
+            else:
+                logger.warning(f"Ignoring manifest {path} with unknown version {data.get('version')}")
+
+    def save(self):
+        """Write the manifest atomically, so an interrupted run never leaves a truncated file."""
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump({'version': MANIFEST_VERSION, 'files': self.files, 'dirs': self.dirs,
+                       'active': sorted(self.active), 'aggregate': self.aggregate}, f)
+        os.replace(temp_path, self.path)
+
+    def is_current(self, path, size, mtime_ns):
+        entry = self.files.get(path)
+        return entry is not None and entry['size'] == size and entry['mtime_ns'] == mtime_ns
+
+    def update(self, records=(), removed=()):
+        """
+        Record checked files, given as (path, size, mtime_ns, summary), and drop removed ones, updating the
+        aggregate once. The old contribution of a changed or removed file cannot be subtracted, so if there
+        is one the aggregate is rebuilt; otherwise the new summaries are merged into it.
+        """
+        rebuild = False
+        for path in removed:
+            rebuild |= self.files.pop(path, None) is not None
+        for path, size, mtime_ns, summary in records:
+            rebuild |= path in self.files
+            self.files[path] = {'size': size, 'mtime_ns': mtime_ns, 'summary': summary}
+        if rebuild:
+            self.rebuild_aggregate()
+        else:
+            for _, _, _, summary in records:
+                merge_summary(self.aggregate, summary)
+
+    def record(self, path, size, mtime_ns, summary):
+        """Record one checked file (see update)."""
+        self.update([(path, size, mtime_ns, summary)])
+
+    def forget(self, paths):
+        """Drop removed files and rebuild the aggregate without them."""
+        self.update(removed=paths)
+
+    def rebuild_aggregate(self):
+        self.aggregate = new_aggregate()
+        for entry in self.files.values():
+            merge_summary(self.aggregate, entry['summary'])
+
+
+def _list_directory(directory, is_supported):
+    """
+    Return ({supported file path: (size, mtime_ns)}, [subdirectories]) for one directory level. Supported
+    directories (Zarr stores) count as files and are not descended into.
+    """
+    files, subdirs = {}, []
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if is_supported(entry.path):
+                    if entry.is_dir():
+                        files[entry.path] = file_identity(entry.path)
+                    else:
+                        stat = entry.stat()
+                        files[entry.path] = (stat.st_size, stat.st_mtime_ns)
+                elif entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.path)
+    except FileNotFoundError:
+        pass
+    return files, subdirs
+
+
+def _scan_tree(directory, manifest, is_supported, found):
+    """Walk a directory tree, recording directory mtimes in the manifest and supported files in found."""
+    stack = [directory]
+    while stack:
+        current = stack.pop()
+        try:
+            manifest.dirs[current] = os.stat(current).st_mtime_ns
+        except FileNotFoundError:
+            continue
+        files, subdirs = _list_directory(current, is_supported)
+        found.update(files)
+        stack.extend(subdirs)
+
+
+def find_changes(directories, manifest, is_supported, full=True):
+    """
+    Find new or changed files and removed files under the given directories.
+
+    With full=False only directories whose mtime changed since the last scan are listed again.
+
+    Returns:
+    - (dict, list): {path: (size, mtime_ns)} of files to process, and the paths of removed files.
+    """
+    directories = [os.path.abspath(d) for d in directories]
+    found = {}
+    rescanned = []
+
+    def under_roots(path):
+        return any(path == root or path.startswith(root + os.sep) for root in directories)
+
+    if full:
+        for d in [d for d in manifest.dirs if under_roots(d)]:
+            del manifest.dirs[d]
+        for directory in directories:
+            _scan_tree(directory, manifest, is_supported, found)
+        removed = [path for path in manifest.files if under_roots(path) and path not in found]
+    else:
+        for directory in directories:
+            if directory not in manifest.dirs:
+                _scan_tree(directory, manifest, is_supported, found)
+        for current, mtime_ns in list(manifest.dirs.items()):
+            try:
+                new_mtime_ns = os.stat(current).st_mtime_ns
+            except FileNotFoundError:
+                del manifest.dirs[current]
+                rescanned.append(current)
+                continue
+            if new_mtime_ns == mtime_ns:
+                continue
+            manifest.dirs[current] = new_mtime_ns
+            rescanned.append(current)
+            files, subdirs = _list_directory(current, is_supported)
+            found.update(files)
+            for subdir in subdirs:
+                if subdir not in manifest.dirs:
+                    _scan_tree(subdir, manifest, is_supported, found)
+
+        # Files that were known in a listed directory but are no longer there have been removed
+        rescanned = set(rescanned)
+        removed = [path for path in manifest.files if os.path.dirname(path) in rescanned and path not in found]
+
+        # Files growing in place do not change their directory, so those that changed last time are stat'ed again
+        for path in manifest.active - set(found) - set(removed):
+            try:
+                found[path] = file_identity(path)
+            except FileNotFoundError:
+                if path in manifest.files:
+                    removed.append(path)
+
+    changed = {path: identity for path, identity in found.items() if not manifest.is_current(path, *identity)}
+    return changed, removed
+
+
+def run_incremental(directories, manifest, process, is_supported, full=True):
+    """
+    Process new and changed files under the given directories and merge them into the manifest's aggregate.
+
+    Parameters:
+    - process (callable): Takes a list of file paths and returns their results (e.g. gridded.process_files).
+    - is_supported (callable): Returns True for paths that should be checked.
+
+    Returns:
+    - list: The results of the files processed in this run.
+    """
+    changed, removed = find_changes(directories, manifest, is_supported, full=full)
+    if removed:
+        logger.info(f"{len(removed)} files removed since the last run")
+
+    results, records = [], []
+    if changed:
+        logger.info(f"{len(changed)} new or changed files to process")
+        paths = sorted(changed)
+        results = process(paths)
+        by_path = {result['file']: result for result in results}
+        records = [(path, *changed[path], summarise_result(by_path.get(path))) for path in paths]
+    # One aggregate update per poll, however many files changed
+    manifest.update(records, removed)
+    manifest.active = set(changed)
+
+    manifest.save()
+    return results
+
+
+def watch(directories, manifest, process, is_supported, poll_interval=5.0, full_scan_every=720, on_results=None,
+          max_cycles=None):
+    """
+    Poll the directories for new files until interrupted, processing arrivals as they are found.
+
+    Parameters:
+    - poll_interval (float): Seconds between polls.
+    - full_scan_every (int): Do a full walk every this many polls, to catch files rewritten in place.
+    - on_results (callable): Called with each batch of results and the updated aggregate.
+    - max_cycles (int): Stop after this many polls (None to run until interrupted).
+    """
+    cycle = 0
+    try:
+        while max_cycles is None or cycle < max_cycles:
+            full = cycle == 0 or (full_scan_every and cycle % full_scan_every == 0)
+            results = run_incremental(directories, manifest, process, is_supported, full=full)
+            if results and on_results is not None:
+                on_results(results, manifest.aggregate)
+            cycle += 1
+            if max_cycles is None or cycle < max_cycles:
+                time.sleep(poll_interval)
+    except KeyboardInterrupt:
+        logger.info("Watch stopped")
+    return manifest.aggregate
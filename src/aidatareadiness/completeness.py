@@ -0,0 +1,150 @@
+# (C) British Crown Copyright 2017-2025, Met Office.
+# Please see LICENSE.md for license details.
+
+"""
+Completeness of gridded variables along time and over space.
+
+While a variable is read block by block for its statistics (see stats.compute_variable_stats), a
+CompletenessAccumulator adds up the missing (NaN or fill) values of each block per time step and per
+grid cell. Only these counts are kept, never a mask of the full cube, so the result is one series per
+variable and one lat/lon map per variable, small enough to write out and plot quickly.
+"""
+
+import numpy as np
+import xarray as xr
+
+from aidatareadiness.metadata import dataset_profile
+from aidatareadiness.stats import DEFAULT_BLOCK_ELEMENTS, iter_blocks
+
+TIME_DIMS = ['time', 'valid_time', 't']
+LAT_DIMS = ['latitude', 'lat', 'grid_latitude', 'rlat', 'y']
+LON_DIMS = ['longitude', 'lon', 'grid_longitude', 'rlon', 'x']
+
+
+def _find_dim(dims, candidates):
+    for name in candidates:
+        if name in dims:
+            return name
+    return None
+
+
+def completeness_dims(data_array):
+    """
+    Return the (time dimension, (y dimension, x dimension)) of a variable; either may be None. When no
+    latitude/longitude dimension is recognised, the last two non-time dimensions are taken as the grid.
+    """
+    dims = list(data_array.dims)
+    time_dim = _find_dim(dims, TIME_DIMS)
+    lat_dim, lon_dim = _find_dim(dims, LAT_DIMS), _find_dim(dims, LON_DIMS)
+    if lat_dim is None or lon_dim is None:
+        grid = [dim for dim in dims if dim != time_dim]
+        lat_dim, lon_dim = grid[-2:] if len(grid) >= 2 else (None, None)
+    return time_dim, ((lat_dim, lon_dim) if lat_dim is not None else None)
+
+
+class CompletenessAccumulator:
+    """Counts of missing and total values per time step and per grid cell, updated block by block."""
+
+    __slots__ = ("dims", "time_dim", "grid_dims", "_time_axis", "_grid_axes",
+                 "time_missing", "time_total", "map_missing", "map_total")
+
+    def __init__(self, data_array):
+        self.dims = list(data_array.dims)
+        self.time_dim, grid_dims = completeness_dims(data_array)
+        self._time_axis = self.dims.index(self.time_dim) if self.time_dim is not None else None
+        self.time_missing = self.time_total = self.map_missing = self.map_total = None
+        if self._time_axis is not None:
+            length = data_array.shape[self._time_axis]
+            self.time_missing = np.zeros(length, dtype=np.int64)
+            self.time_total = np.zeros(length, dtype=np.int64)
+
+        # The map is kept with its dimensions in the variable's order
+        self._grid_axes = tuple(sorted(self.dims.index(dim) for dim in grid_dims)) if grid_dims else None
+        self.grid_dims = [self.dims[axis] for axis in self._grid_axes] if self._grid_axes else None
+        if self._grid_axes is not None:
+            shape = tuple(data_array.shape[axis] for axis in self._grid_axes)
+            self.map_missing = np.zeros(shape, dtype=np.int64)
+            self.map_total = np.zeros(shape, dtype=np.int64)
+
+    def update(self, index, values, fill_value=None):
+        """Add the block at index (a tuple of slices, as yielded by stats.iter_blocks)."""
+        if not index:
+            return
+        values = np.asarray(values)
+        missing = np.isnan(values) if values.dtype.kind == 'f' else np.zeros(values.shape, dtype=bool)
+        if fill_value is not None:
+            missing |= values == fill_value
+
+        if self._time_axis is not None:
+            other = tuple(axis for axis in range(missing.ndim) if axis != self._time_axis)
+            self.time_missing[index[self._time_axis]] += missing.sum(axis=other)
+            self.time_total[index[self._time_axis]] += missing.size // missing.shape[self._time_axis]
+        if self._grid_axes is not None:
+            other = tuple(axis for axis in range(missing.ndim) if axis not in self._grid_axes)
+            cells = tuple(index[axis] for axis in self._grid_axes)
+            self.map_missing[cells] += missing.sum(axis=other)
+            self.map_total[cells] += missing.size // int(np.prod([missing.shape[axis] for axis in self._grid_axes]))
+
+
+def _fraction(missing, total):
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(total > 0, missing / np.maximum(total, 1), np.nan).astype(np.float32)
+
+
+def completeness_summary(dataset, accumulators, source=None):
+    """
+    Build a small dataset of missing fractions from accumulators (a dict of variable name to
+    CompletenessAccumulator): <name>_missing_fraction_time along time and <name>_missing_fraction_map
+    over the grid, with the coordinates of the original dataset.
+    """
+    data_vars = {}
+    for name, accumulator in accumulators.items():
+        if accumulator.time_missing is not None:
+            data_vars[f"{name}_missing_fraction_time"] = xr.DataArray(
+                _fraction(accumulator.time_missing, accumulator.time_total), dims=[accumulator.time_dim],
+                attrs={'long_name': f"Fraction of {name} values missing at each time", 'units': '1'},
+            )
+        if accumulator.map_missing is not None:
+            data_vars[f"{name}_missing_fraction_map"] = xr.DataArray(
+                _fraction(accumulator.map_missing, accumulator.map_total), dims=accumulator.grid_dims,
+                attrs={'long_name': f"Fraction of {name} values missing in each grid cell", 'units': '1'},
+            )
+
+    summary = xr.Dataset(data_vars)
+    coords = {dim: dataset[dim].values for dim in summary.dims if dim in dataset.coords}
+    summary = summary.assign_coords(coords)
+    for dim in coords:
+        summary[dim].attrs = dict(dataset[dim].attrs)
+    summary.attrs['title'] = 'Completeness summary'
+    if source is not None:
+        summary.attrs['source_file'] = str(source)
+    return summary
+
+
+def accumulators_for(dataset):
+    """Return empty accumulators for every data variable of a dataset, skipping bounds and scalar variables."""
+    return {record.name: CompletenessAccumulator(dataset[record.name])
+            for record in dataset_profile(dataset).statistics_variables() if record.dims}
+
+
+def compute_dataset_completeness(dataset, block_elements=DEFAULT_BLOCK_ELEMENTS):
+    """
+    Read every data variable of a dataset once and return its filled accumulators. To get them from the
+    statistics pass instead, pass accumulators_for(dataset) to stats.compute_dataset_stats.
+    """
+    accumulators = accumulators_for(dataset)
+    profile = dataset_profile(dataset)
+    for var_name, accumulator in accumulators.items():
+        fill_value = profile.variables[var_name].fill_value
+        for index, values in iter_blocks(dataset[var_name], block_elements):
+            accumulator.update(index, values, fill_value)
+    return accumulators
+
+
+def save_completeness(summary, path):
+    """Write a completeness summary to NetCDF, or to Zarr if path ends in .zarr."""
+    if path.rstrip('/').endswith('.zarr'):
+        summary.to_zarr(path, mode='w')
+    else:
+        summary.to_netcdf(path)
+    return path
@@ -0,0 +1,90 @@
+# (C) British Crown Copyright 2017-2025, Met Office.
+# Please see LICENSE.md for license details.
+
+"""
+A compact metadata profile of a dataset, built once and shared by the checklist helpers.
+
+Indexing dataset[name] builds a new DataArray (with its coordinates) on every call, which adds up on files
+with hundreds of variables when several helpers each walk all of them. DatasetProfile reads the underlying
+Variable objects once and keeps a small record per variable, which is cheap enough to do on every call.
+
+A profile is a snapshot: by default dataset_profile builds a new one each time, so edits made to a dataset
+in a notebook (attributes, replaced variables) are always seen. Within a shared_profile block, where the
+dataset is not edited (e.g. the gridded checks of one file), the helpers share one profile instead.
+"""
+
+import contextlib
+import contextvars
+
+
+def is_bounds_variable(var_name):
+    """Return True for cell-bounds variables (names containing "bnd" or "bound"), which the checks skip."""
+    name = var_name.lower()
+    return "bnd" in name or "bound" in name
+
+
+class VariableRecord:
+    """The metadata of one variable: name, dims, shape, dtype, units, long_name, fill value and encoding."""
+
+    __slots__ = ("name", "dims", "shape", "dtype", "units", "long_name", "fill_value", "encoding", "is_coord")
+
+    def __init__(self, name, variable, is_coord=False):
+        attrs = variable.attrs
+        self.name = name
+        self.dims = variable.dims
+        self.shape = variable.shape
+        self.dtype = variable.dtype
+        self.units = attrs.get("units")
+        self.long_name = attrs.get("long_name")
+        # As the statistics have always used it: only an undecoded _FillValue attribute counts as filled
+        self.fill_value = attrs.get("_FillValue")
+        self.encoding = variable.encoding
+        self.is_coord = is_coord
+
+
+class DatasetProfile:
+    """Dimension sizes, global attributes and a VariableRecord per variable of a dataset, in its variable order."""
+
+    __slots__ = ("sizes", "attrs", "variables")
+
+    def __init__(self, dataset):
+        coord_names = set(dataset.coords)
+        self.sizes = dict(dataset.sizes)
+        self.attrs = dict(dataset.attrs)
+        self.variables = {name: VariableRecord(name, variable, name in coord_names)
+                          for name, variable in dataset.variables.items()}
+
+    @property
+    def data_variables(self):
+        """Records of the data variables (not coordinates)."""
+        return [record for record in self.variables.values() if not record.is_coord]
+
+    def statistics_variables(self):
+        """Records of the data variables the quality statistics cover: all but bounds variables."""
+        return [record for record in self.data_variables if not is_bounds_variable(record.name)]
+
+
+# The (dataset, profile) shared within a shared_profile block
+_shared = contextvars.ContextVar('aidatareadiness_shared_profile', default=None)
+
+
+def dataset_profile(dataset):
+    """Return the DatasetProfile of a dataset: the shared one within shared_profile(dataset), otherwise a new one."""
+    shared = _shared.get()
+    if shared is not None and shared[0] is dataset:
+        return shared[1]
+    return DatasetProfile(dataset)
+
+
+@contextlib.contextmanager
+def shared_profile(dataset):
+    """
+    Share one DatasetProfile of a dataset between the helpers called within the block. The dataset must not
+    be edited within it, as the profile would not see the changes.
+    """
+    profile = DatasetProfile(dataset)
+    token = _shared.set((dataset, profile))
+    try:
+        yield profile
+    finally:
+        _shared.reset(token)
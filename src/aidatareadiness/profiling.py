@@ -0,0 +1,158 @@
+# (C) British Crown Copyright 2017-2025, Met Office.
+# Please see LICENSE.md for license details.
+
+"""
+Lightweight per-stage profiling of the checks.
+
+While a Profiler is active, each ``stage`` records its wall time, CPU time, bytes read (from
+/proc/self/io, on Linux), number of data blocks read by the streaming statistics and the peak resident
+memory reached during the stage (on Linux, by resetting the kernel's high-water mark at the start of
+each stage; None elsewhere). Functions decorated with ``profiled`` record themselves as a stage; when no
+profiler is active they run unchanged apart from one lookup.
+"""
+
+import time
+import functools
+import contextlib
+import contextvars
+
+_active = contextvars.ContextVar('aidatareadiness_profiler', default=None)
+
+STAGE_FIELDS = ('calls', 'wall_s', 'cpu_s', 'bytes_read', 'chunks')
+
+
+def _new_stage():
+    return {'calls': 0, 'wall_s': 0.0, 'cpu_s': 0.0, 'bytes_read': None, 'chunks': 0, 'peak_rss_bytes': None}
+
+
+def read_io_bytes():
+    """Bytes read by this process so far (rchar of /proc/self/io, which includes page cache hits), or None."""
+    try:
+        with open('/proc/self/io') as f:
+            for line in f:
+                if line.startswith('rchar:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def peak_rss_bytes():
+    """Peak resident set size of this process in bytes (VmHWM, since start or the last reset_peak_rss), or None."""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def reset_peak_rss():
+    """Reset the peak resident set size to the current one (Linux 4.0+). Returns False if it cannot be reset."""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+class Profiler:
+    """Accumulates per-stage measurements; stages with the same name add up."""
+
+    def __init__(self):
+        self.stages = {}
+        self._chunks = 0
+        # Peaks of the stages in progress, innermost last; None where the peak cannot be measured
+        self._peaks = []
+
+    def _record_peak(self):
+        # Credit the peak since the last reset to every stage in progress, then reset it for the next interval
+        peak = peak_rss_bytes()
+        for index, current in enumerate(self._peaks):
+            if current is not None:
+                self._peaks[index] = max(current, peak) if peak is not None else None
+        return reset_peak_rss() and peak is not None
+
+    def count_chunks(self, n=1):
+        self._chunks += n
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        io_start, chunks_start = read_io_bytes(), self._chunks
+        measurable = self._record_peak()
+        self._peaks.append(0 if measurable else None)
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            self._record_peak()
+            peak = self._peaks.pop()
+            io_end = read_io_bytes()
+            stage = self.stages.setdefault(name, _new_stage())
+            stage['calls'] += 1
+            stage['wall_s'] += time.perf_counter() - wall_start
+            stage['cpu_s'] += time.process_time() - cpu_start
+            stage['chunks'] += self._chunks - chunks_start
+            if io_start is not None and io_end is not None:
+                stage['bytes_read'] = (stage['bytes_read'] or 0) + io_end - io_start
+            if peak is not None:
+                stage['peak_rss_bytes'] = max(stage['peak_rss_bytes'] or 0, peak)
+
+    def to_dict(self):
+        return {name: dict(stage) for name, stage in self.stages.items()}
+
+
+@contextlib.contextmanager
+def profiling():
+    """Activate a new Profiler for the enclosed code and yield it."""
+    profiler = Profiler()
+    token = _active.set(profiler)
+    try:
+        yield profiler
+    finally:
+        _active.reset(token)
+
+
+def active_profiler():
+    return _active.get()
+
+
+def stage(name):
+    """Context manager recording a stage on the active profiler; does nothing when none is active."""
+    profiler = _active.get()
+    return profiler.stage(name) if profiler is not None else contextlib.nullcontext()
+
+
+def count_chunks(n=1):
+    """Count data blocks read, for the active profiler."""
+    profiler = _active.get()
+    if profiler is not None:
+        profiler.count_chunks(n)
+
+
+def profiled(name):
+    """Decorator recording each call of a function as a stage of the active profiler."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def merge_stages(total, stages):
+    """Add the stage measurements of one file into run totals (both dicts of stage name to measurements)."""
+    for name, stage_values in stages.items():
+        merged = total.setdefault(name, _new_stage())
+        for field in STAGE_FIELDS:
+            value = stage_values.get(field)
+            if value is not None:
+                merged[field] = (merged[field] or 0) + value
+        peak = stage_values.get('peak_rss_bytes')
+        if peak is not None:
+            merged['peak_rss_bytes'] = max(merged['peak_rss_bytes'] or 0, peak)
+    return total
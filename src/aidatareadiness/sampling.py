@@ -0,0 +1,200 @@
+# (C) British Crown Copyright 2017-2025, Met Office.
+# Please see LICENSE.md for license details.
+
+"""
+Approximate quality statistics for gridded variables from a sample of hyperslabs.
+
+A variable is divided into sampling units (by default one field per time step; optionally square spatial
+tiles of a field, split along both of its last two dimensions) and a random or stratified sample of the units is read. Percentages of missing, filled and
+outlier values are estimated with the ratio estimator for cluster samples, whose standard error gives a
+normal-approximation confidence interval (with the finite population correction). Reading 1% of the
+units reads about 1% of the data.
+"""
+
+import math
+from statistics import NormalDist
+
+import numpy as np
+
+from aidatareadiness.metadata import dataset_profile
+from aidatareadiness.profiling import count_chunks
+from aidatareadiness.stats import DEFAULT_BLOCK_ELEMENTS, RunningStats, block_shape
+
+SAMPLE_STRATEGIES = ('stratified', 'random')
+# Values per unit when sampling spatial tiles rather than whole fields (128 x 128 tiles)
+TILE_ELEMENTS = 128 * 128
+# Fewer units than this give no usable variance estimate
+MIN_SAMPLE_UNITS = 2
+
+
+def unit_elements_for(shape, block_elements=DEFAULT_BLOCK_ELEMENTS):
+    """Default sampling unit: one field over the last two dimensions, split into blocks if it is larger."""
+    field = int(np.prod(shape[-2:])) if len(shape) else 1
+    return max(1, min(field, block_elements))
+
+
+def tile_shape(shape, tile_elements=TILE_ELEMENTS):
+    """
+    Shape of a square spatial tile of at most tile_elements values: one step of every leading dimension and
+    up to sqrt(tile_elements) along each of the last two (e.g. (1, 128, 128) for a (time, lat, lon) array).
+    """
+    if len(shape) < 2:
+        return tuple(min(size, max(1, tile_elements)) for size in shape)
+    side = max(1, math.isqrt(int(tile_elements)))
+    return (1,) * (len(shape) - 2) + tuple(max(1, min(size, side)) for size in shape[-2:])
+
+
+def sample_unit_slices(shape, unit_elements, fraction, strategy='stratified', rng=None, tiles=False):
+    """
+    Choose a sample of the units (hyperslabs of at most unit_elements values, as stats.block_slices, or
+    square spatial tiles, see tile_shape, if tiles) of an array of the given shape. 'random' is a simple random sample; 'stratified' splits the units, in storage
+    order, into equal strata and draws one from each, so the sample is spread evenly along the leading
+    (usually time) dimension.
+
+    Returns:
+    - (list, int): The sampled units as tuples of slices, in storage order, and the total number of units.
+    """
+    if strategy not in SAMPLE_STRATEGIES:
+        raise ValueError(f"Unknown sampling strategy {strategy}; expected one of {SAMPLE_STRATEGIES}")
+    rng = rng if rng is not None else np.random.default_rng()
+    if not shape:
+        return [()], 1
+    block = tile_shape(shape, unit_elements) if tiles else block_shape(shape, unit_elements)
+    counts = [math.ceil(size / step) for size, step in zip(shape, block)]
+    population = int(np.prod(counts))
+    size = min(population, max(MIN_SAMPLE_UNITS, math.ceil(fraction * population)))
+
+    if strategy == 'random':
+        chosen = np.sort(rng.choice(population, size=size, replace=False))
+    else:
+        edges = np.linspace(0, population, size + 1).astype(np.int64)
+        chosen = rng.integers(edges[:-1], edges[1:])
+
+    units = []
+    for position in chosen:
+        origin = np.unravel_index(int(position), counts)
+        units.append(tuple(slice(index * step, min((index + 1) * step, length))
+                           for index, step, length in zip(origin, block, shape)))
+    return units, population
+
+
+def ratio_estimate(numerators, denominators, population_units, confidence=0.95):
+    """
+    Ratio estimate sum(numerators) / sum(denominators) over sampled units, with its confidence interval.
+
+    Returns:
+    - (float, [float, float]): The estimated proportion and its interval, clipped to [0, 1]. Both are NaN
+      when no sampled unit has a denominator.
+    """
+    y = np.asarray(numerators, dtype=np.float64)
+    n = np.asarray(denominators, dtype=np.float64)
+    if not n.sum():
+        return math.nan, [math.nan, math.nan]
+    estimate = y.sum() / n.sum()
+
+    sampled = len(n)
+    if sampled >= population_units:
+        half_width = 0.0
+    elif sampled < MIN_SAMPLE_UNITS:
+        half_width = math.inf
+    else:
+        residual = y - estimate * n
+        variance = ((1 - sampled / population_units) * np.square(residual).sum() / (sampled - 1)
+                    / (sampled * n.mean() ** 2))
+        half_width = NormalDist().inv_cdf((1 + confidence) / 2) * math.sqrt(variance)
+    return estimate, [max(0.0, estimate - half_width), min(1.0, estimate + half_width)]
+
+
+def _read_unit(variable, index):
+    count_chunks()
+    return np.asarray(variable[index].values) if index else np.asarray(variable.values).reshape(1)
+
+
+def estimate_variable_stats(data_array, fraction=0.01, thresholds=(3,), fill_value=None, strategy='stratified',
+                            confidence=0.95, seed=None, unit_elements=None, block_elements=DEFAULT_BLOCK_ELEMENTS,
+                            tiles=False):
+    """
+    Estimate the missing, filled and Z-score outlier percentages of one variable from a sample of its units.
+
+    Parameters:
+    - data_array (xarray.DataArray): The variable to analyse; may be lazily loaded or dask-backed.
+    - fraction (float): Fraction of the units to read.
+    - thresholds (iterable of float): Z-score thresholds to estimate outlier rates for. The mean and
+      standard deviation are themselves estimated from the sample.
+    - fill_value: Value counted as filled, e.g. the variable's _FillValue attribute.
+    - strategy (str): 'stratified' (spread along the leading dimension) or 'random'.
+    - confidence (float): Confidence level of the reported intervals.
+    - seed (int): Seed of the random sample, for repeatable estimates.
+    - unit_elements (int): Values per sampling unit; by default one field (see unit_elements_for).
+    - block_elements (int): Maximum number of values read into memory at once.
+    - tiles (bool): Sample square spatial tiles of unit_elements values (default TILE_ELEMENTS) rather than
+      runs of whole fields or rows.
+
+    Returns:
+    - dict: Estimated percentages and their confidence intervals, with the sample size.
+    """
+    variable = data_array.variable
+    shape = variable.shape
+    default_elements = TILE_ELEMENTS if tiles else unit_elements_for(shape, block_elements)
+    unit_elements = min(unit_elements or default_elements, block_elements)
+    units, population = sample_unit_slices(shape, unit_elements, fraction, strategy, np.random.default_rng(seed),
+                                           tiles)
+
+    stats = RunningStats()
+    totals, nans, fills, valid = [], [], [], []
+    for index in units:
+        unit = RunningStats()
+        unit.update(_read_unit(variable, index), fill_value)
+        totals.append(unit.total)
+        nans.append(unit.nan_count)
+        fills.append(unit.fill_count)
+        valid.append(unit.count)
+        stats.merge(unit)
+
+    numeric = data_array.dtype.kind in "fiu"
+    outliers = {threshold: [] for threshold in thresholds}
+    if outliers and numeric and stats.count:
+        limits = [(threshold, threshold * stats.std) for threshold in outliers]
+        for index in units:
+            deviation = np.abs(np.asarray(_read_unit(variable, index), dtype=np.float64).ravel() - stats.mean)
+            for threshold, limit in limits:
+                outliers[threshold].append(int(np.count_nonzero(deviation > limit)))
+
+    missing, missing_interval = ratio_estimate(nans, totals, population, confidence)
+    filled, filled_interval = ratio_estimate(fills, totals, population, confidence)
+    outlier_estimates = {threshold: ratio_estimate(counts, valid, population, confidence)
+                         for threshold, counts in outliers.items() if counts}
+
+    return {
+        "variable_name": data_array.name,
+        "estimated": True,
+        "strategy": strategy,
+        "confidence": confidence,
+        "total_values": int(np.prod(shape)),
+        "sampled_values": stats.total,
+        "sampled_units": len(units),
+        "population_units": population,
+        "fill_value": fill_value,
+        "mean": stats.mean if stats.count else math.nan,
+        "std": stats.std,
+        "percentage_missing": missing * 100,
+        "percentage_missing_ci": [bound * 100 for bound in missing_interval],
+        "percentage_filled": filled * 100,
+        "percentage_filled_ci": [bound * 100 for bound in filled_interval],
+        "percentage_outliers": {threshold: estimate * 100 for threshold, (estimate, _) in outlier_estimates.items()},
+        "percentage_outliers_ci": {threshold: [bound * 100 for bound in interval]
+                                   for threshold, (_, interval) in outlier_estimates.items()},
+    }
+
+
+def estimate_dataset_stats(dataset, fraction=0.01, thresholds=(3,), strategy='stratified', confidence=0.95,
+                           seed=None, unit_elements=None, block_elements=DEFAULT_BLOCK_ELEMENTS, tiles=False):
+    """
+    Run estimate_variable_stats over every data variable of a dataset, skipping bounds variables.
+    The fill value of each variable is taken from its _FillValue attribute, if present.
+    """
+    results = []
+    for record in dataset_profile(dataset).statistics_variables():
+        results.append(estimate_variable_stats(dataset[record.name], fraction, thresholds, record.fill_value, strategy,
+                                               confidence, seed, unit_elements, block_elements, tiles))
+    return results
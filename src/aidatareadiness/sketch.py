@@ -0,0 +1,308 @@
+# (C) British Crown Copyright 2017-2025, Met Office.
+# Please see LICENSE.md for license details.
+
+"""
+Mergeable streaming quantile sketch (KLL) and the robust statistics built on it.
+
+A QuantileSketch summarises any number of values in O(k log(n/k)) memory and answers quantile and rank
+queries with a rank error of the order of 1 / k of the count. Large blocks are first Bernoulli-sampled down to
+about SAMPLE_ITEMS values (KLL's sampler), which keeps updates fast at a rank error of about
+1 / sqrt(SAMPLE_ITEMS) per block. Sketches of blocks, files or chunks of a table
+can be merged, so a whole collection can be summarised in constant memory and re-summarised without
+rereading the data.
+
+The robust checks take the median, the median absolute deviation (MAD) and the quartiles from the sketch
+and then count outliers exactly in a second pass: values whose modified Z-score
+0.6745 * |x - median| / MAD exceeds a threshold, and values outside the IQR fences
+[Q1 - factor * IQR, Q3 + factor * IQR]. A histogram over the range of the data is built in the same pass.
+"""
+
+import math
+
+import numpy as np
+
+from aidatareadiness.metadata import dataset_profile
+from aidatareadiness.stats import DEFAULT_BLOCK_ELEMENTS, iter_blocks
+
+DEFAULT_SKETCH_K = 1000
+# Blocks larger than twice this are sampled down to about this many values before they are sketched
+SAMPLE_ITEMS = 2 ** 16
+# Scales the MAD to the standard deviation of a normal distribution (the 0.6745 of the modified Z-score)
+MAD_TO_STD = 1.4826
+DEFAULT_MAD_THRESHOLD = 3.5
+DEFAULT_IQR_FACTOR = 1.5
+DEFAULT_HISTOGRAM_BINS = 20
+
+
+class QuantileSketch:
+    """
+    KLL quantile sketch of float values. NaNs are ignored. Level h holds items standing for 2**h values
+    each; when a level outgrows its capacity half of it, chosen by a random offset, is promoted.
+    """
+
+    __slots__ = ("k", "count", "min", "max", "levels", "_rng")
+
+    def __init__(self, k=DEFAULT_SKETCH_K, seed=None):
+        self.k = k
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+        self.levels = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, level):
+        depth = len(self.levels) - level - 1
+        return max(2, int(math.ceil(self.k * (2 / 3) ** depth)))
+
+    def update(self, values):
+        """Add an array of values."""
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[~np.isnan(values)]
+        if not values.size:
+            return self
+        self.count += values.size
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        level = 0
+        if values.size > 2 * SAMPLE_ITEMS:
+            # Keep each value with probability 2**-level; the kept values stand for 2**level each
+            level = int(math.log2(values.size / SAMPLE_ITEMS))
+            values = values[self._rng.random(values.size) < 2.0 ** -level]
+        while len(self.levels) <= level:
+            self.levels.append(np.empty(0))
+        self.levels[level] = np.concatenate([self.levels[level], values])
+        self._compress()
+        return self
+
+    def merge(self, other):
+        """Merge another sketch into this one."""
+        if not other.count:
+            return self
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+        return self
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if items.size > self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                items = np.sort(items)
+                # An odd item out stays at this level so the total weight is kept exactly
+                keep = items[:1] if items.size % 2 else items[:0]
+                pairs = items[keep.size:]
+                promoted = pairs[int(self._rng.integers(2))::2]
+                self.levels[level] = keep
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+            level += 1
+
+    def _weighted_items(self):
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(level_items.size, 2.0 ** level) for level, level_items in enumerate(self.levels)])
+        order = np.argsort(items, kind='stable')
+        return items[order], weights[order]
+
+    def quantiles(self, qs):
+        """Return the approximate values at quantiles qs (each between 0 and 1)."""
+        qs = np.atleast_1d(np.asarray(qs, dtype=np.float64))
+        if not self.count:
+            return np.full(qs.shape, np.nan)
+        items, weights = self._weighted_items()
+        cumulative = np.cumsum(weights)
+        positions = np.searchsorted(cumulative, qs * cumulative[-1], side='left')
+        result = items[np.minimum(positions, items.size - 1)]
+        # The exact extremes are known
+        result[qs <= 0] = self.min
+        result[qs >= 1] = self.max
+        return result
+
+    def quantile(self, q):
+        return float(self.quantiles([q])[0])
+
+    def cdf(self, points):
+        """Return the approximate fraction of values at or below each point."""
+        points = np.atleast_1d(np.asarray(points, dtype=np.float64))
+        if not self.count:
+            return np.full(points.shape, np.nan)
+        items, weights = self._weighted_items()
+        cumulative = np.concatenate([[0.0], np.cumsum(weights)])
+        return cumulative[np.searchsorted(items, points, side='right')] / cumulative[-1]
+
+    def median_absolute_deviation(self, median=None):
+        """Approximate MAD, the weighted median of |x - median| over the sketch items."""
+        if not self.count:
+            return math.nan
+        median = self.quantile(0.5) if median is None else median
+        items, weights = self._weighted_items()
+        deviations = np.abs(items - median)
+        order = np.argsort(deviations, kind='stable')
+        cumulative = np.cumsum(weights[order])
+        return float(deviations[order][np.searchsorted(cumulative, cumulative[-1] / 2, side='left')])
+
+    def histogram(self, bins=DEFAULT_HISTOGRAM_BINS):
+        """Approximate histogram over [min, max]: (counts, edges) as numpy.histogram."""
+        if not self.count:
+            return np.zeros(bins), np.full(bins + 1, np.nan)
+        edges = np.linspace(self.min, self.max, bins + 1)
+        cdf = self.cdf(edges)
+        cdf[0] = 0.0
+        return np.diff(cdf) * self.count, edges
+
+    def to_dict(self):
+        """
+        Serialisable form of the sketch, e.g. to store per-file sketches and merge them later. The range of
+        an empty sketch (e.g. of an all-NaN variable) is None, as JSON has no infinities.
+        """
+        empty = self.count == 0
+        return {'k': self.k, 'count': self.count, 'min': None if empty else self.min,
+                'max': None if empty else self.max, 'levels': [items.tolist() for items in self.levels]}
+
+    @classmethod
+    def from_dict(cls, data, seed=None):
+        sketch = cls(data['k'], seed)
+        sketch.count = data['count']
+        if data['count']:
+            sketch.min, sketch.max = data['min'], data['max']
+        sketch.levels = [np.asarray(items, dtype=np.float64) for items in data['levels']]
+        return sketch
+
+
+def robust_bounds(sketch, mad_threshold=DEFAULT_MAD_THRESHOLD, iqr_factor=DEFAULT_IQR_FACTOR):
+    """
+    Derive the median, MAD, quartiles and the two sets of outlier bounds from a sketch.
+
+    Returns:
+    - dict: median, mad, q1, q3, iqr, mad_bounds and iqr_bounds (each a [low, high] pair).
+    """
+    median, q1, q3 = sketch.quantiles([0.5, 0.25, 0.75])
+    mad = sketch.median_absolute_deviation(median)
+    spread = mad_threshold * MAD_TO_STD * mad
+    iqr = q3 - q1
+    return {
+        'median': float(median),
+        'mad': mad,
+        'q1': float(q1),
+        'q3': float(q3),
+        'iqr': float(iqr),
+        'mad_bounds': [float(median - spread), float(median + spread)],
+        'iqr_bounds': [float(q1 - iqr_factor * iqr), float(q3 + iqr_factor * iqr)],
+    }
+
+
+class RobustCounter:
+    """Exact counts of values outside robust bounds, and a histogram, accumulated block by block."""
+
+    __slots__ = ("bounds", "edges", "mad_outliers", "iqr_outliers", "histogram")
+
+    def __init__(self, bounds, value_range, bins=DEFAULT_HISTOGRAM_BINS):
+        self.bounds = bounds
+        self.edges = np.linspace(value_range[0], value_range[1], bins + 1) if np.isfinite(value_range).all() else None
+        self.mad_outliers = 0
+        self.iqr_outliers = 0
+        self.histogram = np.zeros(bins, dtype=np.int64)
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[~np.isnan(values)]
+        (mad_low, mad_high), (iqr_low, iqr_high) = self.bounds['mad_bounds'], self.bounds['iqr_bounds']
+        # A MAD of zero (e.g. mostly constant data) makes every other value an outlier; report none instead
+        if self.bounds['mad'] > 0:
+            self.mad_outliers += int(np.count_nonzero((values < mad_low) | (values > mad_high)))
+        self.iqr_outliers += int(np.count_nonzero((values < iqr_low) | (values > iqr_high)))
+        if self.edges is not None:
+            self.histogram += np.histogram(values, bins=self.edges)[0]
+
+    def result(self, valid_count):
+        percentage = lambda count: (count / valid_count) * 100 if valid_count else 0.0
+        return {
+            'mad_outliers': self.mad_outliers,
+            'percentage_mad_outliers': percentage(self.mad_outliers),
+            'iqr_outliers': self.iqr_outliers,
+            'percentage_iqr_outliers': percentage(self.iqr_outliers),
+            'histogram': {'counts': self.histogram.tolist(),
+                          'edges': self.edges.tolist() if self.edges is not None else []},
+        }
+
+
+def compute_variable_robust_stats(data_array, fill_value=None, mad_threshold=DEFAULT_MAD_THRESHOLD,
+                                  iqr_factor=DEFAULT_IQR_FACTOR, bins=DEFAULT_HISTOGRAM_BINS, k=DEFAULT_SKETCH_K,
+                                  block_elements=DEFAULT_BLOCK_ELEMENTS):
+    """
+    Compute robust (median/MAD and IQR) outlier counts and a histogram of one numeric variable in two passes
+    over its blocks: the first builds a quantile sketch, the second counts exactly. Fill values are
+    excluded like NaNs.
+
+    Returns:
+    - dict or None: The statistics, including the sketch itself (as a dict) for merging across files;
+      None for non-numeric variables.
+    """
+    if data_array.dtype.kind not in "fiu":
+        return None
+
+    def valid_values(values):
+        values = np.asarray(values, dtype=np.float64).ravel()
+        return values[values != fill_value] if fill_value is not None else values
+
+    sketch = QuantileSketch(k, seed=0)
+    for _, values in iter_blocks(data_array, block_elements):
+        sketch.update(valid_values(values))
+
+    bounds = robust_bounds(sketch, mad_threshold, iqr_factor)
+    counter = RobustCounter(bounds, (sketch.min, sketch.max), bins)
+    if sketch.count:
+        for _, values in iter_blocks(data_array, block_elements):
+            counter.update(valid_values(values))
+
+    return {
+        'variable_name': data_array.name,
+        'valid_count': sketch.count,
+        **bounds,
+        **counter.result(sketch.count),
+        'sketch': sketch.to_dict(),
+    }
+
+
+def compute_dataset_robust_stats(dataset, mad_threshold=DEFAULT_MAD_THRESHOLD, iqr_factor=DEFAULT_IQR_FACTOR,
+                                 bins=DEFAULT_HISTOGRAM_BINS, k=DEFAULT_SKETCH_K, block_elements=DEFAULT_BLOCK_ELEMENTS):
+    """
+    Run compute_variable_robust_stats over every numeric data variable of a dataset, skipping bounds
+    variables. The fill value of each variable is taken from its _FillValue attribute, if present.
+    """
+    results = []
+    for record in dataset_profile(dataset).statistics_variables():
+        stats = compute_variable_robust_stats(dataset[record.name], record.fill_value, mad_threshold,
+                                              iqr_factor, bins, k, block_elements)
+        if stats is not None:
+            results.append(stats)
+    return results
+
+
+def merge_sketches(sketch_dicts, mad_threshold=DEFAULT_MAD_THRESHOLD, iqr_factor=DEFAULT_IQR_FACTOR,
+                   bins=DEFAULT_HISTOGRAM_BINS):
+    """
+    Merge serialised sketches (e.g. of one variable across the files of a collection) and summarise them:
+    count, range, robust bounds and an approximate histogram.
+    """
+    merged = None
+    for data in sketch_dicts:
+        sketch = QuantileSketch.from_dict(data, seed=0)
+        merged = sketch if merged is None else merged.merge(sketch)
+    if merged is None:
+        return None
+    counts, edges = merged.histogram(bins)
+    return {
+        'valid_count': merged.count,
+        'min': merged.min if merged.count else None,
+        'max': merged.max if merged.count else None,
+        **robust_bounds(merged, mad_threshold, iqr_factor),
+        'histogram': {'counts': counts.tolist(), 'edges': edges.tolist()},
+        'sketch': merged.to_dict(),
+    }
@@ -0,0 +1,213 @@
+# (C) British Crown Copyright 2017-2025, Met Office.
+# Please see LICENSE.md for license details.
+
+"""
+Streaming statistics for gridded variables.
+
+Variables are read block by block (hyperslabs of at most ``block_elements`` values), so memory use is
+bounded by the block size rather than the size of the variable. The first pass counts values, NaNs and
+fill values and accumulates the mean and variance, merging the per-block moments with Chan's parallel
+form of Welford's algorithm. An optional second pass counts Z-score outliers for several thresholds at once.
+"""
+
+import itertools
+import math
+
+import numpy as np
+
+from aidatareadiness.metadata import dataset_profile, is_bounds_variable  # noqa: F401 (re-exported)
+from aidatareadiness.profiling import count_chunks
+
+
+# 2**24 values is 128 MB of float64 per block.
+DEFAULT_BLOCK_ELEMENTS = 2 ** 24
+# Smallest block used when fitting blocks into a memory budget.
+MIN_BLOCK_ELEMENTS = 2 ** 16
+# Approximate bytes held per value of a block while it is processed: the block itself, a float64 copy
+# and the temporaries of the moment and Z-score computations.
+BLOCK_BYTES_PER_ELEMENT = 32
+
+
+def block_elements_for_memory(max_bytes):
+    """
+    Return the number of values per block whose processing fits in max_bytes, capped at
+    DEFAULT_BLOCK_ELEMENTS. Budgets too small for even MIN_BLOCK_ELEMENTS still get that many.
+    """
+    return int(min(DEFAULT_BLOCK_ELEMENTS, max(MIN_BLOCK_ELEMENTS, max_bytes // BLOCK_BYTES_PER_ELEMENT)))
+
+
+def block_shape(shape, max_elements=DEFAULT_BLOCK_ELEMENTS):
+    """
+    Choose a block shape for an array of the given shape holding at most max_elements values.
+
+    Trailing dimensions are kept whole for as long as they fit, so blocks are contiguous hyperslabs
+    (e.g. whole lat/lon fields for a run of time steps).
+    """
+    max_elements = max(1, int(max_elements))
+    block = [1] * len(shape)
+    remaining = max_elements
+    for axis in range(len(shape) - 1, -1, -1):
+        size = shape[axis]
+        if size <= remaining:
+            block[axis] = size
+            remaining //= max(size, 1)
+        else:
+            block[axis] = max(1, remaining)
+            break
+    return tuple(block)
+
+
+def block_slices(shape, max_elements=DEFAULT_BLOCK_ELEMENTS):
+    """Yield tuples of slices covering an array of the given shape in blocks of at most max_elements."""
+    block = block_shape(shape, max_elements)
+    starts = [range(0, size, step) for size, step in zip(shape, block)]
+    for origin in itertools.product(*starts):
+        yield tuple(slice(start, min(start + step, size)) for start, step, size in zip(origin, block, shape))
+
+
+def iter_blocks(data_array, max_elements=DEFAULT_BLOCK_ELEMENTS):
+    """
+    Yield (index, values) pairs for an xarray DataArray, where index is a tuple of slices and values the
+    numpy array for that block. Only one block is in memory at a time, whether the array is backed by a
+    lazily indexed file or by dask.
+    """
+    variable = data_array.variable
+    if variable.ndim == 0:
+        count_chunks()
+        yield (), np.asarray(variable.values).reshape(1)
+        return
+    for index in block_slices(variable.shape, max_elements):
+        count_chunks()
+        yield index, np.asarray(variable[index].values)
+
+
+class RunningStats:
+    """Mergeable running count, NaN count, fill count, mean and variance of a stream of values."""
+
+    __slots__ = ("total", "nan_count", "fill_count", "count", "mean", "m2")
+
+    def __init__(self):
+        self.total = 0
+        self.nan_count = 0
+        self.fill_count = 0
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def update(self, values, fill_value=None):
+        """
+        Add a block of values. Returns the valid (non-missing) numeric values of the block as a flat
+        float64 array, or None for non-numeric data.
+        """
+        values = np.asarray(values).ravel()
+        self.total += values.size
+        if fill_value is not None:
+            self.fill_count += int(np.count_nonzero(values == fill_value))
+
+        if values.dtype.kind not in "fiu":
+            import pandas as pd
+            self.nan_count += int(np.count_nonzero(pd.isnull(values)))
+            return None
+
+        if values.dtype.kind == "f":
+            nan_mask = np.isnan(values)
+            nan_count = int(np.count_nonzero(nan_mask))
+            if nan_count:
+                values = values[~nan_mask]
+            self.nan_count += nan_count
+
+        valid = values.astype(np.float64, copy=False)
+        if valid.size:
+            block_mean = float(valid.mean())
+            block_m2 = float(np.square(valid - block_mean).sum())
+            self._merge_moments(valid.size, block_mean, block_m2)
+        return valid
+
+    def merge(self, other):
+        """Merge the statistics of another RunningStats into this one."""
+        self.total += other.total
+        self.nan_count += other.nan_count
+        self.fill_count += other.fill_count
+        if other.count:
+            self._merge_moments(other.count, other.mean, other.m2)
+        return self
+
+    def _merge_moments(self, count, mean, m2):
+        # Chan et al. pairwise update of count, mean and sum of squared deviations.
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta * delta * self.count * count / total
+        self.count = total
+
+    @property
+    def variance(self):
+        """Population variance (ddof=0, as numpy.std), or NaN when there are no valid values."""
+        return self.m2 / self.count if self.count else math.nan
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance) if self.count else math.nan
+
+
+def compute_variable_stats(data_array, thresholds=(3,), fill_value=None, block_elements=DEFAULT_BLOCK_ELEMENTS,
+                           completeness=None):
+    """
+    Compute missing value, fill value, moment and Z-score outlier statistics for one variable in at most
+    two passes over its blocks.
+
+    Parameters:
+    - data_array (xarray.DataArray): The variable to analyse; may be lazily loaded or dask-backed.
+    - thresholds (iterable of float): Z-score thresholds to count outliers for. If empty, only one pass is made.
+    - fill_value: Value counted as filled, e.g. the variable's _FillValue attribute.
+    - block_elements (int): Maximum number of values read into memory at once.
+    - completeness: A completeness.CompletenessAccumulator to update in the first pass, if given.
+
+    Returns:
+    - dict: Counts, mean, std and a {threshold: count} mapping of outliers (values with |z| > threshold).
+    """
+    stats = RunningStats()
+    numeric = data_array.dtype.kind in "fiu"
+    for index, values in iter_blocks(data_array, block_elements):
+        stats.update(values, fill_value)
+        if completeness is not None:
+            completeness.update(index, values, fill_value)
+
+    outlier_counts = {threshold: 0 for threshold in thresholds}
+    if outlier_counts and numeric and stats.count:
+        limits = [(threshold, threshold * stats.std) for threshold in outlier_counts]
+        for _, values in iter_blocks(data_array, block_elements):
+            values = np.asarray(values, dtype=np.float64).ravel()
+            deviation = np.abs(values - stats.mean)  # NaNs never compare as outliers
+            for threshold, limit in limits:
+                outlier_counts[threshold] += int(np.count_nonzero(deviation > limit))
+
+    return {
+        "variable_name": data_array.name,
+        "total_values": stats.total,
+        "valid_count": stats.count,
+        "missing_values_count": stats.nan_count,
+        "fill_value": fill_value,
+        "filled_values_count": stats.fill_count,
+        "mean": stats.mean if stats.count else math.nan,
+        "std": stats.std,
+        "outlier_counts": outlier_counts if numeric else {},
+    }
+
+
+def compute_dataset_stats(dataset, thresholds=(3,), block_elements=DEFAULT_BLOCK_ELEMENTS, completeness=None):
+    """
+    Run compute_variable_stats over every data variable of a dataset, skipping bounds variables.
+    The fill value of each variable is taken from its _FillValue attribute, if present. completeness may
+    be a dict of variable name to CompletenessAccumulator (see completeness.accumulators_for) to fill in
+    the same pass.
+
+    Returns:
+    - list: A list of statistics dictionaries, one per variable.
+    """
+    results = []
+    for record in dataset_profile(dataset).statistics_variables():
+        accumulator = completeness.get(record.name) if completeness is not None else None
+        results.append(compute_variable_stats(dataset[record.name], thresholds, record.fill_value, block_elements,
+                                              accumulator))
+    return results
@@ -0,0 +1,263 @@
+# (C) British Crown Copyright 2017-2025, Met Office.
+# Please see LICENSE.md for license details.
+
+"""
+Vectorised analysis of time axes.
+
+Timestamps are handled as int64 nanoseconds since 1970-01-01 in the axis's own calendar, so 10-minute
+satellite scans keep their precision and 360-day or noleap model calendars need no conversion to the real
+calendar. Raw CF time values ("<unit> since <date>") are converted with one multiplication, without
+creating a datetime object per timestamp; only the reference date and the few reported timestamps go
+through cftime.
+
+The analyser finds the dominant step and reports every irregularity as a range: gaps, duplicated
+timestamps, reversals (steps backwards) and irregular steps. Monthly, seasonal and yearly axes in calendars
+with months of different lengths (28 to 31 days) are analysed in calendar months, so they are not flagged
+as irregular.
+"""
+
+import re
+
+import numpy as np
+
+STANDARD_CALENDARS = {'standard', 'gregorian', 'proleptic_gregorian'}
+
+NS_PER_UNIT = {
+    'nanoseconds': 1, 'microseconds': 10 ** 3, 'milliseconds': 10 ** 6, 'seconds': 10 ** 9,
+    'minutes': 60 * 10 ** 9, 'hours': 3600 * 10 ** 9, 'days': 86400 * 10 ** 9,
+}
+UNIT_ALIASES = {
+    'nanosecond': 'nanoseconds', 'ns': 'nanoseconds', 'microsecond': 'microseconds', 'us': 'microseconds',
+    'millisecond': 'milliseconds', 'ms': 'milliseconds', 'second': 'seconds', 'sec': 'seconds', 'secs': 'seconds',
+    's': 'seconds', 'minute': 'minutes', 'min': 'minutes', 'mins': 'minutes', 'hour': 'hours', 'hr': 'hours',
+    'hrs': 'hours', 'h': 'hours', 'day': 'days', 'd': 'days',
+}
+NS_PER_HOUR = NS_PER_UNIT['hours']
+NS_PER_DAY = NS_PER_UNIT['days']
+
+# Cumulative days before each month in the fixed-length-year calendars
+MONTH_STARTS = {
+    365: np.cumsum([0, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30]),
+    366: np.cumsum([0, 31, 29, 31, 30, 31, 30, 31, 31, 30, 31, 30]),
+}
+YEAR_DAYS = {'noleap': 365, '365_day': 365, 'all_leap': 366, '366_day': 366}
+
+# A dominant step at least this long may be a calendar month (or a multiple of months)
+MIN_MONTH_NS = 28 * NS_PER_DAY
+
+# Ranges listed per kind of irregularity; the counts always cover all of them
+DEFAULT_MAX_RANGES = 1000
+
+
+def parse_time_units(units):
+    """Split CF time units such as 'hours since 1900-01-01 00:00' into (nanoseconds per unit, reference date)."""
+    match = re.match(r'\s*(\w+)\s+since\s+(.+)', units or '')
+    if match is None:
+        raise ValueError(f"Not CF time units: {units!r}")
+    unit = match.group(1).lower()
+    unit = UNIT_ALIASES.get(unit, unit)
+    if unit not in NS_PER_UNIT:
+        raise ValueError(f"Unsupported time unit {match.group(1)!r}; months and years have no fixed length")
+    return NS_PER_UNIT[unit], match.group(2).strip()
+
+
+def reference_offset_ns(reference, calendar=None):
+    """Nanoseconds from 1970-01-01 to a reference date, counted in the given calendar."""
+    if calendar is None or calendar in STANDARD_CALENDARS:
+        try:
+            return int(np.datetime64(reference.replace(' ', 'T').rstrip('Z').split('+')[0], 'ns').astype(np.int64))
+        except ValueError:
+            pass
+    import cftime
+    date = cftime.num2date(0, f"days since {reference}", calendar or 'standard', only_use_cftime_datetimes=True)
+    return int(round(cftime.date2num(date, 'microseconds since 1970-01-01', calendar or 'standard'))) * 1000
+
+
+def raw_times_to_int64(values, units, calendar=None):
+    """
+    Convert raw CF time values (as stored, before decoding) to int64 nanoseconds since 1970-01-01 in their
+    calendar, e.g. for values read with decode_times=False.
+    """
+    scale, reference = parse_time_units(units)
+    values = np.asarray(values)
+    if values.dtype.kind in 'iu':
+        offsets = values.astype(np.int64) * scale
+    else:
+        offsets = np.round(values.astype(np.float64) * scale).astype(np.int64)
+    return offsets + reference_offset_ns(reference, calendar)
+
+
+def times_to_int64(time):
+    """
+    Convert a decoded time coordinate to int64 nanoseconds since 1970-01-01.
+
+    Standard calendars decode to datetime64 and are viewed as int64 directly; non-standard calendars
+    (360_day, noleap, ...) decode to cftime objects, which are converted through CFTimeIndex.asi8
+    (microseconds in the file's calendar). Prefer raw_times_to_int64 on undecoded values for those.
+    """
+    values = np.asarray(time.values if hasattr(time, 'values') else time)
+    if np.issubdtype(values.dtype, np.datetime64):
+        return values.astype('datetime64[ns]').view(np.int64)
+    import xarray as xr
+    index = xr.CFTimeIndex(values.ravel())
+    return np.asarray(index.asi8, dtype=np.int64).reshape(values.shape) * 1000
+
+
+def time_formatter(calendar=None):
+    """Return a function formatting int64 ns timestamps as ISO strings in the given calendar."""
+    if calendar is None or calendar in STANDARD_CALENDARS:
+        return lambda value: str(np.datetime_as_string(np.int64(value).astype('datetime64[ns]')))
+    import cftime
+    return lambda value: cftime.num2date(int(value) // 1000, 'microseconds since 1970-01-01', calendar).isoformat()
+
+
+def format_step(step, unit='ns'):
+    """Format a step: whole seconds as e.g. '600 seconds', calendar months as e.g. '1 months'."""
+    if unit == 'months':
+        return f"{int(step)} months"
+    return str(np.timedelta64(int(step), 'ns').astype('timedelta64[s]')) if step % 10 ** 9 == 0 else f"{int(step)} nanoseconds"
+
+
+def runs(positions):
+    """Group a sorted array of integer positions into (first, last) runs of consecutive values."""
+    if positions.size == 0:
+        return []
+    breaks = np.flatnonzero(np.diff(positions) != 1)
+    starts = np.concatenate(([0], breaks + 1))
+    ends = np.concatenate((breaks, [positions.size - 1]))
+    return list(zip(positions[starts], positions[ends]))
+
+
+def month_index(times, calendar=None):
+    """
+    Months since 1970-01 of each int64 ns timestamp in its calendar, or None for calendars without a
+    vectorised month computation (julian and other cftime-only calendars).
+    """
+    if calendar is None or calendar in STANDARD_CALENDARS:
+        return times.astype('datetime64[ns]').astype('datetime64[M]').astype(np.int64)
+    days = np.floor_divide(times, NS_PER_DAY)
+    if calendar == '360_day':
+        return np.floor_divide(days, 30)
+    if calendar in YEAR_DAYS:
+        year_days = YEAR_DAYS[calendar]
+        years, day_of_year = np.divmod(days, year_days)
+        return years * 12 + np.searchsorted(MONTH_STARTS[year_days], day_of_year, side='right') - 1
+    return None
+
+
+def _dominant(steps):
+    values, counts = np.unique(steps, return_counts=True)
+    return int(values[np.argmax(counts)])
+
+
+def _missing_steps(gap_steps, step):
+    whole = gap_steps[gap_steps % step == 0]
+    return int((whole // step - 1).sum())
+
+
+def _duplicate_runs(times, positions, step, unit, calendar):
+    """
+    Group duplicated timestamps into (first, last, count) ranges of distinct values, merging duplicated
+    values that are one step apart (e.g. a whole file included twice gives one range).
+    """
+    if positions.size == 0:
+        return []
+    values = np.unique(times[positions])
+    if step is None:
+        breaks = np.arange(values.size - 1)
+    else:
+        spacing = np.diff(month_index(values, calendar)) if unit == 'months' else np.diff(values)
+        breaks = np.flatnonzero(spacing != step)
+    starts = np.concatenate(([0], breaks + 1))
+    ends = np.concatenate((breaks, [values.size - 1]))
+    return [(values[first], values[last], last - first + 1) for first, last in zip(starts, ends)]
+
+
+def analyse_time_axis(times, calendar=None, max_ranges=DEFAULT_MAX_RANGES):
+    """
+    Analyse the regularity of a time axis in its stored order.
+
+    Parameters:
+    - times (numpy.ndarray): int64 nanoseconds since 1970-01-01 in the axis's calendar
+      (see raw_times_to_int64 and times_to_int64).
+    - calendar (str): The CF calendar, used for calendar months and to format dates.
+    - max_ranges (int): Most ranges listed for each kind of irregularity.
+
+    Returns:
+    - dict: The number of steps, start and end, the dominant step (formatted, in nanoseconds and its unit:
+      'ns', or 'months' for month-based axes), whether the axis is regular, and the gaps, duplicates,
+      reversals and irregular steps as ranges, each with its total count.
+    """
+    times = np.asarray(times, dtype=np.int64).ravel()
+    report = {'time_steps': int(times.size), 'calendar': calendar}
+    if times.size == 0:
+        return report
+    _format_time = time_formatter(calendar)
+    report.update(start=_format_time(times.min()), end=_format_time(times.max()))
+
+    diffs = np.diff(times)
+    forward = diffs > 0
+    steps, unit = diffs, 'ns'
+    step = _dominant(diffs[forward]) if forward.any() else None
+
+    # Months of 28 to 31 days: count steps in calendar months if that makes more of them regular
+    if step is not None and step >= MIN_MONTH_NS:
+        months = month_index(times, calendar)
+        if months is not None:
+            month_steps = np.diff(months)
+            positive = forward & (month_steps > 0)
+            month_step = _dominant(month_steps[positive]) if positive.any() else 0
+            if month_step > 0 and np.count_nonzero(forward & (month_steps == month_step)) > \
+                    np.count_nonzero(diffs == step):
+                steps, unit, step = month_steps, 'months', month_step
+
+    gaps = np.flatnonzero(forward & (steps > step)) if step is not None else np.array([], dtype=np.int64)
+    irregular = (np.flatnonzero(forward & ((steps < step) | (steps % step != 0)))
+                 if step is not None else np.array([], dtype=np.int64))
+    duplicates = _duplicate_runs(times, np.flatnonzero(diffs == 0), step, unit, calendar)
+    reversals = runs(np.flatnonzero(diffs < 0))
+    irregular_runs = runs(irregular)
+
+    if step is not None:
+        regular_ns = diffs[forward & (steps == step)]
+        report['dominant_step'] = format_step(step, unit)
+        report['dominant_step_unit'] = unit
+        # The typical length of a step; calendar months vary, so their mean length is given
+        report['dominant_step_ns'] = int(step) if unit == 'ns' else int(round(regular_ns.mean()))
+    else:
+        report.update(dominant_step=None, dominant_step_unit=None, dominant_step_ns=None)
+
+    report.update({
+        'regular': not (gaps.size or duplicates or reversals or irregular_runs),
+        'num_gaps': int(gaps.size),
+        'missing_steps': _missing_steps(steps[gaps], step),
+        'gaps': [{'after': _format_time(times[i]), 'before': _format_time(times[i + 1]),
+                  'missing_steps': int(steps[i] // step) - 1 if steps[i] % step == 0 else None}
+                 for i in gaps[:max_ranges]],
+        'num_duplicates': len(duplicates),
+        'duplicates': [{'start': _format_time(first), 'end': _format_time(last), 'timestamps': int(count)}
+                       for first, last, count in duplicates[:max_ranges]],
+        'num_reversals': len(reversals),
+        'reversals': [{'start': _format_time(times[first]), 'end': _format_time(times[last + 1]),
+                       'steps': int(last - first + 1)} for first, last in reversals[:max_ranges]],
+        'num_irregular_steps': len(irregular_runs),
+        'irregular_steps': [{'start': _format_time(times[first]), 'end': _format_time(times[last + 1]),
+                             'steps': int(last - first + 1)} for first, last in irregular_runs[:max_ranges]],
+    })
+    return report
+
+
+def analyse_time_coordinate(time, max_ranges=DEFAULT_MAX_RANGES):
+    """
+    Analyse a time coordinate (xarray.DataArray) in its stored order, in its own calendar. A coordinate that
+    was not decoded (e.g. opened with decode_times=False) is converted from its CF units attribute; a
+    ValueError is raised if it has none.
+    """
+    if time.dtype.kind in 'iuf':
+        calendar = time.attrs.get('calendar')
+        return analyse_time_axis(raw_times_to_int64(time.values, time.attrs.get('units'), calendar), calendar,
+                                 max_ranges)
+    calendar = time.encoding.get('calendar')
+    if calendar is None and not np.issubdtype(time.dtype, np.datetime64):
+        calendar = time.dt.calendar
+    return analyse_time_axis(times_to_int64(time), calendar, max_ranges)
@@ -1,8 +1,28 @@
 # (C) British Crown Copyright 2017-2025, Met Office.
 # Please see LICENSE.md for license details.
 
+import os
+import copy
 import json
-import numpy as np
+import atexit
+import tempfile
+import weakref
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# Only numpy-based modules are imported here, so the checklist helpers load without xarray or pandas;
+# the completeness, sampling and volume checks are imported when they are used.
+from aidatareadiness.metadata import dataset_profile
+from aidatareadiness.profiling import profiled
+from aidatareadiness.sketch import (
+    DEFAULT_HISTOGRAM_BINS, DEFAULT_IQR_FACTOR, DEFAULT_MAD_THRESHOLD, compute_dataset_robust_stats,
+)
+from aidatareadiness.stats import DEFAULT_BLOCK_ELEMENTS, block_elements_for_memory, compute_dataset_stats
 
 
 CHECKLIST_FILENAME = "Data_Readiness_Checklist.json"
@@ -12,26 +32,9 @@ PLACEHOLDER = 'Click to select option'
 
 # helper functions for loading / saving checklist data     
 
-def load_checklist():
-    """
-    Load the checklist from a JSON file.
-
-    Returns:
-        dict: The contents of the checklist file as a dictionary.
-    """
-    with open(CHECKLIST_FILENAME, "r") as file:
-        return json.load(file)
-
-def save_checklist(checklist):
-    """
-    Save the checklist to a JSON file.The JSON
-    data is pretty-printed with an indentation of 4 spaces.
+# Seconds to wait after an update before writing, so a burst of button clicks causes one write
+CHECKLIST_WRITE_DELAY = 1.0
 
-    Args:
-        checklist (dict): The checklist data to be saved.
-    """
-    with open(CHECKLIST_FILENAME, "w") as file:
-        json.dump(checklist, file, indent=4)
 
 def update_values(checklist, updates):
     """
@@ -54,28 +57,174 @@ def update_values(checklist, updates):
         else: 
             checklist[section] = section_updates
     return checklist
+
+
+class ChecklistStore:
+    """
+    A checklist JSON file kept in memory, with its updates batched into debounced, atomic writes.
+
+    Updates are applied to the in-memory copy straight away and written after write_delay seconds without
+    further updates (and at interpreter exit, for every store still alive). A write takes a lock on the file, re-reads it, applies only
+    the pending section updates and replaces the file with a temporary copy, so notebooks editing different
+    sections of the same checklist do not overwrite each other's answers.
+    """
+
+    def __init__(self, path=CHECKLIST_FILENAME, write_delay=CHECKLIST_WRITE_DELAY):
+        self.path = os.path.abspath(path)
+        self.write_delay = write_delay
+        self._checklist = None
+        self._mtime = None
+        self._pending = {}
+        self._timer = None
+        self._lock = threading.RLock()
+        _live_stores.add(self)
+
+    @contextmanager
+    def _file_lock(self):
+        # Advisory lock shared by every process writing this checklist; not available on Windows
+        with open(self.path + '.lock', 'w') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _read(self):
+        with open(self.path, "r") as file:
+            checklist = json.load(file)
+        self._mtime = os.stat(self.path).st_mtime_ns
+        return checklist
+
+    def _write(self, checklist):
+        directory, name = os.path.split(self.path)
+        fd, temp_path = tempfile.mkstemp(prefix=f".{name}.", suffix='.tmp', dir=directory)
+        try:
+            with os.fdopen(fd, "w") as file:
+                json.dump(checklist, file, indent=4)
+            os.replace(temp_path, self.path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+        self._mtime = os.stat(self.path).st_mtime_ns
+
+    def load(self):
+        """
+        Return a copy of the checklist, re-reading the file only if another process has changed it. Changes
+        to the copy are not saved; pass them to update or save.
+        """
+        with self._lock:
+            return copy.deepcopy(self._load())
+
+    def _load(self):
+        # The live in-memory checklist
+        with self._lock:
+            try:
+                mtime = os.stat(self.path).st_mtime_ns
+            except FileNotFoundError:
+                mtime = None
+            if self._checklist is None or mtime != self._mtime:
+                # Keep this process's unsaved answers on top of the other process's changes
+                self._checklist = update_values(self._read(), copy.deepcopy(self._pending))
+            return self._checklist
+
+    def update(self, updates):
+        """Apply section updates in memory and schedule a write."""
+        with self._lock:
+            update_values(self._load(), copy.deepcopy(updates))
+            update_values(self._pending, copy.deepcopy(updates))
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(self.write_delay, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self):
+        """Write any pending updates now, merged into the current contents of the file."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._pending:
+                return
+            with self._file_lock():
+                checklist = update_values(self._read(), self._pending)
+                self._write(checklist)
+            self._pending = {}
+            self._checklist = checklist
+
+    def save(self, checklist):
+        """Replace the whole checklist now, discarding any pending updates."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            with self._file_lock():
+                self._write(checklist)
+            self._pending = {}
+            self._checklist = copy.deepcopy(checklist)
+
+
+# Every store, flushed once at interpreter exit; weak, so stores that are no longer used can be freed
+# (a store with pending updates is kept alive by its write timer)
+_live_stores = weakref.WeakSet()
+
+
+@atexit.register
+def _flush_live_stores():
+    for store in list(_live_stores):
+        store.flush()
+
+
+_stores = {}
+
+
+def checklist_store(path=CHECKLIST_FILENAME):
+    """Return the shared ChecklistStore of a checklist file, creating it on first use."""
+    path = os.path.abspath(path)
+    if path not in _stores:
+        _stores[path] = ChecklistStore(path)
+    return _stores[path]
+
+
+def load_checklist():
+    """
+    Load the checklist from a JSON file.
+
+    Returns:
+        dict: The contents of the checklist file as a dictionary.
+    """
+    return checklist_store().load()
+
+def save_checklist(checklist):
+    """
+    Save the checklist to a JSON file.The JSON
+    data is pretty-printed with an indentation of 4 spaces.
+
+    Args:
+        checklist (dict): The checklist data to be saved.
+    """
+    checklist_store().save(checklist)
     
 def update_checklist(b, updates):
     """
     Update the checklist with the provided updates and save it.
-    This function loads the current checklist from a JSON file, applies the provided updates,
-    and then saves the updated checklist back to the JSON file.
+    The updates are applied to the in-memory checklist at once and written to the JSON file
+    shortly afterwards, together with any other updates made in the meantime.
 
     Args:
         b: The button widget. 
         updates (dict): A dictionary containing the updates to be applied to the checklist.
     """
-    checklist = load_checklist() # Open json file
-    checklist = update_values(checklist, updates) # update the values in the Jupyter checklist
-    save_checklist(checklist) # Save the updated checklist to JSON fil
+    checklist_store().update(updates)
 
 
 def reset_checklist():
     with open('Data_Readiness_Checklist_blank.json', 'r') as blank_file:
         data = json.load(blank_file)
 
-    with open('Data_Readiness_Checklist.json', 'w') as user_file:
-        json.dump(data, user_file, indent=4)
+    checklist_store().save(data)
 
 
 
@@ -87,8 +236,9 @@ def reset_checklist():
 def find_general_info(dataset):
     try:
         # Read the information from the dataset. 
-        title = dataset.attrs["title"]
-        version = dataset.attrs["version"]
+        attrs = dataset_profile(dataset).attrs
+        title = attrs["title"]
+        version = attrs["version"]
 
     except KeyError:
         print("Dict key not found")
@@ -113,22 +263,13 @@ def find_unit_data(dataset):
     # Store variable data
     variable_data = []
     
-    for var_name in dataset.variables:
-        variable = dataset.variables[var_name]  # Access the variable
-
+    for record in dataset_profile(dataset).variables.values():
         # Add the variable's information to the list
-        if 'units' in dataset[var_name].attrs:
-            variable_data.append({
-                "variable": var_name,
-                "datatype": str(dataset[var_name].dtype),
-                    "unit": dataset[var_name].units
-            })
-        else:
-            variable_data.append({
-                "variable": var_name,
-                "datatype": str(dataset[var_name].dtype),
-                    "unit": "Unknown"
-            })
+        variable_data.append({
+            "variable": record.name,
+            "datatype": str(record.dtype),
+            "unit": record.units if record.units is not None else "Unknown"
+        })
             
     return variable_data
 
@@ -145,13 +286,31 @@ def find_total_data_volume(dataset):
     return total_size_mb
 
 
+def find_storage_volume(dataset, file_path=None):
+    """
+    Compare the stored size of a dataset on disk with its decoded size in memory (find_total_data_volume),
+    per variable and in total, using only file metadata: encodings, chunk indexes and file sizes.
+
+    Parameters:
+    - dataset (xarray.Dataset): The dataset, opened lazily.
+    - file_path (str): The file or Zarr store it was opened from, if not recorded in its encoding.
+
+    Returns:
+    - dict: Stored and decoded bytes and the compression ratio of the file and of each variable
+      (see volume.dataset_volume).
+    """
+    from aidatareadiness.volume import dataset_volume
+    return dataset_volume(dataset, file_path)
+
+
 def find_dimensions(dataset):
 
     # Create a dict to store information
     dimensions_info = {}
+    sizes = dataset_profile(dataset).sizes
 
     # Number of dimensions
-    dimensions_info["num_dimensions"] = len(dataset.sizes)
+    dimensions_info["num_dimensions"] = len(sizes)
 
     # Create a dict to store the details of each dimension.
     dimensions_info["dimensions"] = {}
@@ -160,7 +319,7 @@ def find_dimensions(dataset):
     total_datapoints = 1
 
     # Inspect all dimensions
-    for dim_name, dim_size in dataset.sizes.items():
+    for dim_name, dim_size in sizes.items():
         # Add the dimension name and size to the dict.
         dimensions_info["dimensions"][dim_name] = dim_size
 
@@ -177,126 +336,175 @@ def find_dimensions(dataset):
 def dimension_and_variable_names(dataset):
     
     # Store dims and variable data
-    dimension_names = []
+    profile = dataset_profile(dataset)
+    dimension_names = list(profile.sizes)
     variable_names = []
     
-    # Print dimensions (names and sizes)
-    for dim_name, dim in dataset.dims.items():
-        dimension_names.append(dim_name)
-    
     # Print variables (short and long names)
-    for var_name, var in dataset.variables.items():
-        variable = dataset.variables[var_name]
-    
-        if 'long_name' in dataset[var_name].attrs:
-            variable_names.append({
-                "variable" : var_name,
-                "long_name" : dataset[var_name].long_name
-            })
-    
-        else: 
-            variable_names.append({
-                "variable" : var_name,
-                "long_name" : "N/A"
-            })
+    for record in profile.variables.values():
+        variable_names.append({
+            "variable" : record.name,
+            "long_name" : record.long_name if record.long_name is not None else "N/A"
+        })
             
     return dimension_names, variable_names
 
 
-def find_missing_values(dataset):
+@profiled('missing_values')
+def find_missing_values(dataset, block_elements=DEFAULT_BLOCK_ELEMENTS, max_memory=None, completeness=None):
+    """
+    Count missing (NaN) and filled (_FillValue) values for every data variable, excluding variables with
+    "bnd" or "bound" in their names. Each variable is read once, in blocks of at most block_elements values.
+    If max_memory (bytes) is given, the block size is chosen to fit in it instead. Accumulators passed in
+    completeness (see completeness.accumulators_for) are filled in the same pass.
+
+    Returns:
+    - list: A list of dictionaries with statistics for each variable.
+    """
     # Create a list to store results
     variable_stats = []
     
-    # Iterate through all variables
-    for var_name, data_array in dataset.data_vars.items():
-        # Exclude variables with "bnd" or "bound" in their names
-        if "bnd" in var_name.lower() or "bound" in var_name.lower():
-            continue
-    
-        # Total number of values in the variable
-        total_values = data_array.size
-    
-        # Null values (NaN) statistics
-        missing_values_count = data_array.isnull().sum().item()
-        percentage_missing = (missing_values_count / total_values) * 100
-    
-        # _FillValue statistics
-        fill_value = data_array.attrs.get('_FillValue', None)
-        if fill_value is not None:
-            filled_values_count = (data_array == fill_value).sum().item()
-            percentage_filled = (filled_values_count / total_values) * 100
-        else:
-            filled_values_count = 0
-            percentage_filled = 0.0
+    if max_memory is not None:
+        block_elements = block_elements_for_memory(max_memory)
+    for stats in compute_dataset_stats(dataset, thresholds=(), block_elements=block_elements,
+                                       completeness=completeness):
+        total_values = stats["total_values"]
+        fill_value = stats["fill_value"]
+        missing_values_count = stats["missing_values_count"]
+        filled_values_count = stats["filled_values_count"]
     
         # Create a dictionary with statistics for the current variable
-        stats = {
-            "variable_name": var_name,
+        variable_stats.append({
+            "variable_name": stats["variable_name"],
             "missing_values_count": missing_values_count,
-            "percentage_missing": percentage_missing,
+            "percentage_missing": (missing_values_count / total_values) * 100 if total_values else 0.0,
             "has_fill_value": fill_value is not None,
             "fill_value": fill_value,
             "filled_values_count": filled_values_count,
-            "percentage_filled": percentage_filled,
-        }
-    
-        # Add the stats dictionary to the results list
-        variable_stats.append(stats)
+            "percentage_filled": (filled_values_count / total_values) * 100 if total_values else 0.0,
+        })
 
-        return variable_stats
+    return variable_stats
 
 
 
-def count_z_score_outliers_for_dataset(dataset, threshold=3):
+@profiled('z_score_outliers')
+def count_z_score_outliers_for_dataset(dataset, threshold=3, block_elements=DEFAULT_BLOCK_ELEMENTS, max_memory=None):
     """
     Count Z-score outliers for each variable in a dataset, excluding variables with "bnd" or "bound" in their names.
 
     Parameters:
     - dataset (xarray.Dataset): The dataset to analyze.
     - threshold (float): The Z-score threshold for identifying outliers.
+    - block_elements (int): Maximum number of values read into memory at once.
+    - max_memory (int): Memory budget in bytes; if given, the block size is chosen to fit in it instead.
 
     Returns:
     - list: A list of dictionaries with statistics for each variable.
     """
     results = []
+    if max_memory is not None:
+        block_elements = block_elements_for_memory(max_memory)
     
-    # Loop through variables in the dataset
-    for var_name, data_array in dataset.data_vars.items():
-        # Skip variables with "bnd" or "bound" in their names
-        if "bnd" in var_name.lower() or "bound" in var_name.lower():
-            continue
-        
-        # Flatten the data and remove NaN values
-        data_flat = data_array.values.flatten()
-        data_clean = data_flat[~np.isnan(data_flat)]
+    for stats in compute_dataset_stats(dataset, thresholds=(threshold,), block_elements=block_elements):
+        total_values = stats["valid_count"]
         
-        if len(data_clean) == 0:
-            # Skip variables with no valid data
+        if total_values == 0 or not stats["outlier_counts"]:
+            # Skip variables with no valid (numeric) data
             continue
         
-        # Calculate mean and standard deviation
-        mean = np.mean(data_clean)
-        std_dev = np.std(data_clean)
-        
-        # Compute Z-scores
-        z_scores = (data_clean - mean) / std_dev
-        
-        # Identify outliers
-        outliers = np.abs(z_scores) > threshold
-        num_outliers = np.sum(outliers)
-        total_values = len(data_clean)
-        percentage_outliers = (num_outliers / total_values) * 100
+        num_outliers = stats["outlier_counts"][threshold]
         
         # Add statistics to the results
         results.append({
-            "variable_name": var_name,
+            "variable_name": stats["variable_name"],
             "total_values": total_values,
             "num_outliers": num_outliers,
-            "percentage_outliers": percentage_outliers,
+            "percentage_outliers": (num_outliers / total_values) * 100,
         })
     
     return results
 
-  
 
+@profiled('quality_stats')
+def find_quality_stats(dataset, thresholds=(2, 3), block_elements=DEFAULT_BLOCK_ELEMENTS, max_memory=None,
+                       completeness=None):
+    """
+    Compute missing value, fill value and Z-score outlier statistics for every data variable together,
+    in at most two passes over each variable, rather than calling find_missing_values and
+    count_z_score_outliers_for_dataset separately. If max_memory (bytes) is given, the block size is
+    chosen to fit in it. Accumulators passed in completeness are filled in the first pass.
 
+    Returns:
+    - list: A list of dictionaries with statistics for each variable, including percentages.
+    """
+    results = []
+    if max_memory is not None:
+        block_elements = block_elements_for_memory(max_memory)
+    for stats in compute_dataset_stats(dataset, thresholds=thresholds, block_elements=block_elements,
+                                       completeness=completeness):
+        total_values = stats["total_values"]
+        valid_count = stats["valid_count"]
+        stats["percentage_missing"] = (stats["missing_values_count"] / total_values) * 100 if total_values else 0.0
+        stats["percentage_filled"] = (stats["filled_values_count"] / total_values) * 100 if total_values else 0.0
+        stats["percentage_outliers"] = {
+            threshold: (count / valid_count) * 100 if valid_count else 0.0
+            for threshold, count in stats["outlier_counts"].items()
+        }
+        results.append(stats)
+    return results
+
+
+@profiled('estimate_quality_stats')
+def estimate_quality_stats(dataset, fraction=0.01, thresholds=(2, 3), strategy='stratified', confidence=0.95,
+                           seed=None, unit_elements=None, block_elements=DEFAULT_BLOCK_ELEMENTS, max_memory=None,
+                           tiles=False):
+    """
+    Estimate the missing, fill value and Z-score outlier percentages of every data variable from a random
+    or stratified sample of hyperslabs (one field per time step by default, or with tiles square lat/lon
+    tiles of unit_elements values, 128 x 128 by default), for a first look at data too large to read in full. See sampling.estimate_variable_stats.
+
+    Returns:
+    - list: A list of dictionaries with estimated percentages and their confidence intervals for each variable.
+    """
+    from aidatareadiness.sampling import estimate_dataset_stats
+    if max_memory is not None:
+        block_elements = block_elements_for_memory(max_memory)
+    return estimate_dataset_stats(dataset, fraction=fraction, thresholds=thresholds, strategy=strategy,
+                                  confidence=confidence, seed=seed, unit_elements=unit_elements,
+                                  block_elements=block_elements, tiles=tiles)
+
+
+@profiled('robust_outliers')
+def find_robust_outliers(dataset, mad_threshold=DEFAULT_MAD_THRESHOLD, iqr_factor=DEFAULT_IQR_FACTOR,
+                         bins=DEFAULT_HISTOGRAM_BINS, block_elements=DEFAULT_BLOCK_ELEMENTS, max_memory=None):
+    """
+    Count outliers by the median/MAD (modified Z-score above mad_threshold) and IQR (outside
+    Q1 - iqr_factor * IQR and Q3 + iqr_factor * IQR) rules, and build a histogram, for every numeric data
+    variable, excluding variables with "bnd" or "bound" in their names. Unlike Z-scores these are not
+    skewed by heavy-tailed variables such as precipitation. The quantiles come from a streaming sketch,
+    which is returned with each variable so sketches of several files can be merged (see sketch.merge_sketches).
+
+    Returns:
+    - list: A list of dictionaries with the robust statistics for each variable.
+    """
+    if max_memory is not None:
+        block_elements = block_elements_for_memory(max_memory)
+    return compute_dataset_robust_stats(dataset, mad_threshold=mad_threshold, iqr_factor=iqr_factor, bins=bins,
+                                        block_elements=block_elements)
+
+
+@profiled('completeness')
+def find_completeness(dataset, block_elements=DEFAULT_BLOCK_ELEMENTS, max_memory=None):
+    """
+    Compute the fraction of missing (NaN or _FillValue) values of every data variable at each time step
+    and in each grid cell, reading each variable once in blocks, without building a mask of the full cube.
+
+    Returns:
+    - xarray.Dataset: <variable>_missing_fraction_time series and <variable>_missing_fraction_map maps,
+      which can be written with completeness.save_completeness.
+    """
+    from aidatareadiness.completeness import compute_dataset_completeness, completeness_summary
+    if max_memory is not None:
+        block_elements = block_elements_for_memory(max_memory)
+    return completeness_summary(dataset, compute_dataset_completeness(dataset, block_elements))
@@ -0,0 +1,248 @@
+# (C) British Crown Copyright 2017-2025, Met Office.
+# Please see LICENSE.md for license details.
+
+"""
+Stored and decoded volume of gridded datasets, from file metadata only.
+
+For each variable the decoded size (what a full read puts in memory, i.e. its nbytes once unpacked) is
+compared with its stored size on disk. The stored size is taken, in order of preference, from:
+
+- 'measured': the sizes of its chunk files (Zarr) or the storage size recorded in the HDF5 chunk index
+  (NetCDF4/HDF5, if h5py is installed);
+- 'layout': its element count times the stored (possibly packed) item size, for uncompressed variables;
+- 'estimated': a share of the file's remaining bytes in proportion to its stored item size, for
+  compressed variables that cannot be measured, GRIB messages and GeoTIFF bands.
+
+Only headers, encodings, chunk indexes and file sizes are read; data arrays never are.
+"""
+
+import os
+import math
+
+import numpy as np
+import xarray as xr
+
+ZARR_METADATA_FILES = {'zarr.json', '.zarray', '.zattrs', '.zgroup', '.zmetadata'}
+NETCDF3_SIGNATURES = (b'CDF\x01', b'CDF\x02', b'CDF\x05')
+HDF5_SIGNATURE = b'\x89HDF\r\n\x1a\n'
+# Encoding keys that name a compression filter (netCDF4, h5netcdf)
+COMPRESSION_FLAGS = ['zlib', 'szip', 'zstd', 'bzip2', 'blosc']
+
+
+def path_size(path):
+    """Size of a file, or of all files in a directory dataset (e.g. a Zarr store), in bytes; 0 if it is missing."""
+    try:
+        if not os.path.isdir(path):
+            return os.path.getsize(path)
+        return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+    except OSError:
+        return 0
+
+
+def storage_format(path):
+    """Return 'zarr', 'netcdf3' or 'hdf5' from a local path and its signature bytes, or None if unknown."""
+    if path is None:
+        return None
+    if os.path.isdir(path):
+        return 'zarr' if os.path.splitext(path.rstrip(os.sep))[1] == '.zarr' else None
+    try:
+        with open(path, 'rb') as f:
+            signature = f.read(len(HDF5_SIGNATURE))
+    except OSError:
+        return None
+    if signature.startswith(NETCDF3_SIGNATURES):
+        return 'netcdf3'
+    if signature == HDF5_SIGNATURE:
+        return 'hdf5'
+    return None
+
+
+def compression_of(encoding):
+    """Describe the compression of a variable from its encoding, e.g. 'zlib (level 4)'; None if uncompressed."""
+    codecs = encoding.get('compressors') or ([encoding['compressor']] if encoding.get('compressor') else [])
+    if codecs:
+        return ', '.join(getattr(codec, 'codec_id', None) or type(codec).__name__ for codec in codecs)
+    name = encoding.get('compression') or next((flag for flag in COMPRESSION_FLAGS if encoding.get(flag)), None)
+    if name is None:
+        return None
+    level = encoding.get('complevel') or encoding.get('compression_opts')
+    return f"{name} (level {level})" if level else str(name)
+
+
+def chunk_shape_of(variable):
+    """The stored chunk shape of a variable from its encoding, or None if it is stored contiguously."""
+    encoding = variable.encoding
+    chunks = encoding.get('chunksizes') or encoding.get('chunks')
+    if chunks is None and encoding.get('preferred_chunks'):
+        chunks = [encoding['preferred_chunks'].get(dim, size) for dim, size in zip(variable.dims, variable.shape)]
+    return tuple(int(size) for size in chunks) if chunks else None
+
+
+def decoded_dtype(name, variable):
+    """
+    The dtype a variable has once CF-decoded (unpacked, masked, times decoded). Works on raw datasets
+    opened with decode_cf=False and on decoded ones; only decoding times reads values (of the time coordinate).
+    """
+    try:
+        return xr.conventions.decode_cf_variable(name, variable).dtype
+    except Exception:
+        return variable.dtype
+
+
+def _hdf5_storage_sizes(path, names):
+    try:
+        import h5py
+    except ImportError:
+        return {}
+    try:
+        with h5py.File(path, 'r') as f:
+            return {name: int(f[name].id.get_storage_size()) for name in names if name in f}
+    except (OSError, KeyError):
+        return {}
+
+
+def _zarr_storage_sizes(store_path, names):
+    sizes = {}
+    for name in names:
+        directory = os.path.join(store_path, name)
+        if os.path.isdir(directory):
+            sizes[name] = sum(os.path.getsize(os.path.join(root, file)) for root, _, files in os.walk(directory)
+                              for file in files if file not in ZARR_METADATA_FILES)
+    return sizes
+
+
+def _ratio(decoded, stored):
+    return decoded / stored if stored else math.nan
+
+
+def variable_volume(name, variable):
+    """
+    Describe the storage of one variable from its metadata: decoded and stored dtypes, whether it is
+    packed, its compression and chunking, and its decoded bytes and stored bytes before compression.
+    """
+    size = int(np.prod(variable.shape)) if variable.shape else 1
+    stored = np.dtype(variable.encoding.get('dtype', variable.dtype))
+    decoded = decoded_dtype(name, variable)
+    chunk_shape = chunk_shape_of(variable)
+    num_chunks = 1
+    if chunk_shape:
+        num_chunks = int(np.prod([math.ceil(length / step) for length, step in zip(variable.shape, chunk_shape)]))
+    return {
+        'variable_name': name,
+        'dims': list(variable.dims),
+        'shape': list(variable.shape),
+        'decoded_dtype': str(decoded),
+        'stored_dtype': str(stored),
+        'packed': stored != decoded and stored.kind in 'iu' and decoded.kind == 'f',
+        'compression': compression_of(variable.encoding),
+        'chunk_shape': list(chunk_shape) if chunk_shape else None,
+        'num_chunks': num_chunks,
+        'chunk_decoded_bytes': int(np.prod(chunk_shape)) * decoded.itemsize if chunk_shape else size * decoded.itemsize,
+        'decoded_bytes': size * decoded.itemsize,
+        'raw_bytes': size * stored.itemsize,
+    }
+
+
+def dataset_volume(dataset, path=None, file_bytes=None):
+    """
+    Report the stored and decoded volume of every variable of an opened dataset, and of the whole file.
+
+    Parameters:
+    - dataset (xarray.Dataset): The dataset, opened lazily with or without CF decoding.
+    - path (str): The local file or Zarr store it was opened from; by default its 'source' encoding.
+      Without a local path stored sizes can only be estimated.
+    - file_bytes (int): Size of the file or store, if it is not a local path (e.g. from fsspec for a URL).
+
+    Returns:
+    - dict: 'file', 'format', 'file_bytes', 'decoded_bytes', 'stored_bytes', 'compression_ratio'
+      (decoded / stored) and a list of per-variable reports under 'variables', each with its
+      'stored_bytes', 'stored_bytes_source' and 'compression_ratio'.
+    """
+    path = path or dataset.encoding.get('source')
+    local = path is not None and os.path.exists(path)
+    storage = storage_format(path) if local else None
+    if file_bytes is None and local:
+        file_bytes = path_size(path)
+
+    variables = [variable_volume(name, variable) for name, variable in dataset.variables.items()]
+    names = [report['variable_name'] for report in variables]
+    measured = {}
+    if storage == 'zarr':
+        measured = _zarr_storage_sizes(path, names)
+    elif storage == 'hdf5':
+        measured = _hdf5_storage_sizes(path, names)
+
+    for report in variables:
+        name = report['variable_name']
+        if name in measured:
+            report.update(stored_bytes=measured[name], stored_bytes_source='measured')
+        elif storage == 'netcdf3' or (storage == 'hdf5' and report['compression'] is None):
+            report.update(stored_bytes=report['raw_bytes'], stored_bytes_source='layout')
+        else:
+            report.update(stored_bytes=None, stored_bytes_source='estimated')
+
+    # Whatever the known variables do not account for is shared out among the others
+    unknown = [report for report in variables if report['stored_bytes'] is None]
+    if unknown:
+        known = sum(report['stored_bytes'] for report in variables if report['stored_bytes'] is not None)
+        remaining = max(0, (file_bytes or 0) - known)
+        raw_total = sum(report['raw_bytes'] for report in unknown)
+        for report in unknown:
+            report['stored_bytes'] = int(remaining * report['raw_bytes'] / raw_total) if raw_total else 0
+
+    for report in variables:
+        report['compression_ratio'] = _ratio(report['decoded_bytes'], report['stored_bytes'])
+
+    decoded_bytes = sum(report['decoded_bytes'] for report in variables)
+    stored_bytes = sum(report['stored_bytes'] for report in variables)
+    return {
+        'file': path,
+        'format': storage,
+        'file_bytes': file_bytes,
+        'decoded_bytes': decoded_bytes,
+        'stored_bytes': stored_bytes,
+        'compression_ratio': _ratio(decoded_bytes, stored_bytes),
+        'variables': variables,
+    }
+
+
+def merge_volume(totals, report):
+    """
+    Add the volume report of one file to the running totals of a collection (a dict, empty to start with):
+    files, file, decoded and stored bytes and the compression ratio, overall and per variable name.
+    """
+    totals['files'] = totals.get('files', 0) + 1
+    for key in ('file_bytes', 'decoded_bytes', 'stored_bytes'):
+        totals[key] = totals.get(key, 0) + (report.get(key) or 0)
+    totals['compression_ratio'] = _ratio(totals['decoded_bytes'], totals['stored_bytes'])
+
+    per_variable = totals.setdefault('variables', {})
+    for variable in report['variables']:
+        entry = per_variable.setdefault(variable['variable_name'], {'files': 0, 'decoded_bytes': 0, 'stored_bytes': 0})
+        entry['files'] += 1
+        entry['decoded_bytes'] += variable['decoded_bytes']
+        entry['stored_bytes'] += variable['stored_bytes']
+        entry['compression_ratio'] = _ratio(entry['decoded_bytes'], entry['stored_bytes'])
+    return totals
+
+
+def collection_volume(reports):
+    """Combine the volume reports of many files into totals for the collection (see merge_volume)."""
+    totals = {}
+    for report in reports:
+        merge_volume(totals, report)
+    return totals
+
+
+def format_volume_summary(totals):
+    """Format collection volume totals as log lines, largest variables first."""
+    if not totals:
+        return "Volume: no files"
+    lines = [f"Volume: {totals['files']} files, {totals['file_bytes'] / 1024 ** 2:.1f} MB on disk, "
+             f"{totals['stored_bytes'] / 1024 ** 2:.1f} MB stored data, {totals['decoded_bytes'] / 1024 ** 2:.1f} MB "
+             f"decoded (compression ratio {totals['compression_ratio']:.2f})"]
+    ordered = sorted(totals['variables'].items(), key=lambda item: item[1]['decoded_bytes'], reverse=True)
+    for name, entry in ordered:
+        lines.append(f"  {name:<24} stored {entry['stored_bytes'] / 1024 ** 2:10.1f} MB  decoded "
+                     f"{entry['decoded_bytes'] / 1024 ** 2:10.1f} MB  ratio {entry['compression_ratio']:6.2f}")
+    return "\n".join(lines)
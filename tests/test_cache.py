@@ -0,0 +1,110 @@
+# (C) British Crown Copyright 2017-2025, Met Office.
+# Please see LICENSE.md for license details.
+
+"""Tests of the SQLite result cache: hits for unchanged files and misses for any change."""
+
+import os
+
+import numpy as np
+import pytest
+import xarray as xr
+
+from aidatareadiness.checklist_auto.cache import ResultCache, file_identity
+from aidatareadiness.checklist_auto.gridded import check_set_key
+
+RESULT = {'file': 'data.nc', 'spatial_consistency': True, 'temporal_resolution': 1.0}
+
+
+@pytest.fixture
+def data_file(tmp_path):
+    path = tmp_path / 'data.nc'
+    path.write_bytes(b'0123456789')
+    return str(path)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    with ResultCache(str(tmp_path / 'cache.db'), check_set='full') as cache:
+        yield cache
+
+
+def set_mtime(path, mtime_ns):
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_unchanged_file_is_a_hit(cache, data_file):
+    cache.store(data_file, RESULT)
+    assert cache.lookup(data_file) == RESULT
+    assert (cache.hits, cache.misses) == (1, 0)
+
+
+def test_missing_entry_and_missing_file_are_misses(cache, data_file, tmp_path):
+    assert cache.lookup(data_file) is None
+    assert cache.lookup(str(tmp_path / 'absent.nc')) is None
+    assert cache.misses == 2
+
+
+def test_mtime_change_invalidates(cache, data_file):
+    cache.store(data_file, RESULT)
+    set_mtime(data_file, os.stat(data_file).st_mtime_ns + 10 ** 9)
+    assert cache.lookup(data_file) is None
+
+
+def test_size_change_invalidates(cache, data_file):
+    mtime_ns = os.stat(data_file).st_mtime_ns
+    cache.store(data_file, RESULT)
+    with open(data_file, 'ab') as f:
+        f.write(b'more')
+    set_mtime(data_file, mtime_ns)
+    assert cache.lookup(data_file) is None
+
+
+def test_check_set_change_invalidates(tmp_path, data_file):
+    path = str(tmp_path / 'cache.db')
+    with ResultCache(path, check_set=check_set_key(quality_stats=True)) as cache:
+        cache.store(data_file, RESULT)
+    for options in [{}, {'quality_stats': True, 'sample': 0.1}, {'quality_stats': True, 'robust_stats': True},
+                    {'quality_stats': True, 'completeness_dir': str(tmp_path / 'completeness')}]:
+        with ResultCache(path, check_set=check_set_key(**options)) as cache:
+            assert cache.lookup(data_file) is None, options
+    with ResultCache(path, check_set=check_set_key(quality_stats=True)) as cache:
+        assert cache.lookup(data_file) == RESULT
+
+
+def test_content_hash_keeps_a_touched_file_cached(tmp_path, data_file):
+    with ResultCache(str(tmp_path / 'cache.db'), use_hash=True) as cache:
+        cache.store(data_file, RESULT)
+        set_mtime(data_file, os.stat(data_file).st_mtime_ns + 10 ** 9)
+        assert cache.lookup(data_file) == RESULT
+
+        with open(data_file, 'r+b') as f:
+            f.write(b'X')
+        set_mtime(data_file, os.stat(data_file).st_mtime_ns + 10 ** 9)
+        assert cache.lookup(data_file) is None
+
+
+def test_invalidate_and_evict(cache, data_file, tmp_path):
+    other = tmp_path / 'sub' / 'other.nc'
+    other.parent.mkdir()
+    other.write_bytes(b'x')
+    cache.store(data_file, RESULT)
+    cache.store(str(other), RESULT)
+
+    assert cache.invalidate([str(other.parent)]) == 1
+    assert cache.lookup(str(other)) is None
+    assert cache.evict(max_entries=0) == 1
+    assert cache.lookup(data_file) is None
+
+
+def test_zarr_identity_changes_with_a_rewritten_region(tmp_path):
+    pytest.importorskip('zarr')
+    store = str(tmp_path / 'data.zarr')
+    xr.Dataset({'a': (('t', 'x'), np.zeros((4, 3)))}).to_zarr(store, encoding={'a': {'chunks': (1, 3)}})
+    # Date the store's directories back, so the rewrite cannot fall in the same mtime tick as the first write
+    for root, dirs, _ in os.walk(store):
+        for name in dirs + ['.']:
+            set_mtime(os.path.join(root, name), 10 ** 18)
+    before = file_identity(store)
+
+    xr.Dataset({'a': (('t', 'x'), np.ones((1, 3)))}).to_zarr(store, region={'t': slice(2, 3)})
+    assert file_identity(store) != before
@@ -0,0 +1,76 @@
+# (C) British Crown Copyright 2017-2025, Met Office.
+# Please see LICENSE.md for license details.
+
+"""Tests of the per-time-step and per-cell missing fractions against numpy on small synthetic cubes."""
+
+import numpy as np
+import pytest
+import xarray as xr
+
+from aidatareadiness.completeness import (accumulators_for, completeness_dims, completeness_summary,
+                                          compute_dataset_completeness, save_completeness)
+from aidatareadiness.stats import compute_dataset_stats
+
+FILL = -999.0
+
+
+@pytest.fixture
+def dataset():
+    rng = np.random.default_rng(0)
+    values = rng.normal(280.0, 5.0, (6, 5, 4, 3))
+    values[rng.random(values.shape) < 0.2] = np.nan
+    values[2] = np.nan
+    values[:, :, 1, 2] = FILL
+    return xr.Dataset(
+        {'tas': (('time', 'level', 'lat', 'lon'), values, {'_FillValue': FILL}),
+         'lat_bnds': (('lat', 'nv'), np.zeros((4, 2)))},
+        coords={'time': np.arange(6), 'lat': [0.0, 1.0, 2.0, 3.0], 'lon': [10.0, 20.0, 30.0]},
+    )
+
+
+def expected_missing(dataset):
+    values = dataset['tas'].values
+    return np.isnan(values) | (values == FILL)
+
+
+@pytest.mark.parametrize("block_elements", [7, 60, 10_000])
+def test_fractions_match_numpy(dataset, block_elements):
+    summary = completeness_summary(dataset, compute_dataset_completeness(dataset, block_elements))
+    missing = expected_missing(dataset)
+
+    np.testing.assert_allclose(summary['tas_missing_fraction_time'], missing.mean(axis=(1, 2, 3)), rtol=1e-6)
+    np.testing.assert_allclose(summary['tas_missing_fraction_map'], missing.mean(axis=(0, 1)), rtol=1e-6)
+    assert summary['tas_missing_fraction_time'][2] == 1.0
+    assert summary['tas_missing_fraction_map'][1, 2] == 1.0
+    assert set(summary.data_vars) == {'tas_missing_fraction_time', 'tas_missing_fraction_map'}
+    np.testing.assert_array_equal(summary['lat'], dataset['lat'])
+
+
+def test_statistics_pass_fills_the_same_accumulators(dataset):
+    direct = compute_dataset_completeness(dataset, block_elements=13)
+    from_stats = accumulators_for(dataset)
+    compute_dataset_stats(dataset, thresholds=(), block_elements=13, completeness=from_stats)
+
+    np.testing.assert_array_equal(from_stats['tas'].time_missing, direct['tas'].time_missing)
+    np.testing.assert_array_equal(from_stats['tas'].map_missing, direct['tas'].map_missing)
+    np.testing.assert_array_equal(direct['tas'].time_missing, expected_missing(dataset).sum(axis=(1, 2, 3)))
+
+
+def test_grid_falls_back_to_the_last_two_dimensions():
+    data_array = xr.DataArray(np.zeros((2, 3, 4)), dims=('valid_time', 'row', 'col'))
+    assert completeness_dims(data_array) == ('valid_time', ('row', 'col'))
+    assert completeness_dims(xr.DataArray(np.zeros(3), dims=('station',))) == (None, None)
+
+
+def test_integer_variable_without_fill_has_nothing_missing():
+    dataset = xr.Dataset({'count': (('time', 'lat', 'lon'), np.ones((3, 2, 2), dtype=np.int32))})
+    summary = completeness_summary(dataset, compute_dataset_completeness(dataset))
+    assert (summary['count_missing_fraction_time'] == 0).all()
+
+
+def test_summary_round_trips_through_netcdf(dataset, tmp_path):
+    summary = completeness_summary(dataset, compute_dataset_completeness(dataset), source='tas.nc')
+    path = save_completeness(summary, str(tmp_path / 'tas_completeness.nc'))
+    with xr.open_dataset(path) as saved:
+        xr.testing.assert_allclose(saved, summary)
+        assert saved.attrs['source_file'] == 'tas.nc'
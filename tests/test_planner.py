@@ -0,0 +1,56 @@
+# (C) British Crown Copyright 2017-2025, Met Office.
+# Please see LICENSE.md for license details.
+
+"""Tests of the memory-budgeted run planner."""
+
+import pytest
+
+from aidatareadiness.checklist_auto import planner
+from aidatareadiness.checklist_auto.planner import MIN_CHUNK_BYTES, WORKER_MEMORY_ESTIMATE, plan_run, plan_workers
+from aidatareadiness.stats import BLOCK_BYTES_PER_ELEMENT, DEFAULT_BLOCK_ELEMENTS, MIN_BLOCK_ELEMENTS
+
+MB = 1024 ** 2
+GB = 1024 ** 3
+
+
+@pytest.fixture(autouse=True)
+def eight_cpus(monkeypatch):
+    monkeypatch.setattr(planner.os, 'cpu_count', lambda: 8)
+
+
+def test_without_a_budget_only_cpus_and_files_limit_workers():
+    assert plan_run(100, 4) == {'workers': 4, 'block_elements': DEFAULT_BLOCK_ELEMENTS, 'chunk_bytes': None,
+                                'worker_memory': None}
+    assert plan_workers(100, 32) == 8
+    assert plan_workers(3, 32) == 3
+    assert plan_workers(0, 4) == 1
+
+
+@pytest.mark.parametrize("max_memory, workers", [(512 * MB, 4), (2 * GB, 4), (16 * GB, 4), (64 * GB, 8)])
+def test_plan_fits_the_budget(max_memory, workers):
+    plan = plan_run(100, workers, max_memory)
+
+    per_worker = WORKER_MEMORY_ESTIMATE + plan['chunk_bytes'] + plan['block_elements'] * BLOCK_BYTES_PER_ELEMENT
+    assert plan['workers'] * per_worker <= max_memory
+    assert plan['worker_memory'] == max_memory // plan['workers']
+    assert MIN_BLOCK_ELEMENTS <= plan['block_elements'] <= DEFAULT_BLOCK_ELEMENTS
+    assert plan['chunk_bytes'] >= MIN_CHUNK_BYTES
+
+
+def test_tight_budget_reduces_workers():
+    minimum = WORKER_MEMORY_ESTIMATE + MIN_CHUNK_BYTES + MIN_BLOCK_ELEMENTS * BLOCK_BYTES_PER_ELEMENT
+    assert plan_workers(100, 8, 3 * minimum) == 3
+    assert plan_workers(100, 8, 3 * minimum - 1) == 2
+
+
+def test_budget_below_the_minimum_still_runs_one_worker_with_the_smallest_blocks():
+    plan = plan_run(10, 4, 64 * MB)
+    assert plan['workers'] == 1
+    assert plan['block_elements'] == MIN_BLOCK_ELEMENTS
+    assert plan['chunk_bytes'] == MIN_CHUNK_BYTES
+
+
+def test_larger_budget_gives_larger_blocks():
+    small, large = plan_run(1, 1, 512 * MB), plan_run(1, 1, 2 * GB)
+    assert small['block_elements'] < large['block_elements']
+    assert small['chunk_bytes'] < large['chunk_bytes']
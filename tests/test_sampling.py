@@ -0,0 +1,86 @@
+# (C) British Crown Copyright 2017-2025, Met Office.
+# Please see LICENSE.md for license details.
+
+"""Tests of the sampled quality statistics: unit selection, the ratio estimator and its interval coverage."""
+
+import numpy as np
+import pytest
+import xarray as xr
+
+from aidatareadiness.sampling import (estimate_variable_stats, ratio_estimate, sample_unit_slices, tile_shape,
+                                      unit_elements_for)
+
+
+@pytest.fixture(scope='module')
+def clustered():
+    """A (time, lat, lon) field whose missing rate differs from one time step to the next, as in real gaps."""
+    rng = np.random.default_rng(0)
+    values = rng.normal(280.0, 5.0, (400, 10, 10))
+    rates = rng.beta(0.5, 4.0, 400)
+    values[rng.random(values.shape) < rates[:, None, None]] = np.nan
+    return xr.DataArray(values, dims=('time', 'lat', 'lon'), name='tas')
+
+
+def test_tile_shape():
+    assert tile_shape((10, 1000, 500)) == (1, 128, 128)
+    assert tile_shape((10, 50, 500)) == (1, 50, 128)
+    assert tile_shape((3, 4, 20, 20), tile_elements=100) == (1, 1, 10, 10)
+    assert tile_shape((1000,), tile_elements=100) == (100,)
+
+
+def test_unit_elements_default_to_one_field():
+    assert unit_elements_for((12, 30, 40)) == 1200
+    assert unit_elements_for((12, 30, 40), block_elements=100) == 100
+
+
+@pytest.mark.parametrize("strategy", ['stratified', 'random'])
+def test_sampled_units_are_distinct_whole_fields(strategy):
+    units, population = sample_unit_slices((50, 4, 6), 24, 0.1, strategy, np.random.default_rng(1))
+    assert population == 50
+    assert len(units) == 5
+    starts = [index[0].start for index in units]
+    assert starts == sorted(set(starts))
+    assert all(index[1:] == (slice(0, 4), slice(0, 6)) for index in units)
+    if strategy == 'stratified':
+        assert [start // 10 for start in starts] == [0, 1, 2, 3, 4]
+
+
+def test_unknown_strategy_is_rejected():
+    with pytest.raises(ValueError):
+        sample_unit_slices((10, 2, 2), 4, 0.5, 'systematic')
+
+
+def test_ratio_estimate_matches_the_formula():
+    y, n, population = np.array([1.0, 4.0, 0.0, 3.0]), np.array([10.0, 10.0, 8.0, 12.0]), 20
+    estimate, (low, high) = ratio_estimate(y, n, population)
+
+    ratio = y.sum() / n.sum()
+    standard_error = np.sqrt((1 - 4 / population) * np.sum((y - ratio * n) ** 2) / 3 / (4 * n.mean() ** 2))
+    assert estimate == pytest.approx(ratio)
+    assert high - low == pytest.approx(2 * 1.959964 * standard_error, rel=1e-6)
+
+
+def test_full_sample_is_exact(clustered):
+    stats = estimate_variable_stats(clustered, fraction=1.0, thresholds=(2,), seed=0)
+    values = clustered.values
+    valid = values[~np.isnan(values)]
+
+    assert stats['sampled_units'] == stats['population_units'] == 400
+    assert stats['percentage_missing'] == pytest.approx(np.isnan(values).mean() * 100)
+    assert stats['percentage_missing_ci'] == [pytest.approx(stats['percentage_missing'])] * 2
+    assert stats['mean'] == pytest.approx(valid.mean())
+    z = np.abs(valid - valid.mean()) / valid.std()
+    assert stats['percentage_outliers'][2] == pytest.approx((z > 2).mean() * 100)
+
+
+@pytest.mark.parametrize("strategy", ['stratified', 'random'])
+def test_confidence_interval_coverage(clustered, strategy):
+    truth = np.isnan(clustered.values).mean() * 100
+    trials = 200
+    covered = 0
+    for seed in range(trials):
+        stats = estimate_variable_stats(clustered, fraction=0.1, thresholds=(), strategy=strategy, seed=seed)
+        low, high = stats['percentage_missing_ci']
+        covered += low <= truth <= high
+    # The nominal coverage is 95%; allow for the normal approximation and the sampling error of 200 trials
+    assert covered / trials >= 0.88
@@ -0,0 +1,95 @@
+# (C) British Crown Copyright 2017-2025, Met Office.
+# Please see LICENSE.md for license details.
+
+"""Tests of the check server's authentication and request validation, through the client."""
+
+import os
+import stat
+import threading
+
+import numpy as np
+import pytest
+import xarray as xr
+
+from aidatareadiness.checklist_auto import client
+from aidatareadiness.checklist_auto.server import CheckService, UnixHTTPServer, make_server
+
+TOKEN = 'secret-token'
+
+
+def serve(server):
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return thread
+
+
+@pytest.fixture
+def tcp_server():
+    service = CheckService()
+    server = make_server(service, port=0, token=TOKEN)
+    thread = serve(server)
+    yield {'port': server.server_address[1]}
+    server.shutdown()
+    thread.join()
+    server.server_close()
+    service.handles.clear()
+
+
+@pytest.fixture
+def data_file(tmp_path):
+    path = str(tmp_path / 'tas.nc')
+    xr.Dataset({'tas': (('time', 'lat', 'lon'), np.ones((3, 2, 2)))},
+               coords={'time': np.arange(3.0), 'lat': [0.0, 1.0], 'lon': [0.0, 1.0]}).to_netcdf(path)
+    return path
+
+
+def test_tcp_requires_a_token():
+    with pytest.raises(ValueError):
+        make_server(CheckService(), port=0, token=None)
+
+
+def test_requests_with_the_token_are_served(tcp_server):
+    assert client.request('GET', '/health', token=TOKEN, **tcp_server)['status'] == 'ok'
+
+
+@pytest.mark.parametrize("token", [None, 'wrong-token', TOKEN + 'x'])
+def test_requests_without_the_token_are_refused(tcp_server, token):
+    with pytest.raises(RuntimeError, match="Not authorised"):
+        client.request('GET', '/health', token=token, **tcp_server)
+    with pytest.raises(RuntimeError, match="Not authorised"):
+        client.request('POST', '/shutdown', token=token, **tcp_server)
+    # The refused shutdown did not stop the server
+    assert client.request('GET', '/health', token=TOKEN, **tcp_server)['status'] == 'ok'
+
+
+def test_relative_and_unwritable_outputs_are_rejected(tcp_server, tmp_path):
+    with pytest.raises(RuntimeError, match="absolute"):
+        client.request('POST', '/check', {'files': [], 'output': 'results.json'}, token=TOKEN, **tcp_server)
+    with pytest.raises(RuntimeError, match="not writable"):
+        client.request('POST', '/check', {'files': [], 'output': str(tmp_path / 'missing' / 'results.json')},
+                       token=TOKEN, **tcp_server)
+    with pytest.raises(RuntimeError, match="Unknown options"):
+        client.request('POST', '/check', {'files': [], 'options': {'shell': 'rm -rf /'}}, token=TOKEN, **tcp_server)
+
+
+def test_checks_reuse_the_open_handle(tcp_server, data_file):
+    for _ in range(2):
+        results = client.check([data_file], options={'metadata_only': True}, token=TOKEN, **tcp_server)
+        assert [result['file'] for result in results] == [data_file]
+        assert 'error' not in results[0]
+    health = client.request('GET', '/health', token=TOKEN, **tcp_server)
+    assert (health['handles'], health['handle_hits'], health['handle_misses']) == (1, 1, 1)
+
+
+def test_unix_socket_is_owner_only(tmp_path):
+    socket_path = str(tmp_path / 'server.sock')
+    server = make_server(CheckService(), socket_path=socket_path)
+    thread = serve(server)
+    try:
+        assert isinstance(server, UnixHTTPServer)
+        assert stat.S_IMODE(os.stat(socket_path).st_mode) == 0o600
+        assert client.request('GET', '/health', socket_path=socket_path)['status'] == 'ok'
+    finally:
+        server.shutdown()
+        thread.join()
+        server.server_close()
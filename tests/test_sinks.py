@@ -0,0 +1,107 @@
+# (C) British Crown Copyright 2017-2025, Met Office.
+# Please see LICENSE.md for license details.
+
+"""Tests of the streaming JSON Lines and Parquet sinks, including reruns over an existing output."""
+
+import json
+import math
+import os
+
+import pytest
+
+from aidatareadiness.checklist_auto.sinks import (JsonLinesSink, ParquetSink, flatten_result, next_part_number,
+                                                   open_sink)
+
+
+def result(name, **fields):
+    return dict({'file': name, 'spatial_consistency': True}, **fields)
+
+
+def write_all(sink, results):
+    for item in results:
+        sink.write(item)
+    sink.close()
+
+
+def parts(path):
+    return sorted(name for name in os.listdir(path) if name.endswith('.parquet'))
+
+
+def read_lines(path):
+    with open(path) as f:
+        return [json.loads(line)['file'] for line in f]
+
+
+def test_json_lines_rerun_replaces_the_file(tmp_path):
+    path = str(tmp_path / 'out.jsonl')
+    write_all(JsonLinesSink(path), [result('a.nc'), result('b.nc')])
+    write_all(JsonLinesSink(path), [result('c.nc')])
+    assert read_lines(path) == ['c.nc']
+
+
+def test_json_lines_append_keeps_earlier_results(tmp_path):
+    path = str(tmp_path / 'out.jsonl')
+    write_all(JsonLinesSink(path), [result('a.nc')])
+    write_all(open_sink(path, append=True), [result('b.nc')])
+    assert read_lines(path) == ['a.nc', 'b.nc']
+
+
+def test_json_lines_are_strict_json(tmp_path):
+    path = str(tmp_path / 'out.jsonl')
+    write_all(JsonLinesSink(path), [result('a.nc', temporal_resolution=math.nan)])
+    with open(path) as f:
+        assert json.loads(f.readline())['temporal_resolution'] is None
+
+
+def test_next_part_number(tmp_path):
+    assert next_part_number(str(tmp_path)) == 0
+    for name in ('part-00000.parquet', 'part-00002.parquet', 'part-x.parquet', 'other-00009.parquet'):
+        (tmp_path / name).write_bytes(b'')
+    assert next_part_number(str(tmp_path)) == 3
+
+
+def test_parquet_parts_are_written_every_row_group(tmp_path):
+    pytest.importorskip('pyarrow')
+    pd = pytest.importorskip('pandas')
+    path = str(tmp_path / 'out.parquet')
+    write_all(ParquetSink(path, row_group_size=2), [result(f'{i}.nc') for i in range(5)])
+
+    assert parts(path) == ['part-00000.parquet', 'part-00001.parquet', 'part-00002.parquet']
+    assert sorted(pd.read_parquet(path)['file']) == [f'{i}.nc' for i in range(5)]
+
+
+def test_parquet_rerun_replaces_earlier_parts(tmp_path):
+    pytest.importorskip('pyarrow')
+    pd = pytest.importorskip('pandas')
+    path = str(tmp_path / 'out.parquet')
+    write_all(ParquetSink(path, row_group_size=1), [result('a.nc'), result('b.nc')])
+    write_all(ParquetSink(path), [result('c.nc')])
+
+    assert parts(path) == ['part-00000.parquet']
+    assert list(pd.read_parquet(path)['file']) == ['c.nc']
+
+
+def test_parquet_append_numbers_after_the_highest_part(tmp_path):
+    pytest.importorskip('pyarrow')
+    pd = pytest.importorskip('pandas')
+    path = str(tmp_path / 'out.parquet')
+    write_all(ParquetSink(path, row_group_size=1), [result('a.nc'), result('b.nc'), result('c.nc')])
+    os.remove(os.path.join(path, 'part-00001.parquet'))
+
+    write_all(open_sink(path, append=True), [result('d.nc')])
+
+    assert parts(path) == ['part-00000.parquet', 'part-00002.parquet', 'part-00003.parquet']
+    assert sorted(pd.read_parquet(path)['file']) == ['a.nc', 'c.nc', 'd.nc']
+
+
+def test_flatten_result_splits_ranges_and_keeps_details():
+    record = flatten_result({'file': 'a.nc', 'spatial_resolution': [0.5, 1.0],
+                             'spatial_coverage': {'latitude': [-90.0, 90.0]}, 'variables': ['t']})
+    assert (record['lat_resolution'], record['lon_resolution']) == (0.5, 1.0)
+    assert (record['lat_min'], record['lat_max'], record['lon_min']) == (-90.0, 90.0, None)
+    assert json.loads(record['details']) == {'variables': ['t']}
+
+
+def test_open_sink_rejects_other_extensions(tmp_path):
+    with pytest.raises(ValueError):
+        open_sink(str(tmp_path / 'out.csv'))
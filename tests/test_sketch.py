@@ -0,0 +1,113 @@
+# (C) British Crown Copyright 2017-2025, Met Office.
+# Please see LICENSE.md for license details.
+
+"""Tests of the KLL quantile sketch and the robust statistics built on it, against exact numpy results."""
+
+import json
+import math
+
+import numpy as np
+import pytest
+import xarray as xr
+
+from aidatareadiness.sketch import (MAD_TO_STD, SAMPLE_ITEMS, QuantileSketch, compute_variable_robust_stats,
+                                    merge_sketches)
+
+QUANTILES = np.linspace(0.01, 0.99, 99)
+
+
+def rank_error(sketch, values, qs=QUANTILES):
+    """Largest difference between the requested quantiles and the exact ranks of the sketch's answers."""
+    ordered = np.sort(values)
+    return np.abs(np.searchsorted(ordered, sketch.quantiles(qs), side='right') / ordered.size - qs).max()
+
+
+def rank_bound(k):
+    # KLL's rank error is of the order of 1 / k; the constant leaves room for the randomness of compaction
+    return 4 / k
+
+
+def sketch_of(blocks, k, seed=0):
+    sketch = QuantileSketch(k, seed=seed)
+    for block in blocks:
+        sketch.update(block)
+    return sketch
+
+
+@pytest.mark.parametrize("k", [100, 200, 1000])
+@pytest.mark.parametrize("seed", range(5))
+def test_rank_error_is_within_the_bound(k, seed):
+    values = np.random.default_rng(seed).lognormal(0.0, 1.0, 100_000)
+    sketch = sketch_of(np.array_split(values, 37), k, seed)
+    assert sketch.count == values.size
+    assert (sketch.min, sketch.max) == (values.min(), values.max())
+    assert rank_error(sketch, values) <= rank_bound(k)
+
+
+def test_sampled_block_is_within_the_sampling_bound():
+    values = np.random.default_rng(1).normal(0.0, 1.0, 4 * SAMPLE_ITEMS)
+    sketch = sketch_of([values], 1000)
+    assert sketch.count == values.size
+    assert rank_error(sketch, values) <= rank_bound(1000) + 3 / math.sqrt(SAMPLE_ITEMS)
+
+
+def test_merged_sketches_are_within_the_bound():
+    rng = np.random.default_rng(2)
+    parts = [rng.normal(loc, 1.0, 20_000) for loc in (-5.0, 0.0, 10.0)]
+    merged = QuantileSketch(200, seed=0)
+    for seed, part in enumerate(parts):
+        merged.merge(sketch_of(np.array_split(part, 4), 200, seed))
+    values = np.concatenate(parts)
+
+    assert merged.count == values.size
+    assert rank_error(merged, values) <= rank_bound(200)
+
+
+def test_nans_are_ignored_and_extremes_are_exact():
+    values = np.array([3.0, np.nan, -1.0, 7.0, np.nan])
+    sketch = sketch_of([values], 100)
+    assert sketch.count == 3
+    assert sketch.quantile(0.0) == -1.0
+    assert sketch.quantile(1.0) == 7.0
+    assert sketch.quantile(0.5) == 3.0
+
+
+def test_empty_sketch_is_strict_json():
+    data = QuantileSketch(100).to_dict()
+    assert data['min'] is None and data['max'] is None
+    json.dumps(data, allow_nan=False)
+
+    restored = QuantileSketch.from_dict(data)
+    assert restored.count == 0
+    assert np.isnan(restored.quantile(0.5))
+    summary = merge_sketches([data, data])
+    assert summary['min'] is None and summary['max'] is None
+
+
+def test_round_trip_keeps_the_answers():
+    values = np.random.default_rng(3).normal(0.0, 1.0, 10_000)
+    sketch = sketch_of(np.array_split(values, 10), 200)
+    restored = QuantileSketch.from_dict(json.loads(json.dumps(sketch.to_dict())))
+    np.testing.assert_array_equal(restored.quantiles(QUANTILES), sketch.quantiles(QUANTILES))
+
+
+def test_robust_stats_match_numpy():
+    rng = np.random.default_rng(4)
+    values = rng.normal(0.0, 1.0, (20, 30, 40))
+    values[0, 0, :5] = 50.0
+    values[1, 1, :3] = -999.0
+    data_array = xr.DataArray(values, dims=('time', 'lat', 'lon'), name='t')
+
+    # With k above the number of valid values the sketch is exact
+    stats = compute_variable_robust_stats(data_array, fill_value=-999.0, k=values.size, block_elements=1000)
+
+    valid = values[values != -999.0]
+    median = np.quantile(valid, 0.5, method='inverted_cdf')
+    mad = np.quantile(np.abs(valid - median), 0.5, method='inverted_cdf')
+    q1, q3 = np.quantile(valid, [0.25, 0.75], method='inverted_cdf')
+    spread, iqr = 3.5 * MAD_TO_STD * mad, q3 - q1
+    assert stats['valid_count'] == valid.size
+    assert (stats['median'], stats['mad'], stats['q1'], stats['q3']) == (median, mad, q1, q3)
+    assert stats['mad_outliers'] == np.count_nonzero(np.abs(valid - median) > spread)
+    assert stats['iqr_outliers'] == np.count_nonzero((valid < q1 - 1.5 * iqr) | (valid > q3 + 1.5 * iqr))
+    assert stats['histogram']['counts'] == np.histogram(valid, bins=20)[0].tolist()
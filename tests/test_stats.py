@@ -0,0 +1,99 @@
+# (C) British Crown Copyright 2017-2025, Met Office.
+# Please see LICENSE.md for license details.
+
+"""Tests of the streaming statistics engine against numpy on small synthetic arrays."""
+
+import numpy as np
+import pytest
+import xarray as xr
+
+from aidatareadiness.stats import RunningStats, block_slices, compute_dataset_stats, compute_variable_stats
+
+
+def stats_of(*blocks):
+    stats = RunningStats()
+    for block in blocks:
+        stats.update(block)
+    return stats
+
+
+def test_running_stats_match_numpy():
+    rng = np.random.default_rng(0)
+    values = rng.normal(5.0, 2.0, 1000)
+    values[::7] = np.nan
+    stats = stats_of(*np.array_split(values, 13))
+
+    valid = values[~np.isnan(values)]
+    assert stats.total == values.size
+    assert stats.nan_count == np.isnan(values).sum()
+    assert stats.count == valid.size
+    assert stats.mean == pytest.approx(valid.mean(), rel=1e-12)
+    assert stats.std == pytest.approx(valid.std(), rel=1e-12)
+
+
+def test_merge_is_associative():
+    rng = np.random.default_rng(1)
+    a, b, c = (rng.normal(loc, 1.0, size) for loc, size in [(0.0, 100), (1e6, 37), (-3.0, 250)])
+
+    left = stats_of(a).merge(stats_of(b)).merge(stats_of(c))
+    right = stats_of(a).merge(stats_of(b).merge(stats_of(c)))
+    combined = np.concatenate([a, b, c])
+
+    for merged in (left, right):
+        assert merged.count == combined.size
+        assert merged.mean == pytest.approx(combined.mean(), rel=1e-12)
+        assert merged.variance == pytest.approx(combined.var(), rel=1e-9)
+    assert left.mean == pytest.approx(right.mean, rel=1e-12)
+    assert left.m2 == pytest.approx(right.m2, rel=1e-12)
+
+
+def test_merge_with_empty_stats():
+    values = np.arange(10.0)
+    stats = RunningStats().merge(stats_of(values)).merge(RunningStats())
+    assert stats.count == 10
+    assert stats.mean == pytest.approx(values.mean())
+    assert np.isnan(RunningStats().std)
+
+
+def test_fill_values_are_counted():
+    values = np.array([1, -999, 3, -999, 5], dtype=np.int32)
+    stats = RunningStats()
+    stats.update(values, fill_value=-999)
+    assert stats.fill_count == 2
+    assert stats.nan_count == 0
+
+
+@pytest.mark.parametrize("shape, max_elements", [((4, 5, 6), 7), ((3, 10), 10), ((1,), 1), ((2, 3), 1000)])
+def test_block_slices_cover_every_element_once(shape, max_elements):
+    covered = np.zeros(shape, dtype=int)
+    for index in block_slices(shape, max_elements):
+        assert covered[index].size <= max_elements
+        covered[index] += 1
+    assert (covered == 1).all()
+
+
+def test_variable_stats_match_numpy_with_small_blocks():
+    rng = np.random.default_rng(2)
+    values = rng.standard_t(3, size=(6, 8, 9))
+    values[0, :2] = np.nan
+    data_array = xr.DataArray(values, dims=('time', 'lat', 'lon'), name='t')
+
+    stats = compute_variable_stats(data_array, thresholds=(2, 3), block_elements=50)
+
+    valid = values[~np.isnan(values)]
+    z = np.abs(valid - valid.mean()) / valid.std()
+    assert stats['total_values'] == values.size
+    assert stats['missing_values_count'] == np.isnan(values).sum()
+    assert stats['valid_count'] == valid.size
+    assert stats['mean'] == pytest.approx(valid.mean(), rel=1e-12)
+    assert stats['std'] == pytest.approx(valid.std(), rel=1e-12)
+    assert stats['outlier_counts'] == {2: int((z > 2).sum()), 3: int((z > 3).sum())}
+
+
+def test_dataset_stats_skip_bounds_variables():
+    dataset = xr.Dataset({
+        'a': (('x',), np.arange(5.0)),
+        'lat_bnds': (('x', 'nv'), np.zeros((5, 2))),
+    })
+    names = [stats['variable_name'] for stats in compute_dataset_stats(dataset, thresholds=())]
+    assert names == ['a']
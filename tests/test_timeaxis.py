@@ -0,0 +1,141 @@
+# (C) British Crown Copyright 2017-2025, Met Office.
+# Please see LICENSE.md for license details.
+
+"""Tests of the time axis analysis on model calendars and sub-hourly axes."""
+
+import numpy as np
+import pandas as pd
+import pytest
+import xarray as xr
+
+from aidatareadiness.timeaxis import (NS_PER_DAY, analyse_time_axis, analyse_time_coordinate, parse_time_units,
+                                      raw_times_to_int64, runs)
+
+# Non-standard calendars are converted and formatted through cftime
+cftime = pytest.importorskip('cftime')
+
+
+def analyse_raw(values, units, calendar=None):
+    return analyse_time_axis(raw_times_to_int64(values, units, calendar), calendar)
+
+
+def test_parse_time_units():
+    assert parse_time_units('hours since 1900-01-01 00:00') == (3600 * 10 ** 9, '1900-01-01 00:00')
+    assert parse_time_units('secs since 2020-01-01')[0] == 10 ** 9
+    with pytest.raises(ValueError):
+        parse_time_units('months since 2000-01-01')
+    with pytest.raises(ValueError):
+        parse_time_units('kelvin')
+
+
+@pytest.mark.parametrize("calendar", ['360_day', 'noleap', 'standard'])
+def test_raw_times_match_cftime(calendar):
+    values = np.array([0, 59, 360, 1000])
+    units = 'days since 1990-02-15 06:00'
+    expected = cftime.date2num(cftime.num2date(values, units, calendar), 'microseconds since 1970-01-01', calendar)
+    np.testing.assert_array_equal(raw_times_to_int64(values, units, calendar), np.round(expected).astype(np.int64) * 1000)
+
+
+def test_gap_on_a_360_day_axis():
+    values = np.delete(np.arange(720), np.arange(100, 105))
+    report = analyse_raw(values, 'days since 2000-01-01', '360_day')
+
+    assert report['dominant_step'] == '86400 seconds'
+    assert report['start'] == '2000-01-01T00:00:00'
+    # Day 719 is the last of two 360-day years of twelve 30-day months
+    assert report['end'] == '2001-12-30T00:00:00'
+    assert not report['regular']
+    assert (report['num_gaps'], report['missing_steps']) == (1, 5)
+    assert report['gaps'] == [{'after': '2000-04-10T00:00:00', 'before': '2000-04-16T00:00:00', 'missing_steps': 5}]
+
+
+def test_360_day_months_are_regular():
+    report = analyse_raw(np.arange(0, 360 * 3, 30), 'days since 1850-01-01', '360_day')
+    assert report['regular']
+    assert report['dominant_step_ns'] == 30 * NS_PER_DAY
+
+
+def test_noleap_and_standard_months_are_counted_in_months():
+    noleap = xr.date_range('2001-01-15', periods=36, freq='MS', calendar='noleap', use_cftime=True)
+    days = cftime.date2num(list(noleap), 'days since 2001-01-01', 'noleap')
+    report = analyse_raw(np.delete(days, [7, 8]), 'days since 2001-01-01', 'noleap')
+    assert report['dominant_step'] == '1 months'
+    assert (report['num_gaps'], report['missing_steps'], report['num_irregular_steps']) == (1, 2, 0)
+
+    standard = pd.date_range('2000-01-01', periods=48, freq='MS').values.astype('datetime64[ns]').view(np.int64)
+    report = analyse_time_axis(standard)
+    assert report['regular'] and report['dominant_step'] == '1 months'
+
+
+def test_gaps_on_a_ten_minute_axis():
+    values = np.arange(0, 6 * 3600, 600)
+    values = np.delete(values, [5, 6, 7, 20])
+    report = analyse_raw(values, 'seconds since 2024-06-01 00:00:00')
+
+    assert report['dominant_step'] == '600 seconds'
+    assert (report['num_gaps'], report['missing_steps']) == (2, 4)
+    assert [gap['missing_steps'] for gap in report['gaps']] == [3, 1]
+    assert report['gaps'][0] == {'after': '2024-06-01T00:40:00.000000000',
+                                 'before': '2024-06-01T01:20:00.000000000', 'missing_steps': 3}
+
+
+def test_fractional_minutes_keep_their_precision():
+    values = np.delete(np.arange(0, 60, 0.5), [10])
+    report = analyse_raw(values, 'minutes since 2024-06-01')
+    assert report['dominant_step_ns'] == 30 * 10 ** 9
+    assert (report['num_gaps'], report['missing_steps'], report['num_irregular_steps']) == (1, 1, 0)
+
+
+def test_duplicates_reversals_and_irregular_steps():
+    # Hourly, with two repeated hours, a step back, a missing hour and a half-hour step
+    hours = np.array([0, 1, 1, 2, 2, 3, 4, 3, 5, 6, 6.5, 7.5])
+    report = analyse_raw(hours, 'hours since 2020-01-01')
+
+    assert report['dominant_step'] == '3600 seconds'
+    # Repeated timestamps one step apart are one range
+    assert report['num_duplicates'] == 1
+    assert report['duplicates'][0] == {'start': '2020-01-01T01:00:00.000000000',
+                                       'end': '2020-01-01T02:00:00.000000000', 'timestamps': 2}
+    assert report['num_reversals'] == 1
+    assert report['reversals'][0]['start'] == '2020-01-01T04:00:00.000000000'
+    assert (report['num_gaps'], report['missing_steps']) == (1, 1)
+    assert report['num_irregular_steps'] == 1
+    assert report['irregular_steps'][0] == {'start': '2020-01-01T06:00:00.000000000',
+                                            'end': '2020-01-01T06:30:00.000000000', 'steps': 1}
+    assert not report['regular']
+
+
+def test_max_ranges_limits_the_list_but_not_the_count():
+    values = np.delete(np.arange(100), np.arange(5, 95, 3))
+    report = analyse_time_axis(raw_times_to_int64(values, 'hours since 2000-01-01'), max_ranges=3)
+    assert report['num_gaps'] == 30
+    assert len(report['gaps']) == 3
+
+
+def test_decoded_coordinate_uses_its_calendar():
+    time = xr.DataArray(xr.date_range('2000-01-01', periods=10, freq='D', calendar='360_day', use_cftime=True),
+                        dims='time')
+    report = analyse_time_coordinate(time.isel(time=[0, 1, 2, 5, 6, 7, 8, 9]))
+    assert report['calendar'] == '360_day'
+    assert (report['num_gaps'], report['missing_steps']) == (1, 2)
+
+
+def test_undecoded_coordinate_uses_its_units():
+    time = xr.DataArray([0, 1, 3, 4], dims='time', attrs={'units': 'days since 2000-01-01', 'calendar': '360_day'})
+    report = analyse_time_coordinate(time)
+    assert (report['calendar'], report['end']) == ('360_day', '2000-01-05T00:00:00')
+    assert (report['num_gaps'], report['missing_steps']) == (1, 1)
+    with pytest.raises(ValueError):
+        analyse_time_coordinate(xr.DataArray([0.0, 1.0], dims='time'))
+
+
+def test_runs():
+    assert runs(np.array([], dtype=np.int64)) == []
+    assert [tuple(map(int, run)) for run in runs(np.array([1, 2, 3, 7, 9, 10]))] == [(1, 3), (7, 7), (9, 10)]
+
+
+def test_empty_and_single_step_axes():
+    assert analyse_time_axis(np.array([], dtype=np.int64)) == {'time_steps': 0, 'calendar': None}
+    report = analyse_time_axis(np.array([0], dtype=np.int64))
+    assert report['dominant_step'] is None
+    assert report['regular']
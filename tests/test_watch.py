@@ -0,0 +1,142 @@
+# (C) British Crown Copyright 2017-2025, Met Office.
+# Please see LICENSE.md for license details.
+
+"""Tests of the manifest and the incremental runs of growing directories."""
+
+import os
+
+import pytest
+
+from aidatareadiness.checklist_auto.watch import Manifest, run_incremental, summarise_result, watch
+
+
+def is_supported(path):
+    return path.endswith('.nc')
+
+
+class Recorder:
+    """A stand-in for gridded.process_files that records the batches it is given."""
+
+    def __init__(self):
+        self.batches = []
+
+    def __call__(self, paths):
+        self.batches.append(sorted(os.path.basename(path) for path in paths))
+        # The latitude range grows with the file size, so the aggregate shows which version was checked
+        return [{'file': path, 'spatial_consistency': True, 'temporal_consistency': False,
+                 'spatial_coverage': {'latitude': (0.0, float(os.path.getsize(path)))}} for path in paths]
+
+
+def touch(path, content=b'x'):
+    with open(path, 'ab') as f:
+        f.write(content)
+
+
+def bump_mtime(path):
+    mtime_ns = os.stat(path).st_mtime_ns + 10 ** 9
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+@pytest.fixture
+def tree(tmp_path):
+    root = tmp_path / 'data'
+    (root / 'sub').mkdir(parents=True)
+    touch(root / 'a.nc')
+    touch(root / 'sub' / 'b.nc', b'xx')
+    touch(root / 'notes.txt')
+    return root
+
+
+def test_only_new_files_are_processed(tree, tmp_path):
+    process = Recorder()
+    manifest = Manifest(str(tmp_path / 'manifest.json'))
+    run_incremental([str(tree)], manifest, process, is_supported)
+    run_incremental([str(tree)], manifest, process, is_supported)
+
+    touch(tree / 'sub' / 'c.nc')
+    run_incremental([str(tree)], manifest, process, is_supported, full=False)
+
+    assert process.batches == [['a.nc', 'b.nc'], ['c.nc']]
+    assert manifest.aggregate['files'] == 3
+    assert manifest.aggregate['spatially_consistent'] == 3
+    assert manifest.aggregate['temporally_consistent'] == 0
+
+
+def test_manifest_round_trips(tree, tmp_path):
+    path = str(tmp_path / 'manifest.json')
+    manifest = Manifest(path)
+    run_incremental([str(tree)], manifest, Recorder(), is_supported)
+
+    reloaded = Manifest(path)
+    assert reloaded.files == manifest.files
+    assert reloaded.aggregate == manifest.aggregate
+    process = Recorder()
+    run_incremental([str(tree)], reloaded, process, is_supported)
+    assert process.batches == []
+
+
+def test_removed_files_leave_the_aggregate(tree, tmp_path):
+    manifest = Manifest(str(tmp_path / 'manifest.json'))
+    run_incremental([str(tree)], manifest, Recorder(), is_supported)
+    os.remove(tree / 'sub' / 'b.nc')
+    run_incremental([str(tree)], manifest, Recorder(), is_supported, full=False)
+
+    assert sorted(os.path.basename(path) for path in manifest.files) == ['a.nc']
+    assert manifest.aggregate['files'] == 1
+    assert manifest.aggregate['latitude'] == [0.0, 1.0]
+
+
+def test_growing_file_is_restatted_until_unchanged(tree, tmp_path):
+    process = Recorder()
+    manifest = Manifest(str(tmp_path / 'manifest.json'))
+    run_incremental([str(tree)], manifest, process, is_supported)
+    new = tree / 'new.nc'
+    touch(new)
+    run_incremental([str(tree)], manifest, process, is_supported, full=False)
+
+    # Appending does not change the directory's mtime, but the file changed at the last poll
+    touch(new, b'yyyy')
+    bump_mtime(new)
+    run_incremental([str(tree)], manifest, process, is_supported, full=False)
+    assert manifest.aggregate['latitude'] == [0.0, 5.0]
+
+    # An unchanged poll ends the restatting; later appends wait for the full scan
+    run_incremental([str(tree)], manifest, process, is_supported, full=False)
+    touch(new, b'z')
+    bump_mtime(new)
+    run_incremental([str(tree)], manifest, process, is_supported, full=False)
+    run_incremental([str(tree)], manifest, process, is_supported, full=True)
+
+    assert process.batches == [['a.nc', 'b.nc'], ['new.nc'], ['new.nc'], ['new.nc']]
+    assert manifest.aggregate['files'] == 3
+    assert manifest.aggregate['latitude'] == [0.0, 6.0]
+
+
+def test_aggregate_is_rebuilt_once_per_poll(tree, tmp_path, monkeypatch):
+    manifest = Manifest(str(tmp_path / 'manifest.json'))
+    run_incremental([str(tree)], manifest, Recorder(), is_supported)
+    for name in ('a.nc', 'sub/b.nc'):
+        touch(tree / name)
+        bump_mtime(tree / name)
+
+    rebuilds = []
+    rebuild = manifest.rebuild_aggregate
+    monkeypatch.setattr(manifest, 'rebuild_aggregate', lambda: rebuilds.append(1) or rebuild())
+    run_incremental([str(tree)], manifest, Recorder(), is_supported)
+
+    assert len(rebuilds) == 1
+    assert manifest.aggregate['files'] == 2
+    assert manifest.aggregate['latitude'] == [0.0, 3.0]
+
+
+def test_errors_are_counted():
+    assert summarise_result(None) == {'error': 'File could not be opened'}
+    assert summarise_result({'file': 'x.nc', 'error': 'boom'}) == {'error': 'boom'}
+
+
+def test_watch_stops_after_max_cycles(tree, tmp_path):
+    batches = []
+    aggregate = watch([str(tree)], Manifest(str(tmp_path / 'manifest.json')), Recorder(), is_supported,
+                      poll_interval=0, max_cycles=2, on_results=lambda results, _: batches.append(len(results)))
+    assert batches == [2]
+    assert aggregate['files'] == 2